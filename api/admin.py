@@ -1,22 +1,31 @@
 import csv
 import json
+import os
 from datetime import timedelta
 
 from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
 from django.db.models import Count, Sum, Q
 from django.db.models.functions import TruncDate
-from django.http import HttpRequest, HttpResponse
-from django.urls import reverse
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
 from django.utils import timezone
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
 from django.contrib import admin, messages
+from django.db import transaction
 
 
+
+from .search import search_users
+from .counters import votes_changed
+from . import jobqueue, payouts, proofs, rewards, scheduler, timings, vote_dedup, vote_lifecycle
 from .models import (
     User, UserPhone, Project, Vote, OtpAttempt, Referral,
-    Transaction, Withdrawal, AdminLog, SeleniumJob, Channel, Setting, ExportJob,RequiredChannel
+    Transaction, Withdrawal, AdminLog, SeleniumJob, Channel, Setting, ExportJob,RequiredChannel,
+    Broadcast, SeleniumNode,
 )
 
 # ==============================
@@ -293,7 +302,7 @@ class UserAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
     list_filter = ("language", "active", TodayCreatedFilter)
     search_fields = ("user_id", "username", "full_name")
     date_hierarchy = "created_at"
-    readonly_fields = ("created_at",)
+    readonly_fields = ("created_at", "votes_count", "success_votes", "paid_out_sum")
     inlines = [UserPhoneInline]
     actions = ["export_as_csv", "activate_users", "deactivate_users"]
 
@@ -302,24 +311,24 @@ class UserAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
 
     csv_filename_prefix = "users"
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        # Annotate with stats
-        return qs.annotate(
-            votes_count=Count("votes", distinct=True),
-            withdraw_paid_sum=Sum("withdrawals__amount_sum", filter=Q(withdrawals__status="PAID")),
-        )
+    def get_search_results(self, request, queryset, search_term):
+        # icontains skan o'rniga indekslangan qidiruv (api/search.py)
+        if not search_term.strip():
+            return queryset, False
+        return search_users(queryset, search_term), False
 
+    # Hisoblagich ustunlaridan (api/counters.py) — JOIN/annotate yo'q
     def votes_count_display(self, obj):
-        return obj.votes_count or 0
+        return f"{obj.success_votes} / {obj.votes_count}"
 
-    votes_count_display.short_description = "Votes"
+    votes_count_display.short_description = "Votes (ok/all)"
+    votes_count_display.admin_order_field = "votes_count"
 
     def withdraw_sum_display(self, obj):
-        val = obj.withdraw_paid_sum or 0
-        return format_html("<b>{}</b> so‘m", uzs(val))
+        return format_html("<b>{}</b> so‘m", uzs(obj.paid_out_sum))
 
     withdraw_sum_display.short_description = "Paid out"
+    withdraw_sum_display.admin_order_field = "paid_out_sum"
 
     def active_colored(self, obj):
         return colored_bool(obj.active)
@@ -328,7 +337,7 @@ class UserAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
 
     # === Actions with AdminLog (ban stats works) ===
     def activate_users(self, request, queryset):
-        updated = queryset.update(active=True)
+        updated = queryset.update(active=True, profile_hash=None)
         AdminLog.objects.create(
             admin_id=getattr(request.user, "id", None) or 0,
             action="USER_ACTIVATE",
@@ -339,7 +348,7 @@ class UserAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
     activate_users.short_description = "Faollashtirish"
 
     def deactivate_users(self, request, queryset):
-        updated = queryset.update(active=False)
+        updated = queryset.update(active=False, profile_hash=None)
         AdminLog.objects.create(
             admin_id=getattr(request.user, "id", None) or 0,
             action="USER_DEACTIVATE",
@@ -390,21 +399,21 @@ class UserPhoneAdmin(ExportCsvMixin, admin.ModelAdmin):
 class ProjectAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
     list_display = (
         "id", "title", "is_active_col", "reward_sum_fmt",
-        "target_votes", "created_at", "votes_success", "votes_total",
+        "target_votes", "created_at", "votes_success", "votes_total", "progress",
         "url_link"
     )
     list_filter = ("is_active", "category", TodayCreatedFilter)
     search_fields = ("title", "ob_project_id", "region", "district", "category")
-    readonly_fields = ("created_at",)
+    readonly_fields = ("created_at", "votes_total", "votes_success", "auto_closed_at")
     actions = ["export_as_csv", "activate", "deactivate"]
     csv_filename_prefix = "projects"
 
-    def get_queryset(self, request):
-        qs = super().get_queryset(request)
-        return qs.annotate(
-            votes_total_count=Count("votes"),
-            votes_success_count=Count("votes", filter=Q(votes__status="SUCCESS")),
-        )
+    def save_model(self, request, obj, form, change):
+        if obj.is_active and "is_active" in form.changed_data:
+            obj.auto_closed_at = None
+        super().save_model(request, obj, form, change)
+        if not obj.is_active and "is_active" in form.changed_data:
+            jobqueue.fail_inactive([obj.pk])
 
     def is_active_col(self, obj):
         return colored_bool(obj.is_active)
@@ -416,15 +425,15 @@ class ProjectAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
 
     reward_sum_fmt.short_description = "Reward"
 
-    def votes_total(self, obj):
-        return obj.votes_total_count or 0
+    def progress(self, obj):
+        if not obj.target_votes:
+            return "-"
+        pct = min(100, obj.votes_success * 100 // obj.target_votes)
+        if obj.auto_closed_at:
+            return format_html('<b style="color:green">{}% ✓</b>', pct)
+        return f"{pct}%"
 
-    votes_total.short_description = "Votes (all)"
-
-    def votes_success(self, obj):
-        return obj.votes_success_count or 0
-
-    votes_success.short_description = "Votes (SUCCESS)"
+    progress.short_description = "Target"
 
     def url_link(self, obj):
         return format_html('<a href="{}" target="_blank">ochish</a>', obj.url)
@@ -432,14 +441,19 @@ class ProjectAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
     url_link.short_description = "Havola"
 
     def activate(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        # Qo'lda qayta ochilgan loyiha endi "target ga yetib yopilgan" emas
+        updated = queryset.update(is_active=True, auto_closed_at=None)
         self.message_user(request, f"{updated} ta loyiha aktiv qilindi.", messages.SUCCESS)
 
     activate.short_description = "Aktiv qilish"
 
     def deactivate(self, request, queryset):
-        updated = queryset.update(is_active=False)
-        self.message_user(request, f"{updated} ta loyiha deaktiv qilindi.", messages.WARNING)
+        ids = list(queryset.values_list("id", flat=True))
+        updated = Project.objects.filter(id__in=ids).update(is_active=False)
+        jobs = jobqueue.fail_inactive(ids)
+        self.message_user(
+            request, f"{updated} ta loyiha deaktiv qilindi, {jobs} ta navbatdagi job yopildi.", messages.WARNING
+        )
 
     deactivate.short_description = "Deaktiv qilish"
 
@@ -447,7 +461,7 @@ class ProjectAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
         return {
             "Aktiv loyihalar": Project.objects.filter(is_active=True).count(),
             "Jami loyihalar": Project.objects.count(),
-            "SUCCESS ovozlar": Vote.objects.filter(status="SUCCESS").count(),
+            "SUCCESS ovozlar": Project.objects.aggregate(s=Sum("votes_success"))["s"] or 0,
         }
 
 
@@ -490,6 +504,12 @@ class VoteAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
     status_col.short_description = "Status"
 
     def proof_short(self, obj):
+        thumb = proofs.thumb_path(obj.proof_screenshot_path)
+        if thumb:
+            return format_html(
+                '<a href="{}" target="_blank"><img src="{}" alt="proof" style="max-height:48px" loading="lazy"></a>',
+                proofs.url(obj.proof_screenshot_path), proofs.url(thumb),
+            )
         if obj.proof_screenshot_path:
             return format_html('<a href="{}" target="_blank">ko‘rish</a>', obj.proof_screenshot_path)
         return "-"
@@ -501,21 +521,65 @@ class VoteAdmin(ExportCsvMixin, StatsOnChangelistMixin, admin.ModelAdmin):
 
     error_short.short_description = "Xato"
 
+    def get_readonly_fields(self, request, obj=None):
+        # Mavjud ovoz statusi faqat actionlar (vote_lifecycle) orqali o'zgaradi
+        ro = super().get_readonly_fields(request, obj)
+        return (*ro, "status", "version") if obj else (*ro, "version")
+
+    def _set_status(self, request, queryset, new_status: str, level):
+        """vote_lifecycle orqali: noqonuniy o'tishlar va parallel o'zgarganlar tashlab ketiladi."""
+        out = vote_lifecycle.bulk_transition(
+            list(queryset.values_list("id", flat=True)), new_status, actor="admin"
+        )
+        n = sum(r == "OK" for r in out.values())
+        self.message_user(request, f"{n} ta ovoz {new_status} qilindi.", level)
+        illegal = [pk for pk, r in out.items() if r == "ILLEGAL"]
+        conflict = [pk for pk, r in out.items() if r == "CONFLICT"]
+        if illegal:
+            self.message_user(
+                request, f"{len(illegal)} ta ovozni {new_status} ga o'tkazib bo'lmaydi: {illegal[:20]}", messages.WARNING
+            )
+        if conflict:
+            self.message_user(
+                request, f"{len(conflict)} ta ovoz shu payt boshqa joyda o'zgardi, qayta urinib ko'ring: {conflict[:20]}",
+                messages.WARNING,
+            )
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            with transaction.atomic():
+                super().save_model(request, obj, form, change)
+                votes_changed([(obj.user_id, obj.project_id, None, obj.status)])
+                if obj.status == "SUCCESS":
+                    rewards.record_success([obj.pk])
+            vote_dedup.add(obj.project_id, [obj.phone_snapshot])
+        elif form.changed_data:
+            # Faqat tahrirlangan maydonlar — node yozgan status/natijalar eski nusxa bilan ustidan yozilmasin
+            obj.save(update_fields=form.changed_data)
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            votes_changed([(obj.user_id, obj.project_id, obj.status, None)])
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            rows = list(queryset.values_list("user_id", "project_id", "status"))
+            super().delete_queryset(request, queryset)
+            votes_changed([(uid, pid, st, None) for uid, pid, st in rows])
+
     def mark_success(self, request, queryset):
-        n = queryset.update(status="SUCCESS")
-        self.message_user(request, f"{n} ta ovoz SUCCESS qilindi.", messages.SUCCESS)
+        self._set_status(request, queryset, "SUCCESS", messages.SUCCESS)
 
     mark_success.short_description = "Status: SUCCESS"
 
     def mark_failed(self, request, queryset):
-        n = queryset.update(status="FAILED")
-        self.message_user(request, f"{n} ta ovoz FAILED qilindi.", messages.ERROR)
+        self._set_status(request, queryset, "FAILED", messages.ERROR)
 
     mark_failed.short_description = "Status: FAILED"
 
     def mark_processing(self, request, queryset):
-        n = queryset.update(status="PROCESSING")
-        self.message_user(request, f"{n} ta ovoz PROCESSING qilindi.", messages.INFO)
+        self._set_status(request, queryset, "PROCESSING", messages.INFO)
 
     mark_processing.short_description = "Status: PROCESSING"
 
@@ -679,12 +743,23 @@ class AdminLogAdmin(ExportCsvMixin, admin.ModelAdmin):
 
 @admin.register(SeleniumJob)
 class SeleniumJobAdmin(ExportCsvMixin, admin.ModelAdmin):
-    list_display = ("id", "vote_id", "status_col", "node", "created_at", "error_short")
+    list_display = ("id", "vote_id", "status_col", "node", "attempts", "lease_expires_at", "created_at", "error_short")
     list_filter = ("status", TodayCreatedFilter)
     search_fields = ("vote__id", "node")
-    readonly_fields = ("created_at", "timings", "error")
+    readonly_fields = ("created_at", "timings", "error", "lease_token", "lease_expires_at", "started_at", "finished_at")
     actions = ["export_as_csv", "mark_running", "mark_done", "mark_failed"]
     csv_filename_prefix = "seleniumjobs"
+    change_list_template = "seleniumjob_change_list.html"
+
+    def changelist_view(self, request, extra_context=None):
+        ctx = extra_context or {}
+        labels, series = timings.chart_series(24)
+        ctx.update({
+            "timing_labels": mark_safe(json.dumps(labels)),
+            "timing_series": mark_safe(json.dumps(series)),
+            "timing_summary": timings.phase_summary(24),
+        })
+        return super().changelist_view(request, extra_context=ctx)
 
     def status_col(self, obj):
         return colored_status(obj.status)
@@ -715,6 +790,83 @@ class SeleniumJobAdmin(ExportCsvMixin, admin.ModelAdmin):
     mark_failed.short_description = "Status: FAILED"
 
 
+@admin.register(SeleniumNode)
+class SeleniumNodeAdmin(admin.ModelAdmin):
+    """Node sog'ligi: sig'im, in-flight, muvaffaqiyat, latency, oxirgi ko'rinish."""
+    list_display = (
+        "name", "is_active_col", "max_concurrency", "capacity", "in_flight",
+        "success_pct", "avg_latency", "weight", "window_jobs", "last_seen_col",
+    )
+    list_filter = ("is_active",)
+    search_fields = ("name",)
+    list_editable = ("max_concurrency",)
+    readonly_fields = ("success_rate", "avg_latency_ms", "weight", "window_jobs", "stats_updated_at",
+                       "last_seen_at", "created_at")
+    actions = ["refresh_stats", "activate", "deactivate"]
+
+    def changelist_view(self, request, extra_context=None):
+        # Sahifadagi barcha nodelar uchun in-flight — bitta GROUP BY
+        self._in_flight = dict(
+            SeleniumJob.objects.filter(status="RUNNING").values("node").annotate(c=Count("id")).values_list("node", "c")
+        )
+        return super().changelist_view(request, extra_context=extra_context)
+
+    def is_active_col(self, obj):
+        return colored_bool(obj.is_active)
+
+    is_active_col.short_description = "Active"
+
+    def capacity(self, obj):
+        return scheduler.effective_capacity(obj)
+
+    capacity.short_description = "Sig‘im"
+
+    def in_flight(self, obj):
+        return getattr(self, "_in_flight", {}).get(obj.name, 0)
+
+    in_flight.short_description = "RUNNING"
+
+    def success_pct(self, obj):
+        pct = round(obj.success_rate * 100, 1)
+        color = "green" if pct >= 80 else ("orange" if pct >= 50 else "crimson")
+        return format_html('<b style="color:{}">{}%</b>', color, pct)
+
+    success_pct.short_description = "Success"
+
+    def avg_latency(self, obj):
+        return f"{obj.avg_latency_ms / 1000:.1f}s" if obj.avg_latency_ms else "-"
+
+    avg_latency.short_description = "Latency"
+
+    def last_seen_col(self, obj):
+        if not obj.last_seen_at:
+            return "-"
+        ago = int((timezone.now() - obj.last_seen_at).total_seconds())
+        color = "green" if ago < 120 else ("orange" if ago < 600 else "crimson")
+        return format_html('<span style="color:{}">{}s oldin</span>', color, ago)
+
+    last_seen_col.short_description = "Oxirgi signal"
+
+    def refresh_stats(self, request, queryset):
+        for node in queryset:
+            scheduler.refresh_node_stats(node)
+        self.message_user(request, f"{queryset.count()} ta node statistikasi yangilandi.", messages.SUCCESS)
+
+    refresh_stats.short_description = "Statistikani yangilash"
+
+    def activate(self, request, queryset):
+        n = queryset.update(is_active=True)
+        self.message_user(request, f"{n} ta node aktiv.", messages.SUCCESS)
+
+    activate.short_description = "Aktiv qilish"
+
+    def deactivate(self, request, queryset):
+        n = queryset.update(is_active=False)
+        self.message_user(request, f"{n} ta node deaktiv (yangi job olmaydi).", messages.WARNING)
+
+    deactivate.short_description = "Deaktiv qilish"
+
+
 @admin.register(Channel)
 class ChannelAdmin(ExportCsvMixin, admin.ModelAdmin):
     list_display = ("id", "chat_id", "type", "title", "is_active_col", "created_at")
@@ -776,9 +928,26 @@ class ExportJobAdmin(ExportCsvMixin, admin.ModelAdmin):
 
     status_col.short_description = "Status"
 
+    def get_urls(self):
+        download = path(
+            "<int:pk>/download/", self.admin_site.admin_view(self.download_view), name="api_exportjob_download"
+        )
+        return [download, *super().get_urls()]
+
+    def download_view(self, request, pk: int):
+        """Payout zip — faqat admin (fayl MEDIA_ROOT dan tashqarida, ommaviy URL yo'q)."""
+        job = get_object_or_404(ExportJob, pk=pk)
+        if not self.has_view_permission(request, job):
+            raise PermissionDenied
+        full = payouts.export_file(job)
+        if full is None:
+            raise Http404("Fayl topilmadi")
+        return FileResponse(open(full, "rb"), as_attachment=True, filename=os.path.basename(full))
+
     def file_link(self, obj):
         if obj.file_path:
-            return format_html('<a href="{}" target="_blank">yuklab olish</a>', obj.file_path)
+            url = reverse("admin:api_exportjob_download", args=[obj.pk])
+            return format_html('<a href="{}">yuklab olish</a>', url)
         return "-"
 
     file_link.short_description = "Fayl"
@@ -807,6 +976,53 @@ class ExportJobAdmin(ExportCsvMixin, admin.ModelAdmin):
     mark_failed.short_description = {"Status: FAILED"}
 
 
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ("id", "title", "status_col", "progress", "sent", "failed", "blocked", "started_at", "finished_at")
+    list_filter = ("status", TodayCreatedFilter)
+    search_fields = ("title",)
+    readonly_fields = (
+        "total", "sent", "failed", "blocked", "cursor_user_id",
+        "heartbeat_at", "started_at", "finished_at", "error", "created_at",
+    )
+    actions = ["queue", "pause", "cancel"]
+
+    def status_col(self, obj):
+        return colored_status(obj.status)
+
+    status_col.short_description = "Status"
+
+    def progress(self, obj):
+        done = obj.sent + obj.failed + obj.blocked
+        pct = (done * 100 // obj.total) if obj.total else 0
+        return format_html("{} / {} ({}%)", uzs(done), uzs(obj.total), pct)
+
+    progress.short_description = "Progress"
+
+    def save_model(self, request, obj, form, change):
+        if not obj.admin_id:
+            obj.admin_id = getattr(request.user, "id", None)
+        super().save_model(request, obj, form, change)
+
+    def queue(self, request, queryset):
+        n = queryset.filter(status__in=["DRAFT", "PAUSED"]).update(status="QUEUED")
+        self.message_user(request, f"{n} ta broadcast navbatga qo‘yildi (run_broadcasts).", messages.SUCCESS)
+
+    queue.short_description = "Yuborish (QUEUED)"
+
+    def pause(self, request, queryset):
+        n = queryset.filter(status__in=["QUEUED", "RUNNING"]).update(status="PAUSED")
+        self.message_user(request, f"{n} ta broadcast to‘xtatildi — keyin davom ettirish mumkin.", messages.WARNING)
+
+    pause.short_description = "Pauza"
+
+    def cancel(self, request, queryset):
+        n = queryset.exclude(status__in=["DONE", "CANCELED"]).update(status="CANCELED", finished_at=timezone.now())
+        self.message_user(request, f"{n} ta broadcast bekor qilindi.", messages.ERROR)
+
+    cancel.short_description = "Bekor qilish"
+
+
 
 
 
@@ -817,8 +1033,15 @@ from django.utils.html import format_html
 from django.utils import timezone
 
 from .models import Withdrawal
-from .services import approve_withdrawal, reject_withdrawal, mark_paid
-from .tg_notify import notify_user, notify_payout_channel
+from django.core.exceptions import ValidationError
+
+from .models import HeldDeduction
+from .services import (
+    bulk_approve_withdrawals, bulk_reject_withdrawals, bulk_mark_paid, bulk_release_holds,
+    refund_held_deductions, release_held_deductions,
+)
+from .broadcast import send_async
+from .tg_notify import payout_channel_id
 
 
 def uzs(n):
@@ -842,13 +1065,14 @@ def colored_status(value: str):
 class WithdrawalAdmin(admin.ModelAdmin):
     list_display = (
         "id", "user_id", "amount_fmt", "method", "status_col",
-        "destination_masked", "updated_at", "created_at",
+        "destination_masked", "on_hold", "updated_at", "created_at",
     )
-    list_filter = ("status", "method")
+    list_filter = ("status", "method", "on_hold")
     search_fields = ("user__username", "user_id", "destination_masked")
     date_hierarchy = "created_at"
-    readonly_fields = ("created_at", "updated_at")
-    actions = ["approve_selected", "reject_selected", "mark_paid_selected"]
+    # status faqat servislar (actionlar) orqali o'zgaradi — balans va has_open_withdrawal shular bilan yuritiladi
+    readonly_fields = ("status", "created_at", "updated_at")
+    actions = ["approve_selected", "reject_selected", "mark_paid_selected", "release_hold_selected"]
 
     def status_col(self, obj):
         return colored_status(obj.status)
@@ -860,62 +1084,132 @@ class WithdrawalAdmin(admin.ModelAdmin):
 
     amount_fmt.short_description = "Miqdor"
 
+    def _bulk_notify(self, outcomes: dict, user_text, channel_title: str):
+        """
+        OK bo'lganlarni bitta so'rov bilan o'qib, userlarga xabar; kanalga esa bitta yig'ma xabar.
+        Yuborish commitdan keyin broadcast.send_async navbatida — admin action kutmaydi.
+        """
+        ok_ids = [i for i, r in outcomes.items() if r == "OK"]
+        if not ok_ids:
+            return
+        total = 0
+        msgs = []
+        for w in Withdrawal.objects.filter(id__in=ok_ids).only(
+            "id", "user_id", "amount_sum", "method", "destination_masked", "status"
+        ):
+            total += w.amount_sum
+            msgs.append((w.user_id, user_text(w)))
+        channel_id = payout_channel_id()
+        if channel_id:
+            msgs.append((channel_id, (
+                f"{channel_title} → {len(ok_ids)} ta so‘rov, Jami: <b>{uzs(total)}</b>\n"
+                f"ID: <code>{', '.join(str(i) for i in sorted(ok_ids)[:50])}</code>"
+                + (" …" if len(ok_ids) > 50 else "")
+            )))
+        transaction.on_commit(lambda: send_async(msgs))
+
+    def _report(self, request, title: str, outcomes: dict, level):
+        ok = sum(1 for r in outcomes.values() if r == "OK")
+        held = sum(1 for r in outcomes.values() if r == "HELD")
+        self.message_user(
+            request,
+            f"{title} done: OK={ok}, SKIPPED={len(outcomes) - ok - held}"
+            + (f", HELD={held} (avval hold ni olib tashlang)" if held else ""),
+            level,
+        )
+
+    @admin.action(description="🔓 Velocity hold ni olib tashlash")
+    def release_hold_selected(self, request, queryset):
+        ids = list(queryset.values_list("id", flat=True))
+        outcomes = bulk_release_holds(ids=ids, admin_id=getattr(request.user, "id", 0), note="admin.action")
+        self._report(request, "Release hold", outcomes, messages.INFO)
+
     @admin.action(description="✅ APPROVE — servis orqali")
     def approve_selected(self, request, queryset):
-        ok = err = 0
-        for w in queryset.select_related("user"):
-            try:
-                if w.status != "PENDING":
-                    continue
-                approve_withdrawal(w=w, admin_id=getattr(request.user, "id", 0), note="admin.action")
-                # Telegram: user + kanal
-                notify_user(w.user_id, f"🟡 Withdraw tasdiqlandi. Holat: <b>{w.status}</b>")
-                notify_payout_channel(
-                    f"🟡 APPROVED → ID: <code>{w.id}</code>, User: <code>{w.user_id}</code>, Amount: <b>{w.amount_sum}</b>"
-                )
-                ok += 1
-            except Exception as e:
-                err += 1
-        self.message_user(request, f"Approve done: OK={ok}, ERR={err}", messages.INFO)
+        ids = list(queryset.values_list("id", flat=True))
+        try:
+            outcomes = bulk_approve_withdrawals(ids=ids, admin_id=getattr(request.user, "id", 0), note="admin.action")
+        except ValidationError as e:
+            self.message_user(request, f"Approve xato: {e.message}", messages.ERROR)
+            return
+        self._bulk_notify(
+            outcomes,
+            lambda w: f"🟡 Withdraw tasdiqlandi. Holat: <b>{w.status}</b>",
+            "🟡 APPROVED",
+        )
+        self._report(request, "Approve", outcomes, messages.INFO)
 
     @admin.action(description="❌ REJECT — servis orqali")
     def reject_selected(self, request, queryset):
-        ok = err = 0
         reason = "admin.action"
-        for w in queryset.select_related("user"):
-            try:
-                if w.status not in ("PENDING", "APPROVED"):
-                    continue
-                reject_withdrawal(w=w, admin_id=getattr(request.user, "id", 0), reason=reason)
-                notify_user(w.user_id, f"❌ Withdraw rad etildi.\nSabab: <i>{reason}</i>")
-                notify_payout_channel(
-                    f"❌ REJECTED → ID: <code>{w.id}</code>, User: <code>{w.user_id}</code>, Amount: <b>{w.amount_sum}</b>, Reason: {reason}"
-                )
-                ok += 1
-            except Exception:
-                err += 1
-        self.message_user(request, f"Reject done: OK={ok}, ERR={err}", messages.WARNING)
+        ids = list(queryset.values_list("id", flat=True))
+        try:
+            outcomes = bulk_reject_withdrawals(ids=ids, admin_id=getattr(request.user, "id", 0), reason=reason)
+        except ValidationError as e:
+            self.message_user(request, f"Reject xato: {e.message}", messages.ERROR)
+            return
+        self._bulk_notify(
+            outcomes,
+            lambda w: f"❌ Withdraw rad etildi.\nSabab: <i>{reason}</i>",
+            f"❌ REJECTED (Reason: {reason})",
+        )
+        self._report(request, "Reject", outcomes, messages.WARNING)
 
     @admin.action(description="💸 MARK PAID — servis orqali")
     def mark_paid_selected(self, request, queryset):
-        ok = err = 0
-        for w in queryset.select_related("user"):
-            try:
-                if w.status not in ("PENDING", "APPROVED"):
-                    continue
-                mark_paid(w=w, admin_id=getattr(request.user, "id", 0), proof_url="", note="admin.action")
-                notify_user(
-                    w.user_id,
-                    (
-                        f"💸 Pul yuborildi!\n"
-                        f"Miqdor: <b>{w.amount_sum}</b>\n"
-                        f"Usul: <b>{w.method}</b> → <code>{w.destination_masked}</code>"
-                    ),
-                )
-                notify_payout_channel(
-                    f"✅ PAID → ID: <code>{w.id}</code>, User: <code>{w.user_id}</code>, Amount: <b>{w.amount_sum}</b>"
-                )
-                ok += 1
-            except Exception:
-                err += 1
-        self.message_user(request, f"PAID done: OK={ok}, ERR={err}", messages.SUCCESS)
+        ids = list(queryset.values_list("id", flat=True))
+        try:
+            outcomes = bulk_mark_paid(ids=ids, admin_id=getattr(request.user, "id", 0), proof_url="", note="admin.action")
+        except ValidationError as e:
+            self.message_user(request, f"PAID xato: {e.message}", messages.ERROR)
+            return
+        self._bulk_notify(
+            outcomes,
+            lambda w: (
+                f"💸 Pul yuborildi!\n"
+                f"Miqdor: <b>{w.amount_sum}</b>\n"
+                f"Usul: <b>{w.method}</b> → <code>{w.destination_masked}</code>"
+            ),
+            "✅ PAID",
+        )
+        self._report(request, "PAID", outcomes, messages.SUCCESS)
+
+
+@admin.register(HeldDeduction)
+class HeldDeductionAdmin(admin.ModelAdmin):
+    """DeductMoneyView velocity hold'lari: summa yechilgan, to'lov admin qaroriga qadar kutadi."""
+    list_display = ("id", "user_id", "amount_fmt", "type", "ref_id", "status_col", "rules", "created_at", "resolved_at")
+    list_filter = ("status", "type")
+    search_fields = ("user__user_id", "ref_id")
+    date_hierarchy = "created_at"
+    readonly_fields = [f.name for f in HeldDeduction._meta.fields]
+    actions = ["release_selected", "refund_selected"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def status_col(self, obj):
+        return colored_status({"HELD": "PENDING", "RELEASED": "PAID", "REFUNDED": "REJECTED"}.get(obj.status, obj.status))
+
+    status_col.short_description = "Status"
+
+    def amount_fmt(self, obj):
+        return format_html("<b>{}</b> so‘m", uzs(obj.amount_sum))
+
+    amount_fmt.short_description = "Miqdor"
+
+    def _report(self, request, title: str, outcomes: dict, level):
+        ok = sum(1 for r in outcomes.values() if r == "OK")
+        self.message_user(request, f"{title} done: OK={ok}, SKIPPED={len(outcomes) - ok}", level)
+
+    @admin.action(description="✅ RELEASE — yechishni tasdiqlash")
+    def release_selected(self, request, queryset):
+        ids = list(queryset.values_list("id", flat=True))
+        self._report(request, "Release", release_held_deductions(ids=ids, admin_id=getattr(request.user, "id", 0)),
+                     messages.SUCCESS)
+
+    @admin.action(description="↩️ REFUND — balansga qaytarish")
+    def refund_selected(self, request, queryset):
+        ids = list(queryset.values_list("id", flat=True))
+        self._report(request, "Refund", refund_held_deductions(ids=ids, admin_id=getattr(request.user, "id", 0)),
+                     messages.WARNING)
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def _ensure_search_index(sender, using, **kwargs):
+    from .search import ensure_sqlite_fts
+
+    ensure_sqlite_fts(using)
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # SQLite: User ga AddField users jadvalini qayta quradi va FTS triggerlarini o'chiradi (api/search.py)
+        post_migrate.connect(_ensure_search_index, sender=self)
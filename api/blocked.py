@@ -0,0 +1,80 @@
+"""
+Botni bloklagan / o'chirilgan userlarni yig'ib, batch qilib active=False qilish.
+
+tg_notify va broadcast 403 javoblarini shu yerga yozadi (record); buffer
+BUFFER_MAX ga yetganda yoki BUFFER_MAX_AGE o'tganda flush qilinadi:
+bitta UPDATE (bo'laklab) + har flush uchun bitta AdminLog("USER_AUTO_DEACTIVATE").
+"""
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .models import AdminLog, User
+
+log = logging.getLogger(__name__)
+
+BUFFER_MAX = getattr(settings, "BLOCKED_BUFFER_MAX", 500)
+BUFFER_MAX_AGE = getattr(settings, "BLOCKED_BUFFER_MAX_AGE", 30)  # sekund
+CHUNK = 1000
+
+_lock = threading.Lock()
+_buffer: dict[int, str] = {}
+_first_at: float | None = None
+
+
+def is_blocked_error(code, description: str | None) -> bool:
+    """403: "bot was blocked by the user", "user is deactivated", "bot can't initiate conversation"."""
+    return code == 403
+
+
+def record(user_id: int, description: str | None = None) -> None:
+    global _first_at
+    if not user_id or user_id < 0:  # kanal/guruh — user emas
+        return
+    with _lock:
+        _buffer[int(user_id)] = (description or "")[:64]
+        if _first_at is None:
+            _first_at = time.monotonic()
+        due = len(_buffer) >= BUFFER_MAX or time.monotonic() - _first_at >= BUFFER_MAX_AGE
+    if due:
+        flush()
+
+
+def flush() -> int:
+    """Bufferdagi userlarni active=False qiladi; o'zgargan userlar sonini qaytaradi."""
+    global _buffer, _first_at
+    with _lock:
+        pending, _buffer, _first_at = _buffer, {}, None
+    if not pending:
+        return 0
+
+    ids = list(pending)
+    total = 0
+    for i in range(0, len(ids), CHUNK):
+        chunk = ids[i:i + CHUNK]
+        active_ids = list(User.objects.filter(pk__in=chunk, active=True).values_list("pk", flat=True))
+        if not active_ids:
+            continue
+        # profile_hash — qaytgan user sync'da "o'zgarmagan" bo'lib qolmasligi uchun
+        n = User.objects.filter(pk__in=active_ids, active=True).update(active=False, profile_hash=None)
+        total += n
+        AdminLog.objects.create(
+            admin_id=0,
+            action="USER_AUTO_DEACTIVATE",
+            payload_json={"ids": active_ids, "count": n, "reason": "TG_BLOCKED",
+                          "errors": sorted({pending[u] for u in active_ids if pending[u]})},
+        )
+    return total
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        log.exception("blocked buffer flush failed at exit")
+
+
+atexit.register(_flush_at_exit)
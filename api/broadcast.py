@@ -0,0 +1,213 @@
+"""
+Ommaviy xabar (broadcast) dvigateli.
+
+- Segment: users jadvali bo'yicha filtr (language, active, subscribed, min/max balance)
+- Qabul qiluvchilar user_id bo'yicha keyset (user_id > cursor) bilan bo'laklab olinadi —
+  OFFSET yo'q, DB yuklamasi bo'lak soniga proporsional
+- Yuborish: umumiy (pooled) HTTP sessiya, bir nechta thread, global rate limit
+  (cache'dagi sekundlik hisoblagich — barcha worker jarayonlar uchun umumiy)
+- Har bo'lakdan keyin checkpoint: cursor_user_id + hisoblagichlar + xatolar (bo'lak paytida pauza
+  qilingan bo'lsa ham); worker yiqilsa yoki pauzadan qaytsa, shu cursordan davom etadi
+  (oxirgi tugallanmagan bo'lak qayta yuborilishi mumkin)
+- send_async: shaxsiy xabarlar (masalan, withdraw holati) — shu rate limit bilan fon threadida,
+  so'rov/admin action kutmaydi
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction as dbtx
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import blocked as blocked_users
+from .models import Broadcast, BroadcastFailure, SubscriptionSnapshot, User
+from .subscribe import get_required_channels_cached
+from .tg_notify import send_message
+
+log = logging.getLogger(__name__)
+
+RATE_PER_SEC = getattr(settings, "BROADCAST_RATE_PER_SEC", 25)
+BATCH_SIZE = getattr(settings, "BROADCAST_BATCH_SIZE", 200)
+THREADS = getattr(settings, "BROADCAST_THREADS", 8)
+STALE_AFTER = timedelta(seconds=getattr(settings, "BROADCAST_STALE_SECONDS", 120))
+MAX_RETRIES = 3
+
+
+# ======== Segment ========
+def segment_queryset(segment: dict | None):
+    seg = segment or {}
+    qs = User.objects.all()
+
+    active = seg.get("active", True)
+    if active is not None:
+        qs = qs.filter(active=bool(active))
+
+    lang = seg.get("language")
+    if lang:
+        qs = qs.filter(language__in=[lang] if isinstance(lang, str) else list(lang))
+
+    if seg.get("min_balance") is not None:
+        qs = qs.filter(balance_sum__gte=int(seg["min_balance"]))
+    if seg.get("max_balance") is not None:
+        qs = qs.filter(balance_sum__lte=int(seg["max_balance"]))
+
+    subscribed = seg.get("subscribed")
+    if subscribed is not None:
+        chan_ids = [c["id"] for c in get_required_channels_cached()]
+        if chan_ids:
+            members = (
+                SubscriptionSnapshot.objects.filter(user_id=OuterRef("pk"), status="MEMBER", channel_id__in=chan_ids)
+                .values("user_id")
+                .annotate(c=Count("id"))
+                .values("c")
+            )
+            qs = qs.annotate(member_of=Coalesce(Subquery(members), Value(0)))
+            cond = Q(member_of__gte=len(chan_ids))
+            qs = qs.filter(cond) if subscribed else qs.exclude(cond)
+        elif not subscribed:
+            qs = qs.none()  # majburiy kanal yo'q — hamma "obuna"
+    return qs
+
+
+# ======== Global rate limit ========
+class GlobalRateLimiter:
+    """Sekundiga `rate` ta token; hisoblagich cache'da — jarayonlararo umumiy."""
+
+    def __init__(self, rate: int = RATE_PER_SEC, key: str = "tg_rate"):
+        self.rate = rate
+        self.key = key
+
+    def acquire(self):
+        while True:
+            now = time.time()
+            k = f"{self.key}:{int(now)}"
+            cache.add(k, 0, 5)
+            try:
+                n = cache.incr(k)
+            except ValueError:
+                continue
+            if n <= self.rate:
+                return
+            time.sleep(max(0.0, int(now) + 1 - time.time()))
+
+    def pause(self, seconds: float):
+        """429 retry_after — barcha workerlar uchun kvotani to'ldirib qo'yamiz."""
+        end = time.time() + seconds
+        sec = int(time.time())
+        while sec <= int(end):
+            cache.set(f"{self.key}:{sec}", self.rate + 1, 5 + int(seconds))
+            sec += 1
+        time.sleep(seconds)
+
+
+def _deliver(limiter: GlobalRateLimiter, user_id: int, text: str):
+    res = None
+    for _ in range(MAX_RETRIES):
+        limiter.acquire()
+        res = send_message(user_id, text)
+        if res.ok or res.code != 429:
+            break
+        limiter.pause(float(res.retry_after or 1))
+    return user_id, res
+
+
+# ======== Shaxsiy xabarlar ========
+_notify_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="notify")
+
+
+def _send_many(messages):
+    limiter = GlobalRateLimiter()
+    for chat_id, text in messages:
+        _, res = _deliver(limiter, chat_id, text)
+        if not res.ok and blocked_users.is_blocked_error(res.code, res.description):
+            blocked_users.record(chat_id, res.description)
+    blocked_users.flush()
+
+
+def send_async(messages) -> None:
+    """messages: [(chat_id, text)] — navbatga qo'yadi va darhol qaytadi."""
+    messages = list(messages)
+    if messages:
+        _notify_pool.submit(_send_many, messages).add_done_callback(_log_failure)
+
+
+def _log_failure(fut):
+    if fut.exception() is not None:
+        log.error("notification batch failed", exc_info=fut.exception())
+
+
+# ======== Worker ========
+def claim_next() -> Broadcast | None:
+    """QUEUED yoki heartbeat'i eskirgan RUNNING broadcastni atomik egallash."""
+    now = timezone.now()
+    stale = Q(status="RUNNING") & (Q(heartbeat_at__isnull=True) | Q(heartbeat_at__lt=now - STALE_AFTER))
+    for b in Broadcast.objects.filter(Q(status="QUEUED") | stale).order_by("id").only("id", "status"):
+        cond = Q(status="QUEUED") if b.status == "QUEUED" else stale
+        if Broadcast.objects.filter(cond, pk=b.pk).update(status="RUNNING", heartbeat_at=now):
+            return Broadcast.objects.get(pk=b.pk)
+    return None
+
+
+def _checkpoint(b: Broadcast, last_user_id: int, results) -> bool:
+    sent = failed = blocked = 0
+    failures = []
+    for uid, res in results:
+        if res.ok:
+            sent += 1
+            continue
+        if blocked_users.is_blocked_error(res.code, res.description):
+            blocked += 1
+            blocked_users.record(uid, res.description)
+        else:
+            failed += 1
+        failures.append(BroadcastFailure(broadcast_id=b.pk, user_id=uid, code=res.code or 0, error=res.description))
+    progress = {
+        "cursor_user_id": last_user_id,
+        "sent": F("sent") + sent,
+        "failed": F("failed") + failed,
+        "blocked": F("blocked") + blocked,
+    }
+    try:
+        with dbtx.atomic():
+            BroadcastFailure.objects.bulk_create(failures, ignore_conflicts=True)
+            if Broadcast.objects.filter(pk=b.pk, status="RUNNING").update(**progress, heartbeat_at=timezone.now()):
+                return True
+            # Bo'lak yuborilayotganda pauza/bekor qilingan — bo'lak baribir yuborildi: cursor va
+            # hisoblagichlar saqlanadi (aks holda davom ettirilganda qayta yuboriladi), worker to'xtaydi
+            Broadcast.objects.filter(pk=b.pk, status__in=["PAUSED", "CANCELED"]).update(**progress)
+            return False
+    finally:
+        # Bloklaganlarni har checkpointda active=False qilamiz — keyingi bo'laklar segmentdan chiqadi
+        blocked_users.flush()
+
+
+def run_broadcast(b: Broadcast, *, batch_size: int = BATCH_SIZE, threads: int = THREADS) -> Broadcast:
+    """RUNNING holatdagi broadcastni cursordan boshlab oxirigacha yuboradi."""
+    limiter = GlobalRateLimiter()
+    if not b.started_at:
+        b.started_at = timezone.now()
+        b.total = segment_queryset(b.segment).count()
+        b.save(update_fields=["started_at", "total"])
+
+    base = segment_queryset(b.segment).order_by("user_id")
+    cursor = b.cursor_user_id
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        while True:
+            ids = list(base.filter(user_id__gt=cursor).values_list("user_id", flat=True)[:batch_size])
+            if not ids:
+                Broadcast.objects.filter(pk=b.pk, status="RUNNING").update(
+                    status="DONE", finished_at=timezone.now(), heartbeat_at=timezone.now()
+                )
+                break
+            results = list(pool.map(lambda uid: _deliver(limiter, uid, b.text), ids))
+            cursor = ids[-1]
+            if not _checkpoint(b, cursor, results):
+                log.info("broadcast %s to'xtatildi (status RUNNING emas)", b.pk)
+                break
+    b.refresh_from_db()
+    return b
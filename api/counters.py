@@ -0,0 +1,168 @@
+"""
+Denormalizatsiyalangan hisoblagichlar:
+- User: votes_count, success_votes, paid_out_sum
+- Project: votes_total, votes_success (+ target_votes ga yetganda avtomatik yopish)
+- User.has_open_withdrawal (api/services.py yuritadi; repair_open_withdrawal_flags tuzatadi)
+
+Vote/withdrawal holati o'zgaradigan joylar deltalarni bump_users / votes_changed ga beradi —
+har bo'lak uchun bitta UPDATE ... CASE. Ulangan yo'llar: vote_lifecycle (node hisobotlari —
+vote_reports — va admin o'tishlari), VoteAdmin save/delete, services.py. Vote qatorlarini bu
+repodan tashqarida yozadigan kod (bot) votes_changed ni chaqirmaydi — uning ovozlari hisoblagich
+va auto-close ga faqat repair orqali tushadi, shuning uchun repair davriy (cron) ishlashi kerak. Drift bo'lsa repair_user_counters / repair_project_counters
+/ repair_open_withdrawal_flags (manage.py repair_user_counters) hammasini qaytadan hisoblaydi.
+"""
+from django.db.models import Case, Count, F, IntegerField, Q, Sum, Value, When
+from django.utils import timezone
+
+from .jobqueue import fail_inactive
+from .models import AdminLog, Project, User, Vote, Withdrawal
+
+COUNTER_FIELDS = ("votes_count", "success_votes", "paid_out_sum")
+OPEN_WITHDRAW_STATUSES = ("PENDING", "APPROVED")
+CHUNK = 500
+REPAIR_CHUNK = 2000
+
+
+def add_delta(deltas: dict, user_id, field: str, n: int) -> None:
+    if n:
+        d = deltas.setdefault(user_id, {})
+        d[field] = d.get(field, 0) + n
+
+
+def vote_deltas(rows) -> dict:
+    """rows: [(user_id, old_status | None, new_status | None)] — None: yaratildi / o'chirildi."""
+    deltas = {}
+    for uid, old, new in rows:
+        if old is None:
+            add_delta(deltas, uid, "votes_count", 1)
+        if new is None:
+            add_delta(deltas, uid, "votes_count", -1)
+        add_delta(deltas, uid, "success_votes", (new == "SUCCESS") - (old == "SUCCESS"))
+    return deltas
+
+
+def _bump(model, deltas: dict, set_fields: dict) -> None:
+    ids = list(deltas)
+    fields = sorted({f for d in deltas.values() for f in d})
+    for i in range(0, len(ids), CHUNK):
+        chunk = ids[i:i + CHUNK]
+        updates = dict(set_fields)
+        for field in fields:
+            whens = [When(pk=k, then=Value(deltas[k][field])) for k in chunk if deltas[k].get(field)]
+            if whens:
+                updates[field] = F(field) + Case(*whens, default=Value(0), output_field=IntegerField())
+        if updates:
+            model.objects.filter(pk__in=chunk).update(**updates)
+
+
+def bump_users(deltas: dict, **set_fields) -> None:
+    """
+    deltas: {user_id: {"votes_count": +1, "paid_out_sum": +20000, ...}}
+    set_fields: qo'shimcha to'g'ridan-to'g'ri qiymatlar (masalan has_open_withdrawal=False)
+    Istalgan butun sonli User maydoni bo'lishi mumkin (balance_sum ham — api/rewards.py).
+    """
+    _bump(User, deltas, set_fields)
+
+
+def project_vote_deltas(rows) -> dict:
+    """rows: [(project_id, old_status | None, new_status | None)] — vote_deltas bilan bir xil qoida."""
+    deltas = {}
+    for pid, old, new in rows:
+        add_delta(deltas, pid, "votes_total", (old is None) - (new is None))
+        add_delta(deltas, pid, "votes_success", (new == "SUCCESS") - (old == "SUCCESS"))
+    return deltas
+
+
+def bump_projects(deltas: dict) -> list[int]:
+    """Hisoblagichlarni oshiradi; target_votes ga yetgan aktiv loyihalarni yopadi. Natija: yopilgan id lar."""
+    _bump(Project, deltas, {})
+    grew = [pid for pid, d in deltas.items() if d.get("votes_success", 0) > 0]
+    if not grew:
+        return []
+    reached = Project.objects.filter(
+        pk__in=grew, is_active=True, target_votes__isnull=False, votes_success__gte=F("target_votes")
+    )
+    closed = list(reached.values_list("id", flat=True))
+    if closed:
+        # Shartli UPDATE: parallel tranzaksiya allaqachon yopgan bo'lsa qayta yozilmaydi
+        n = Project.objects.filter(pk__in=closed, is_active=True).update(is_active=False, auto_closed_at=timezone.now())
+        if n:
+            AdminLog.objects.create(
+                admin_id=0, action="PROJECT_AUTO_CLOSE", payload_json={"ids": closed, "reason": "TARGET_REACHED"}
+            )
+            fail_inactive(closed)
+    return closed
+
+
+def votes_changed(rows) -> list[int]:
+    """
+    Vote yaratildi / status o'zgardi / o'chirildi: user va project hisoblagichlari birga.
+    rows: [(user_id, project_id, old_status | None, new_status | None)]
+    Natija: target ga yetib yopilgan loyihalar.
+    """
+    bump_users(vote_deltas([(uid, old, new) for uid, _, old, new in rows]))
+    return bump_projects(project_vote_deltas([(pid, old, new) for _, pid, old, new in rows]))
+
+
+def repair_user_counters(*, user_model=User, vote_model=Vote, withdrawal_model=Withdrawal) -> int:
+    """Barcha userlar uchun hisoblagichlarni qayta hisoblash (user_id keyset, bo'laklab)."""
+    fixed = 0
+    last = None
+    while True:
+        qs = user_model.objects.order_by("user_id")
+        if last is not None:
+            qs = qs.filter(user_id__gt=last)
+        users = list(qs.only("user_id", *COUNTER_FIELDS)[:REPAIR_CHUNK])
+        if not users:
+            break
+        ids = [u.user_id for u in users]
+        votes = {
+            r["user_id"]: r
+            for r in vote_model.objects.filter(user_id__in=ids)
+            .values("user_id")
+            .annotate(n=Count("id"), ok=Count("id", filter=Q(status="SUCCESS")))
+        }
+        paid = dict(
+            withdrawal_model.objects.filter(user_id__in=ids, status="PAID")
+            .values("user_id")
+            .annotate(s=Sum("amount_sum"))
+            .values_list("user_id", "s")
+        )
+        changed = []
+        for u in users:
+            v = votes.get(u.user_id) or {}
+            want = (v.get("n", 0), v.get("ok", 0), paid.get(u.user_id) or 0)
+            if (u.votes_count, u.success_votes, u.paid_out_sum) != want:
+                u.votes_count, u.success_votes, u.paid_out_sum = want
+                changed.append(u)
+        if changed:
+            user_model.objects.bulk_update(changed, list(COUNTER_FIELDS))
+            fixed += len(changed)
+        last = ids[-1]
+    return fixed
+
+
+def repair_project_counters(*, project_model=Project, vote_model=Vote) -> int:
+    """Project.votes_total / votes_success ni qayta hisoblash (loyihalar kam — bitta GROUP BY)."""
+    agg = {
+        r["project_id"]: (r["n"], r["ok"])
+        for r in vote_model.objects.values("project_id").annotate(n=Count("id"), ok=Count("id", filter=Q(status="SUCCESS")))
+    }
+    changed = []
+    for p in project_model.objects.only("id", "votes_total", "votes_success"):
+        want = agg.get(p.id, (0, 0))
+        if (p.votes_total, p.votes_success) != want:
+            p.votes_total, p.votes_success = want
+            changed.append(p)
+    project_model.objects.bulk_update(changed, ["votes_total", "votes_success"], batch_size=REPAIR_CHUNK)
+    return len(changed)
+
+
+def repair_open_withdrawal_flags(*, user_model=User, withdrawal_model=Withdrawal) -> int:
+    """has_open_withdrawal ni PENDING/APPROVED so'rovlarga moslash (ikki set-based UPDATE)."""
+    open_users = withdrawal_model.objects.filter(status__in=OPEN_WITHDRAW_STATUSES).values("user_id")
+    fixed = user_model.objects.filter(has_open_withdrawal=False, pk__in=open_users).update(has_open_withdrawal=True)
+    fixed += user_model.objects.filter(has_open_withdrawal=True).exclude(pk__in=open_users).update(
+        has_open_withdrawal=False
+    )
+    return fixed
@@ -0,0 +1,114 @@
+"""
+SeleniumJob navbati — ovoz beruvchi (browser) nodelar uchun.
+
+- claim: N ta QUEUED jobni atomik egallash. Postgres: SELECT ... FOR UPDATE SKIP LOCKED;
+  SQLite: nomzodlarni tanlab, `status='QUEUED'` sharti bilan guarded UPDATE + lease_token
+  (yozuvlar ketma-ket bo'lgani uchun ikki node bitta jobni ololmaydi)
+- Lease: lease_expires_at gacha heartbeat kelmasa, requeue_expired jobni qaytadan QUEUED qiladi
+  (MAX_ATTEMPTS dan oshsa — FAILED)
+- complete: faqat jobni egallagan node (node + lease_token) natija yoza oladi
+- fail_inactive: nofaol (deaktiv yoki target ga yetib yopilgan) loyihalarning QUEUED joblari
+  FAILED qilinadi — navbatda abadiy qolib ketmaydi (loyiha qayta ochilsa, joblar qaytadan yaratiladi)
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction as dbtx
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SeleniumJob
+
+DEFAULT_LEASE = getattr(settings, "SELENIUM_LEASE_SECONDS", 180)
+MAX_ATTEMPTS = getattr(settings, "SELENIUM_MAX_ATTEMPTS", 3)
+MAX_CLAIM = 50
+
+
+def requeue_expired(now=None) -> dict:
+    """Muddati o'tgan leaselarni qaytarish. Natija: {"requeued": n, "failed": n}"""
+    now = now or timezone.now()
+    expired = SeleniumJob.objects.filter(status="RUNNING", lease_expires_at__lt=now)
+    failed = expired.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status="FAILED", error="lease expired (max attempts)", lease_token=None,
+        lease_expires_at=None, finished_at=now,
+    )
+    requeued = expired.update(status="QUEUED", node=None, lease_token=None, lease_expires_at=None)
+    return {"requeued": requeued, "failed": failed}
+
+
+def fail_inactive(project_ids=None, now=None) -> int:
+    """Nofaol loyihalarning QUEUED joblarini yopish; project_ids — faqat shu loyihalar. Natija: soni."""
+    qs = SeleniumJob.objects.filter(status="QUEUED", vote__project__is_active=False)
+    if project_ids is not None:
+        qs = qs.filter(vote__project_id__in=list(project_ids))
+    return qs.update(status="FAILED", error="project inactive", finished_at=now or timezone.now())
+
+
+def _candidate_ids(qs, n: int) -> list[int]:
+    qs = qs.filter(status="QUEUED").order_by("created_at", "id")
+    if connection.vendor == "postgresql":
+        # of=("self",): nomzod filtrlari votes/projects ni JOIN qiladi — ularni qulflasak, parallel claim
+        # shu loyihaning hamma jobini o'tkazib yuboradi va bump_projects UPDATE lari kutib qoladi
+        return list(qs.select_for_update(skip_locked=True, of=("self",)).values_list("id", flat=True)[:n])
+    return list(qs.values_list("id", flat=True)[:n])
+
+
+@dbtx.atomic
+def claim(node: str, n: int = 1, *, lease_seconds: int = DEFAULT_LEASE, queryset=None) -> tuple[str, list[SeleniumJob]]:
+    """
+    node uchun n tagacha jobni egallaydi. queryset — qo'shimcha filtr (masalan loyiha bo'yicha).
+    Qaytaradi: (lease_token, jobs) — token heartbeat/complete uchun kerak.
+    """
+    n = max(1, min(int(n), MAX_CLAIM))
+    now = timezone.now()
+    ids = _candidate_ids(queryset if queryset is not None else SeleniumJob.objects.all(), n)
+    token = uuid.uuid4().hex
+    if ids:
+        SeleniumJob.objects.filter(id__in=ids, status="QUEUED").update(
+            status="RUNNING",
+            node=node,
+            lease_token=token,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            attempts=F("attempts") + 1,
+            started_at=now,
+        )
+    jobs = list(
+        SeleniumJob.objects.filter(lease_token=token)
+        .select_related("vote", "vote__project")
+        .order_by("created_at", "id")
+    )
+    return token, jobs
+
+
+def heartbeat(node: str, token: str, job_ids=None, *, lease_seconds: int = DEFAULT_LEASE) -> int:
+    """Leaseni uzaytirish; uzaytirilgan joblar soni (0 — lease yo'qotilgan)."""
+    qs = SeleniumJob.objects.filter(status="RUNNING", node=node, lease_token=token)
+    if job_ids:
+        qs = qs.filter(id__in=job_ids)
+    return qs.update(lease_expires_at=timezone.now() + timedelta(seconds=lease_seconds))
+
+
+def complete(node: str, token: str, results) -> dict:
+    """
+    results: [{"id", "status": DONE|FAILED, "error"?, "timings"?}]
+    Natija: {job_id: "OK" | "STALE"} — STALE: lease boshqa nodega o'tgan yoki job yopilgan.
+    """
+    now = timezone.now()
+    out = {}
+    with dbtx.atomic():
+        for r in results:
+            fields = {
+                "status": r["status"],
+                "finished_at": now,
+                "lease_token": None,
+                "lease_expires_at": None,
+                "error": (r.get("error") or None) and r["error"][:255],
+            }
+            if r.get("timings") is not None:
+                fields["timings"] = r["timings"]
+            n = SeleniumJob.objects.filter(
+                id=r["id"], status="RUNNING", node=node, lease_token=token
+            ).update(**fields)
+            out[r["id"]] = "OK" if n else "STALE"
+    return out
@@ -0,0 +1,70 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from api.models import Vote
+from api.proofs import ProofError, hash_from_path, resolve_legacy, store
+
+
+class Command(BaseCommand):
+    help = "Eski proof screenshotlarni kontent-hash saqlash joyiga ko'chiradi (dedup + WebP + thumbnail)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk", type=int, default=500)
+        parser.add_argument("--delete-originals", action="store_true", help="Ko'chirilgan asl fayllarni o'chirish")
+
+    def handle(self, *args, **opts):
+        last, moved, new_files, missing, bad = 0, 0, 0, 0, 0
+        bytes_before = bytes_after = 0
+        # Bir fayl bir nechta votega tegishli bo'lishi mumkin: bir marta saqlanadi/hisoblanadi, oxirida o'chiriladi
+        originals = {}  # src -> store() natijasi
+        while True:
+            votes = list(
+                Vote.objects.filter(id__gt=last, proof_screenshot_path__isnull=False)
+                .exclude(proof_screenshot_path="")
+                .order_by("id")
+                .only("id", "proof_screenshot_path")[: opts["chunk"]]
+            )
+            if not votes:
+                break
+            last = votes[-1].id
+            changed = []
+            for v in votes:
+                # Eski fayl proofs/ ichida bo'lishi ham mumkin — faqat hash yo'llari o'tkazib yuboriladi
+                if hash_from_path(v.proof_screenshot_path):
+                    continue
+                src = resolve_legacy(v.proof_screenshot_path)
+                if src is None:
+                    missing += 1
+                    continue
+                res = originals.get(src)
+                if res is None:
+                    try:
+                        with open(src, "rb") as f:
+                            data = f.read()
+                        res = store(data)
+                    except (OSError, ProofError) as e:
+                        bad += 1
+                        self.stderr.write(f"vote #{v.id}: {e}")
+                        continue
+                    originals[src] = res
+                    bytes_before += len(data)
+                    if res["created"]:
+                        new_files += 1
+                        bytes_after += res["size"]
+                v.proof_screenshot_path = res["path"]
+                changed.append(v)
+            # Faqat path yangilanadi — status/versiyaga tegilmaydi
+            Vote.objects.bulk_update(changed, ["proof_screenshot_path"])
+            moved += len(changed)
+            self.stdout.write(f"… vote #{last}: {moved} ko'chirildi")
+        if opts["delete_originals"]:
+            for src in originals:
+                try:
+                    os.remove(src)
+                except OSError:
+                    pass
+        self.stdout.write(
+            f"Ko'chirildi: {moved} ta vote, yangi fayl: {new_files} (qolgani dedup), "
+            f"fayl topilmadi: {missing}, xato: {bad}; {bytes_before // 1024} KB → {bytes_after // 1024} KB"
+        )
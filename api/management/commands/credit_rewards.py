@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.rewards import credit_batch, sweep
+
+
+class Command(BaseCommand):
+    help = "SUCCESS bo'lgan ovozlar uchun rewardlarni kreditlaydi (VoteSuccessLog kursori bo'yicha)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Navbat bo'shasa chiqib ketish")
+        parser.add_argument("--idle-sleep", type=float, default=1.0)
+        parser.add_argument("--sweep-every", type=int, default=300, help="Sweep oralig'i, soniya")
+        parser.add_argument("--sweep-hours", type=int, default=24)
+
+    def handle(self, *args, **opts):
+        last_sweep = 0.0
+        while True:
+            if time.monotonic() - last_sweep >= opts["sweep_every"]:
+                s = sweep(opts["sweep_hours"])
+                last_sweep = time.monotonic()
+                if s["credited"]:
+                    self.stdout.write(f"Sweep: {s['credited']} ta reward, {s['sum']} so'm")
+            r = credit_batch()
+            if r["credited"]:
+                self.stdout.write(f"{r['credited']} ta reward, {r['sum']} so'm → kursor {r['position']}")
+            if not r["seen"]:
+                if opts["once"]:
+                    return
+                time.sleep(opts["idle_sleep"])
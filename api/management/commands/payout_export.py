@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.payouts import create_payout_export, PROVIDER_COLUMNS
+
+
+class Command(BaseCommand):
+    help = "APPROVED withdrawal'lardan provayder bo'yicha payout batch fayllarini yaratadi (ExportJob)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--method", action="append", choices=list(PROVIDER_COLUMNS), dest="methods")
+        parser.add_argument("--admin-id", type=int, default=None)
+
+    def handle(self, *args, **opts):
+        job = create_payout_export(admin_id=opts["admin_id"], methods=opts["methods"])
+        if job.status != "DONE":
+            self.stderr.write(f"ExportJob #{job.id} FAILED: {job.error}")
+            return
+        self.stdout.write(f"ExportJob #{job.id} DONE → {job.file_path}")
+        for method, n in (job.params.get("counts") or {}).items():
+            self.stdout.write(f"  {method}: {n} ta, {job.params['sums'][method]} so'm")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api.payouts import import_paid_file
+
+
+class Command(BaseCommand):
+    help = "To'langan payout faylini o'qib, mos withdrawal'larni PAID qiladi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--admin-id", type=int, default=0)
+        parser.add_argument("--proof-url", default="")
+
+    def handle(self, *args, **opts):
+        totals = import_paid_file(opts["path"], admin_id=opts["admin_id"], proof_url=opts["proof_url"])
+        self.stdout.write(", ".join(f"{k}={v}" for k, v in totals.items()))
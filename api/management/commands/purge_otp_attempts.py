@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.otp_guard import RETENTION_DAYS, purge
+
+
+class Command(BaseCommand):
+    help = "Eski OtpAttempt qatorlarini o'chiradi (cron: kuniga bir marta)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=RETENTION_DAYS)
+
+    def handle(self, *args, **opts):
+        n = purge(opts["days"])
+        self.stdout.write(f"O'chirildi: {n} ta OTP urinish")
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from api.counters import repair_open_withdrawal_flags, repair_project_counters, repair_user_counters
+
+
+class Command(BaseCommand):
+    help = (
+        "User.votes_count / success_votes / paid_out_sum va Project.votes_total / votes_success "
+        "hisoblagichlarini qayta hisoblaydi, User.has_open_withdrawal ni ochiq so'rovlarga moslaydi."
+    )
+
+    def handle(self, *args, **opts):
+        fixed = repair_user_counters()
+        self.stdout.write(f"Tuzatildi: {fixed} ta user")
+        fixed = repair_project_counters()
+        self.stdout.write(f"Tuzatildi: {fixed} ta loyiha")
+        fixed = repair_open_withdrawal_flags()
+        self.stdout.write(f"Tuzatildi: {fixed} ta has_open_withdrawal")
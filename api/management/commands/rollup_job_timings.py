@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.timings import rollup_recent
+
+
+class Command(BaseCommand):
+    help = "SeleniumJob timings bo'yicha soatlik p50/p95/p99 rollup (cron: har 10-15 daqiqada)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=3, help="Oxirgi necha soatni qayta hisoblash")
+
+    def handle(self, *args, **opts):
+        n = rollup_recent(opts["hours"])
+        self.stdout.write(f"Yozildi: {n} ta rollup qatori")
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.broadcast import claim_next, run_broadcast
+
+
+class Command(BaseCommand):
+    help = "QUEUED (yoki yiqilgan RUNNING) broadcastlarni yuboradi; checkpointdan davom etadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Navbat bo'shasa chiqib ketish")
+        parser.add_argument("--idle-sleep", type=float, default=5.0)
+
+    def handle(self, *args, **opts):
+        while True:
+            b = claim_next()
+            if b is None:
+                if opts["once"]:
+                    return
+                time.sleep(opts["idle_sleep"])
+                continue
+            self.stdout.write(f"Broadcast #{b.id} → cursor {b.cursor_user_id}")
+            b = run_broadcast(b)
+            self.stdout.write(
+                f"Broadcast #{b.id} {b.status}: sent={b.sent}, failed={b.failed}, blocked={b.blocked}"
+            )
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_requiredchannel_subscriptionsnapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='kind',
+            field=models.CharField(choices=[('USERS', 'USERS'), ('VOTES', 'VOTES'), ('WITHDRAWALS', 'WITHDRAWALS'), ('PROJECTS', 'PROJECTS'), ('PAYOUTS', 'PAYOUTS')], max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='withdrawal',
+            name='method',
+            field=models.CharField(choices=[('CARD', 'CARD'), ('CLICK', 'CLICK'), ('PAYME', 'PAYME'), ('PAYNET', 'PAYNET'), ('OTHER', 'OTHER')], max_length=16),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:03
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.utils import timezone
+
+OPEN = ["PENDING", "APPROVED"]
+NOTE = "[reject] migration 0004: duplicate open withdrawal"
+
+
+def reject_duplicate_open(apps, schema_editor):
+    """
+    Bir userda bir nechta ochiq (PENDING/APPROVED) so'rov bo'lsa — constraint qo'yilmaydi.
+    Bittasi qoladi (APPROVED ustun, keyin eng eskisi), qolganlari services.reject_withdrawal kabi
+    REJECTED qilinadi: summa balansga qaytadi, Transaction(ADJUSTMENT, +amount) va AdminLog yoziladi.
+    """
+    User = apps.get_model("api", "User")
+    Withdrawal = apps.get_model("api", "Withdrawal")
+    Transaction = apps.get_model("api", "Transaction")
+    AdminLog = apps.get_model("api", "AdminLog")
+    dup_users = (
+        Withdrawal.objects.filter(status__in=OPEN)
+        .values("user_id")
+        .annotate(n=Count("id"))
+        .filter(n__gt=1)
+        .values_list("user_id", flat=True)
+    )
+    for uid in list(dup_users):
+        rows = sorted(
+            Withdrawal.objects.filter(user_id=uid, status__in=OPEN).values_list(
+                "id", "status", "amount_sum", "admin_note"
+            ),
+            key=lambda r: (r[1] != "APPROVED", r[0]),
+        )
+        for wid, _, amount, note in rows[1:]:
+            Withdrawal.objects.filter(pk=wid).update(
+                status="REJECTED",
+                admin_id=0,
+                admin_note=((note or "") + "\n" + NOTE).strip(),
+                updated_at=timezone.now(),
+            )
+            User.objects.filter(pk=uid).update(balance_sum=F("balance_sum") + amount)
+            Transaction.objects.create(user_id=uid, type="ADJUSTMENT", amount_sum=amount, ref_id=wid)
+            AdminLog.objects.create(
+                admin_id=0,
+                action="WITHDRAW_REJECT",
+                payload_json={"withdrawal_id": wid, "user_id": uid, "amount_sum": amount,
+                              "reason": "duplicate open withdrawal", "kept": rows[0][0]},
+            )
+
+
+def backfill_has_open(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    Withdrawal = apps.get_model("api", "Withdrawal")
+    open_users = Withdrawal.objects.filter(status__in=["PENDING", "APPROVED"]).values("user_id")
+    User.objects.filter(pk__in=open_users).update(has_open_withdrawal=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_payout_export_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='has_open_withdrawal',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(reject_duplicate_open, migrations.RunPython.noop),
+        migrations.RunPython(backfill_has_open, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='withdrawal',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'APPROVED'])), fields=('user',), name='uq_withdraw_one_open_per_user'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_one_open_withdrawal'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='withdrawal',
+            index=models.Index(fields=['user', 'created_at'], name='ix_withdraw_user_created'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_withdraw_user_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='setting',
+            name='velocity_rules',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='withdrawal',
+            name='on_hold',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_velocity_rules'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_hash',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+    ]
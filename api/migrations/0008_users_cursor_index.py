@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_user_profile_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['active', 'language', 'created_at', 'user_id'], name='ix_users_act_lang_cursor'),
+        ),
+    ]
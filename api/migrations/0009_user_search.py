@@ -0,0 +1,106 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:07
+
+import re
+import unicodedata
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+CHUNK = 2000
+
+# api.models.normalize_search_text ning shu migratsiya paytidagi muzlatilgan nusxasi
+_APOSTROPHES = str.maketrans({c: "'" for c in "‘’ʻʼ`´"})
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_search_text(*parts):
+    text = " ".join(p for p in parts if p)
+    text = unicodedata.normalize("NFKC", text).casefold().translate(_APOSTROPHES)
+    return _SPACES.sub(" ", text.replace("@", " ")).strip()
+
+# Diqqat: keyingi migratsiyalardagi User AddField/AlterField SQLite'da users ni qayta quradi va bu
+# triggerlarni o'chiradi (0012 — 0021 tikladi; keyingilarini api/search.py:ensure_sqlite_fts tiklaydi).
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(user_id UNINDEXED, search_text, tokenize='trigram')",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(user_id, search_text) VALUES (new.user_id, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        DELETE FROM users_fts WHERE user_id = old.user_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF search_text ON users BEGIN
+        DELETE FROM users_fts WHERE user_id = old.user_id;
+        INSERT INTO users_fts(user_id, search_text) VALUES (new.user_id, new.search_text);
+    END""",
+    "DELETE FROM users_fts",
+    "INSERT INTO users_fts(user_id, search_text) SELECT user_id, search_text FROM users",
+]
+SQLITE_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS users_fts_au",
+    "DROP TRIGGER IF EXISTS users_fts_ad",
+    "DROP TRIGGER IF EXISTS users_fts_ai",
+    "DROP TABLE IF EXISTS users_fts",
+]
+PG_TRGM = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_users_search_trgm ON users USING gin (search_text gin_trgm_ops)",
+]
+PG_TRGM_DROP = ["DROP INDEX IF EXISTS ix_users_search_trgm"]
+
+
+def backfill_search_text(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    last = None
+    while True:
+        qs = User.objects.order_by("user_id").only("user_id", "username", "full_name")
+        if last is not None:
+            qs = qs.filter(user_id__gt=last)
+        batch = list(qs[:CHUNK])
+        if not batch:
+            break
+        for u in batch:
+            u.search_text = normalize_search_text(u.username, u.full_name)
+        User.objects.bulk_update(batch, ["search_text"])
+        last = batch[-1].user_id
+
+
+def _run(schema_editor, statements):
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_FTS)
+    elif vendor == "postgresql":
+        _run(schema_editor, PG_TRGM)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _run(schema_editor, SQLITE_FTS_DROP)
+    elif vendor == "postgresql":
+        _run(schema_editor, PG_TRGM_DROP)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_users_cursor_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='search_text',
+            field=models.CharField(blank=True, default='', max_length=260),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='ix_users_username_lower'),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,136 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:12
+
+import re
+
+from django.db import migrations
+
+CHUNK = 2000
+
+# api/phones.py ning shu migratsiya paytidagi muzlatilgan nusxasi — keyingi o'zgarishlar
+# eski migratsiya natijasini o'zgartirmasligi uchun
+UZ_CC = "998"
+UZ_NSN_LEN = 9
+_NON_DIGIT = re.compile(r"\D")
+
+
+def canonical_e164(raw):
+    if not raw:
+        return None
+    s = raw.strip()
+    plus = s.startswith("+")
+    digits = _NON_DIGIT.sub("", s)
+    if not digits:
+        return None
+    if not plus and digits.startswith("00"):
+        digits, plus = digits[2:], True
+    if digits.startswith(UZ_CC) and len(digits) == len(UZ_CC) + UZ_NSN_LEN:
+        return "+" + digits
+    if plus and digits.startswith(UZ_CC):
+        return None
+    if not plus:
+        if len(digits) == UZ_NSN_LEN:
+            return "+" + UZ_CC + digits
+        if len(digits) == UZ_NSN_LEN + 1 and digits[0] in "08":
+            return "+" + UZ_CC + digits[1:]
+        return None
+    if 8 <= len(digits) <= 15 and digits[0] != "0":
+        return "+" + digits
+    return None
+
+
+def snapshot_of(raw):
+    e164 = canonical_e164(raw)
+    return _NON_DIGIT.sub("", e164) if e164 else None
+
+
+def _renormalize_user_phones(UserPhone, Vote):
+    """
+    phone_e164 va phone_snapshot ni kanonik qilish (user_id bo'yicha bo'laklab — bir userning
+    hamma raqamlari bitta bo'lakda). Kanonik ko'rinishi bir xil bo'lib qolgan raqamlardan eng
+    kichik id qoladi (uq_user_phone_per_user), qolganlari o'chiriladi va Vote.user_phone_id
+    qolgan raqamga ko'chiriladi; shu loyihada u raqamga ovoz bo'lsa — NULL.
+    """
+    last_user = None
+    while True:
+        qs = UserPhone.objects.order_by("user_id").values_list("user_id", flat=True).distinct()
+        if last_user is not None:
+            qs = qs.filter(user_id__gt=last_user)
+        user_ids = list(qs[:CHUNK])
+        if not user_ids:
+            break
+        kept, dup_of, changed = {}, {}, []
+        for p in UserPhone.objects.filter(user_id__in=user_ids).order_by("user_id", "id").only(
+            "id", "user_id", "phone_e164", "phone_snapshot"
+        ):
+            e164 = canonical_e164(p.phone_e164) or p.phone_e164
+            key = (p.user_id, e164)
+            if key in kept:
+                dup_of[p.id] = kept[key]
+                continue
+            kept[key] = p.id
+            snap = snapshot_of(e164) or p.phone_snapshot
+            if (e164, snap) != (p.phone_e164, p.phone_snapshot):
+                p.phone_e164, p.phone_snapshot = e164, snap
+                changed.append(p)
+        if dup_of:
+            UserPhone.objects.filter(id__in=list(dup_of)).delete()
+            for dup, keep in dup_of.items():
+                taken = Vote.objects.filter(user_phone_id=keep).values("project_id")
+                Vote.objects.filter(user_phone_id=dup).exclude(project_id__in=taken).update(user_phone_id=keep)
+                Vote.objects.filter(user_phone_id=dup).update(user_phone_id=None)
+        if changed:
+            UserPhone.objects.bulk_update(changed, ["phone_e164", "phone_snapshot"], batch_size=CHUNK)
+        last_user = user_ids[-1]
+
+
+def _renormalize_votes(Vote):
+    """
+    Vote.phone_snapshot ni kanonik qilish (id bo'yicha bo'laklab). Shu loyihada kanonik
+    snapshot bilan ovoz allaqachon bo'lsa (uq_vote_phone_per_project) — ovoz o'zgarishsiz qoladi.
+    """
+    last = 0
+    while True:
+        batch = list(
+            Vote.objects.filter(id__gt=last).order_by("id").only("id", "project_id", "phone_snapshot")[:CHUNK]
+        )
+        if not batch:
+            break
+        want = {}
+        for v in batch:
+            snap = snapshot_of(v.phone_snapshot)
+            if snap and snap != v.phone_snapshot:
+                want[v.id] = snap
+        if want:
+            taken = set(
+                Vote.objects.filter(
+                    project_id__in={v.project_id for v in batch if v.id in want},
+                    phone_snapshot__in=set(want.values()),
+                ).values_list("project_id", "phone_snapshot")
+            )
+            changed = []
+            for v in batch:
+                key = (v.project_id, want.get(v.id))
+                if v.id in want and key not in taken:
+                    taken.add(key)
+                    v.phone_snapshot = want[v.id]
+                    changed.append(v)
+            Vote.objects.bulk_update(changed, ["phone_snapshot"], batch_size=CHUNK)
+        last = batch[-1].id
+
+
+def renormalize_snapshots(apps, schema_editor):
+    UserPhone = apps.get_model("api", "UserPhone")
+    Vote = apps.get_model("api", "Vote")
+    _renormalize_user_phones(UserPhone, Vote)
+    _renormalize_votes(Vote)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_user_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(renormalize_snapshots, migrations.RunPython.noop),
+    ]
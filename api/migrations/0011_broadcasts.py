@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_renormalize_phone_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('admin_id', models.BigIntegerField(blank=True, null=True)),
+                ('title', models.CharField(max_length=128)),
+                ('text', models.TextField()),
+                ('segment', models.JSONField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('DRAFT', 'DRAFT'), ('QUEUED', 'QUEUED'), ('RUNNING', 'RUNNING'), ('PAUSED', 'PAUSED'), ('DONE', 'DONE'), ('CANCELED', 'CANCELED'), ('FAILED', 'FAILED')], default='DRAFT', max_length=16)),
+                ('total', models.IntegerField(default=0)),
+                ('sent', models.IntegerField(default=0)),
+                ('failed', models.IntegerField(default=0)),
+                ('blocked', models.IntegerField(default=0)),
+                ('cursor_user_id', models.BigIntegerField(default=0)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'broadcasts',
+                'managed': True,
+                'indexes': [models.Index(fields=['status'], name='ix_broadcast_status')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastFailure',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('user_id', models.BigIntegerField()),
+                ('code', models.SmallIntegerField(default=0)),
+                ('error', models.CharField(blank=True, max_length=128, null=True)),
+                ('broadcast', models.ForeignKey(db_column='broadcast_id', on_delete=django.db.models.deletion.CASCADE, related_name='failures', to='api.broadcast')),
+            ],
+            options={
+                'db_table': 'broadcast_failures',
+                'managed': True,
+                'constraints': [models.UniqueConstraint(fields=('broadcast', 'user_id'), name='uq_bcast_failure_user')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:12
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+CHUNK = 2000
+COUNTER_FIELDS = ["votes_count", "success_votes", "paid_out_sum"]
+
+
+def backfill_counters(apps, schema_editor):
+    """api.counters.repair_user_counters ning muzlatilgan nusxasi (user_id keyset, bo'laklab)."""
+    User = apps.get_model("api", "User")
+    Vote = apps.get_model("api", "Vote")
+    Withdrawal = apps.get_model("api", "Withdrawal")
+    last = None
+    while True:
+        qs = User.objects.order_by("user_id")
+        if last is not None:
+            qs = qs.filter(user_id__gt=last)
+        users = list(qs.only("user_id", *COUNTER_FIELDS)[:CHUNK])
+        if not users:
+            break
+        ids = [u.user_id for u in users]
+        votes = {
+            r["user_id"]: r
+            for r in Vote.objects.filter(user_id__in=ids)
+            .values("user_id")
+            .annotate(n=Count("id"), ok=Count("id", filter=Q(status="SUCCESS")))
+        }
+        paid = dict(
+            Withdrawal.objects.filter(user_id__in=ids, status="PAID")
+            .values("user_id")
+            .annotate(s=Sum("amount_sum"))
+            .values_list("user_id", "s")
+        )
+        for u in users:
+            v = votes.get(u.user_id) or {}
+            u.votes_count, u.success_votes, u.paid_out_sum = v.get("n", 0), v.get("ok", 0), paid.get(u.user_id) or 0
+        User.objects.bulk_update(users, COUNTER_FIELDS)
+        last = ids[-1]
+
+
+# SQLite'da AddField users jadvalini qayta quradi va 0009 dagi users_fts_* triggerlari yo'qoladi —
+# 0021_restore_user_fts tiklaydi (eski bazalar uchun ham; shuning uchun bu migratsiya o'zgartirilmagan).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_broadcasts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='paid_out_sum',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='success_votes',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='votes_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
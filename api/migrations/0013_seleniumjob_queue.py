@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_user_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seleniumjob',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='seleniumjob',
+            name='finished_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='seleniumjob',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='seleniumjob',
+            name='lease_token',
+            field=models.CharField(blank=True, max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name='seleniumjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='seleniumjob',
+            index=models.Index(fields=['status', 'created_at'], name='ix_seljob_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='seleniumjob',
+            index=models.Index(fields=['status', 'lease_expires_at'], name='ix_seljob_status_lease'),
+        ),
+    ]
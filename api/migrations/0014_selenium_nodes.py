@@ -0,0 +1,40 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_seleniumjob_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeleniumNode',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('max_concurrency', models.PositiveSmallIntegerField(default=2)),
+                ('is_active', models.BooleanField(default=True)),
+                ('meta', models.JSONField(blank=True, null=True)),
+                ('success_rate', models.FloatField(default=1.0)),
+                ('avg_latency_ms', models.IntegerField(blank=True, null=True)),
+                ('weight', models.FloatField(default=1.0)),
+                ('window_jobs', models.IntegerField(default=0)),
+                ('stats_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('last_seen_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'selenium_nodes',
+                'managed': True,
+            },
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='max_in_flight',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
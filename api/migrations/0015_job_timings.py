@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_selenium_nodes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobTimingRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('hour', models.DateTimeField()),
+                ('node', models.CharField(max_length=64)),
+                ('phase', models.CharField(max_length=24)),
+                ('count', models.IntegerField()),
+                ('p50', models.IntegerField()),
+                ('p95', models.IntegerField()),
+                ('p99', models.IntegerField()),
+                ('max', models.IntegerField()),
+            ],
+            options={
+                'db_table': 'job_timing_rollups',
+                'managed': True,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='seleniumjob',
+            index=models.Index(fields=['finished_at'], name='ix_seljob_finished'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobtimingrollup',
+            constraint=models.UniqueConstraint(fields=('hour', 'node', 'phase'), name='uq_timing_rollup_hour_node_phase'),
+        ),
+    ]
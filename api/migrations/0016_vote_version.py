@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_job_timings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vote',
+            name='version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_vote_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineCursor',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'pipeline_cursors',
+                'managed': True,
+            },
+        ),
+        migrations.CreateModel(
+            name='VoteSuccessLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'vote_success_log',
+                'managed': True,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['type', 'ref_id'], name='ix_txn_type_ref'),
+        ),
+        migrations.AddField(
+            model_name='votesuccesslog',
+            name='vote',
+            field=models.OneToOneField(db_column='vote_id', on_delete=django.db.models.deletion.CASCADE, related_name='success_log', to='api.vote'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:23
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    """api.counters.repair_project_counters ning muzlatilgan nusxasi (bitta GROUP BY)."""
+    Project = apps.get_model("api", "Project")
+    Vote = apps.get_model("api", "Vote")
+    agg = {
+        r["project_id"]: (r["n"], r["ok"])
+        for r in Vote.objects.values("project_id").annotate(n=Count("id"), ok=Count("id", filter=Q(status="SUCCESS")))
+    }
+    changed = []
+    for p in Project.objects.only("id", "votes_total", "votes_success"):
+        want = agg.get(p.id, (0, 0))
+        if (p.votes_total, p.votes_success) != want:
+            p.votes_total, p.votes_success = want
+            changed.append(p)
+    Project.objects.bulk_update(changed, ["votes_total", "votes_success"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_reward_pipeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='auto_closed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='votes_success',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='votes_total',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
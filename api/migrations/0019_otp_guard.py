@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_project_vote_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='setting',
+            name='otp_rules',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='otpattempt',
+            index=models.Index(fields=['vote', 'created_at'], name='ix_otp_vote_created'),
+        ),
+    ]
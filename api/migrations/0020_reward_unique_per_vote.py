@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:38
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def reclassify_duplicate_rewards(apps, schema_editor):
+    """
+    Bir vote uchun bir nechta REWARD bo'lsa (eski skript/poyga) — eng kichik id REWARD bo'lib qoladi,
+    qolganlari ADJUSTMENT ga o'tkaziladi: summa va balans o'zgarmaydi, constraint qo'yiladi.
+    """
+    Transaction = apps.get_model("api", "Transaction")
+    dups = (
+        Transaction.objects.filter(type="REWARD", ref_id__isnull=False)
+        .values("ref_id")
+        .annotate(n=Count("id"), keep=Min("id"))
+        .filter(n__gt=1)
+    )
+    for d in dups:
+        Transaction.objects.filter(type="REWARD", ref_id=d["ref_id"]).exclude(id=d["keep"]).update(type="ADJUSTMENT")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_otp_guard'),
+    ]
+
+    operations = [
+        migrations.RunPython(reclassify_duplicate_rewards, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('type', 'REWARD')), fields=('ref_id',), name='uq_txn_reward_per_vote'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:45
+
+from django.db import migrations
+
+# 0012 (AddField) da SQLite schema editor users jadvalini qayta qurdi (new__users → RENAME) va
+# 0009 dagi users_fts_* triggerlari yo'qoldi. Triggerlarni qayta yaratib, users_fts ni to'liq
+# qayta to'ldiramiz. SQL — 0009 dagi bilan bir xil (muzlatilgan nusxa).
+SQLITE_FTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(user_id UNINDEXED, search_text, tokenize='trigram')",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(user_id, search_text) VALUES (new.user_id, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        DELETE FROM users_fts WHERE user_id = old.user_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF search_text ON users BEGIN
+        DELETE FROM users_fts WHERE user_id = old.user_id;
+        INSERT INTO users_fts(user_id, search_text) VALUES (new.user_id, new.search_text);
+    END""",
+    "DELETE FROM users_fts",
+    "INSERT INTO users_fts(user_id, search_text) SELECT user_id, search_text FROM users",
+]
+
+
+def restore_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_FTS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_reward_unique_per_vote'),
+    ]
+
+    operations = [
+        migrations.RunPython(restore_fts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-19 19:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_restore_user_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeldDeduction',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('amount_sum', models.IntegerField()),
+                ('type', models.CharField(choices=[('REWARD', 'REWARD'), ('REFERRAL', 'REFERRAL'), ('WITHDRAWAL', 'WITHDRAWAL'), ('ADJUSTMENT', 'ADJUSTMENT'), ('PENALTY', 'PENALTY')], default='WITHDRAWAL', max_length=16)),
+                ('ref_id', models.IntegerField(blank=True, null=True)),
+                ('rules', models.JSONField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('HELD', 'HELD'), ('RELEASED', 'RELEASED'), ('REFUNDED', 'REFUNDED')], default='HELD', max_length=16)),
+                ('admin_id', models.BigIntegerField(blank=True, null=True)),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(db_column='user_id', on_delete=django.db.models.deletion.CASCADE, related_name='held_deductions', to='api.user')),
+            ],
+            options={
+                'db_table': 'held_deductions',
+                'managed': True,
+                'indexes': [models.Index(fields=['status', 'created_at'], name='ix_held_status_created')],
+            },
+        ),
+    ]
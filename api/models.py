@@ -1,4 +1,8 @@
+import re
+import unicodedata
+
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 # ======== Helpers: CHOICES ========
@@ -46,6 +50,12 @@ WITHDRAW_STATUS = (
     ("CANCELED", "CANCELED"),
 )
 
+HOLD_STATUS = (
+    ("HELD", "HELD"),
+    ("RELEASED", "RELEASED"),
+    ("REFUNDED", "REFUNDED"),
+)
+
 WITHDRAW_METHOD = (
     ("CARD", "CARD"),
     ("CLICK", "CLICK"),
@@ -71,6 +81,17 @@ EXPORT_KIND = (
     ("VOTES", "VOTES"),
     ("WITHDRAWALS", "WITHDRAWALS"),
     ("PROJECTS", "PROJECTS"),
+    ("PAYOUTS", "PAYOUTS"),
+)
+
+BROADCAST_STATUS = (
+    ("DRAFT", "DRAFT"),
+    ("QUEUED", "QUEUED"),
+    ("RUNNING", "RUNNING"),
+    ("PAUSED", "PAUSED"),
+    ("DONE", "DONE"),
+    ("CANCELED", "CANCELED"),
+    ("FAILED", "FAILED"),
 )
 
 EXPORT_STATUS = (
@@ -81,6 +102,22 @@ EXPORT_STATUS = (
 )
 
 
+_APOSTROPHES = str.maketrans({c: "'" for c in "‘’ʻʼ`´"})
+_SPACES = re.compile(r"\s+")
+
+
+# Eslatma: User ga yangi maydon qo'shish/o'zgartirish SQLite'da users jadvalini qayta quradi va
+# users_fts_* triggerlari (0009) yo'qoladi — api/search.py:ensure_sqlite_fts post_migrate da tiklaydi.
+def normalize_search_text(*parts) -> str:
+    """Qidiruv uchun: NFKC + casefold, o‘/g‘ apostroflari bir xil, bo'shliqlar siqilgan."""
+    text = " ".join(p for p in parts if p)
+    text = unicodedata.normalize("NFKC", text).casefold().translate(_APOSTROPHES)
+    return _SPACES.sub(" ", text.replace("@", " ")).strip()
+
+
+# profile_hash shu maydonlardan hisoblanadi (api/user_sync.py); ulardan birini to'g'ridan-to'g'ri
+# o'zgartirgan yo'l profile_hash ni None qilishi kerak
+PROFILE_HASH_FIELDS = frozenset({"username", "full_name", "language", "active"})
 
 
 class User(models.Model):
@@ -90,6 +127,16 @@ class User(models.Model):
     active = models.BooleanField(default=True)
     language = models.CharField(max_length=10, choices=LANG_CHOICES, default="uz")
     balance_sum = models.IntegerField(default=0)
+    # Denormalizatsiya: PENDING/APPROVED withdrawal bormi (services.py ushlab turadi)
+    has_open_withdrawal = models.BooleanField(default=False)
+    # username/full_name/language/active hash'i — bulk sync o'zgarmagan profilni yozmaydi
+    profile_hash = models.CharField(max_length=40, null=True, blank=True)
+    # username + full_name normallashtirilgan (api/search.py: FTS5 / pg_trgm shu ustunga)
+    search_text = models.CharField(max_length=260, default="", blank=True)
+    # Denormalizatsiyalangan hisoblagichlar (api/counters.py; tuzatish: repair_user_counters)
+    votes_count = models.IntegerField(default=0)
+    success_votes = models.IntegerField(default=0)
+    paid_out_sum = models.BigIntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
@@ -97,11 +144,28 @@ class User(models.Model):
         db_table = "users"
         indexes = [
             models.Index(fields=["active"], name="ix_users_active"),
+            # /users?active=&language= + cursor (created_at, user_id)
+            models.Index(fields=["active", "language", "created_at", "user_id"], name="ix_users_act_lang_cursor"),
+            models.Index(Lower("username"), name="ix_users_username_lower"),
         ]
 
     def __str__(self) -> str:
         return f"{self.user_id} · {self.username or '-'}"
 
+    def save(self, *args, **kwargs):
+        self.search_text = normalize_search_text(self.username, self.full_name)
+        update_fields = kwargs.get("update_fields")
+        extra = set()
+        if update_fields is None or PROFILE_HASH_FIELDS & set(update_fields):
+            # Profil bulk_upsert_users dan tashqarida o'zgardi — keyingi sync "o'zgarmagan" deb o'tkazib yubormasin
+            self.profile_hash = None
+            extra.add("profile_hash")
+        if update_fields is not None and {"username", "full_name"} & set(update_fields):
+            extra.add("search_text")
+        if update_fields is not None and extra:
+            kwargs["update_fields"] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
 
 class UserPhone(models.Model):
     id = models.AutoField(primary_key=True)
@@ -194,6 +258,11 @@ class Project(models.Model):
     is_active = models.BooleanField(default=False)
     reward_sum = models.IntegerField(default=0)
     target_votes = models.IntegerField(null=True, blank=True)
+    max_in_flight = models.IntegerField(null=True, blank=True)  # bir vaqtda RUNNING joblar limiti (None — cheksiz)
+    # Denormalizatsiyalangan hisoblagichlar (api/counters.py); votes_success >= target_votes bo'lsa loyiha yopiladi
+    votes_total = models.IntegerField(default=0)
+    votes_success = models.IntegerField(default=0)
+    auto_closed_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
@@ -224,6 +293,8 @@ class Vote(models.Model):
     ob_vote_id = models.CharField(max_length=64, null=True, blank=True)
     proof_screenshot_path = models.CharField(max_length=1024, null=True, blank=True)
     error_message = models.CharField(max_length=512, null=True, blank=True)
+    # Optimistic concurrency: har status o'tishida +1 (api/vote_lifecycle.py)
+    version = models.IntegerField(default=0)
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
 
     class Meta:
@@ -255,6 +326,9 @@ class OtpAttempt(models.Model):
     class Meta:
         managed = True
         db_table = "otpattempts"
+        indexes = [
+            models.Index(fields=["vote", "created_at"], name="ix_otp_vote_created"),
+        ]
 
 
 class Referral(models.Model):
@@ -290,7 +364,39 @@ class Transaction(models.Model):
         db_table = "transactions"
         indexes = [
             models.Index(fields=["user", "created_at"], name="ix_txn_user_created"),
+            models.Index(fields=["type", "ref_id"], name="ix_txn_type_ref"),
         ]
+        constraints = [
+            # Bitta vote uchun bitta REWARD (api/rewards.py ignore_conflicts bilan yozadi)
+            models.UniqueConstraint(
+                fields=["ref_id"], condition=models.Q(type="REWARD"), name="uq_txn_reward_per_vote"
+            ),
+        ]
+
+
+class VoteSuccessLog(models.Model):
+    """
+    Vote SUCCESS ga o'tgan payt — status o'tishi bilan bitta tranzaksiyada yoziladi (outbox).
+    Reward pipeline (api/rewards.py) id bo'yicha kursor bilan o'qiydi.
+    """
+    id = models.BigAutoField(primary_key=True)
+    vote = models.OneToOneField(Vote, on_delete=models.CASCADE, db_column="vote_id", related_name="success_log")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        managed = True
+        db_table = "vote_success_log"
+
+
+class PipelineCursor(models.Model):
+    """Fon ishlovchilari uchun kursor: name → oxirgi qayta ishlangan id."""
+    name = models.CharField(max_length=64, primary_key=True)
+    position = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = True
+        db_table = "pipeline_cursors"
 
 
 class Withdrawal(models.Model):
@@ -304,6 +410,7 @@ class Withdrawal(models.Model):
     status = models.CharField(max_length=16, choices=WITHDRAW_STATUS, default="PENDING")
     admin_id = models.BigIntegerField(null=True, blank=True)
     admin_note = models.CharField(max_length=255, null=True, blank=True)
+    on_hold = models.BooleanField(default=False)  # velocity limitidan oshgan — qo'lda ko'rib chiqiladi
     updated_at = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(default=timezone.now)
 
@@ -312,6 +419,41 @@ class Withdrawal(models.Model):
         db_table = "withdrawals"
         indexes = [
             models.Index(fields=["status"], name="ix_withdraw_status"),
+            models.Index(fields=["user", "created_at"], name="ix_withdraw_user_created"),
+        ]
+        constraints = [
+            # Bitta userda faqat bitta ochiq (PENDING/APPROVED) so'rov
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(status__in=["PENDING", "APPROVED"]),
+                name="uq_withdraw_one_open_per_user",
+            ),
+        ]
+
+
+class HeldDeduction(models.Model):
+    """
+    DeductMoneyView: velocity limitidan oshgan WITHDRAWAL. Summa balansdan yechilgan (rezerv, hold
+    Withdrawal kabi), to'lov admin RELEASED qilguncha bajarilmaydi; REFUNDED — balansga qaytarildi.
+    """
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, db_column="user_id", related_name="held_deductions"
+    )
+    amount_sum = models.IntegerField()
+    type = models.CharField(max_length=16, choices=TXN_TYPE, default="WITHDRAWAL")
+    ref_id = models.IntegerField(null=True, blank=True)
+    rules = models.JSONField(null=True, blank=True)  # buzilgan velocity qoidalari
+    status = models.CharField(max_length=16, choices=HOLD_STATUS, default="HELD")
+    admin_id = models.BigIntegerField(null=True, blank=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        managed = True
+        db_table = "held_deductions"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="ix_held_status_created"),
         ]
 
 
@@ -336,11 +478,65 @@ class SeleniumJob(models.Model):
     node = models.CharField(max_length=64, null=True, blank=True)
     timings = models.JSONField(null=True, blank=True)
     error = models.CharField(max_length=255, null=True, blank=True)
+    # Navbat (api/jobqueue.py): lease — node shu vaqtgacha heartbeat yubormasa, job qayta QUEUED bo'ladi
+    lease_token = models.CharField(max_length=32, null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         managed = True
         db_table = "seleniumjobs"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="ix_seljob_status_created"),
+            models.Index(fields=["status", "lease_expires_at"], name="ix_seljob_status_lease"),
+            models.Index(fields=["finished_at"], name="ix_seljob_finished"),
+        ]
+
+
+class JobTimingRollup(models.Model):
+    """SeleniumJob.timings bo'yicha soatlik percentilelar (api/timings.py). node="*" — barchasi."""
+    id = models.BigAutoField(primary_key=True)
+    hour = models.DateTimeField()
+    node = models.CharField(max_length=64)
+    phase = models.CharField(max_length=24)
+    count = models.IntegerField()
+    p50 = models.IntegerField()
+    p95 = models.IntegerField()
+    p99 = models.IntegerField()
+    max = models.IntegerField()
+
+    class Meta:
+        managed = True
+        db_table = "job_timing_rollups"
+        constraints = [
+            models.UniqueConstraint(fields=["hour", "node", "phase"], name="uq_timing_rollup_hour_node_phase"),
+        ]
+
+
+class SeleniumNode(models.Model):
+    """Ro'yxatdan o'tgan browser node; statistikasi api/scheduler.py da hisoblanadi."""
+    id = models.AutoField(primary_key=True)
+    name = models.CharField(max_length=64, unique=True)  # SeleniumJob.node bilan bir xil
+    max_concurrency = models.PositiveSmallIntegerField(default=2)
+    is_active = models.BooleanField(default=True)
+    meta = models.JSONField(null=True, blank=True)  # ip, versiya va h.k.
+    success_rate = models.FloatField(default=1.0)
+    avg_latency_ms = models.IntegerField(null=True, blank=True)
+    weight = models.FloatField(default=1.0)  # 0.1..1 — max_concurrency shu ulushda ishlatiladi
+    window_jobs = models.IntegerField(default=0)
+    stats_updated_at = models.DateTimeField(null=True, blank=True)
+    last_seen_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        managed = True
+        db_table = "selenium_nodes"
+
+    def __str__(self) -> str:
+        return self.name
 
 
 class Channel(models.Model):
@@ -364,6 +560,10 @@ class Setting(models.Model):
     )
     default_reward_sum = models.IntegerField(default=0)
     allow_multiple_active_projects = models.BooleanField(default=False)
+    # Withdraw/deduct velocity limitlari (api/velocity.py: DEFAULT_RULES ustiga yoziladi)
+    velocity_rules = models.JSONField(null=True, blank=True)
+    # OTP urinish limitlari (api/otp_guard.py: DEFAULT_RULES ustiga yoziladi)
+    otp_rules = models.JSONField(null=True, blank=True)
     created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
@@ -383,4 +583,53 @@ class ExportJob(models.Model):
 
     class Meta:
         managed = True
-        db_table = "exportjobs"
\ No newline at end of file
+        db_table = "exportjobs"
+
+
+class Broadcast(models.Model):
+    """Ommaviy xabar. segment: {"language": "uz"|[...], "active": true, "subscribed": true,
+    "min_balance": 0, "max_balance": 100000} — api/broadcast.py."""
+    id = models.AutoField(primary_key=True)
+    admin_id = models.BigIntegerField(null=True, blank=True)
+    title = models.CharField(max_length=128)
+    text = models.TextField()
+    segment = models.JSONField(null=True, blank=True)
+    status = models.CharField(max_length=16, choices=BROADCAST_STATUS, default="DRAFT")
+    total = models.IntegerField(default=0)  # start paytidagi segment hajmi
+    sent = models.IntegerField(default=0)
+    failed = models.IntegerField(default=0)
+    blocked = models.IntegerField(default=0)
+    cursor_user_id = models.BigIntegerField(default=0)  # checkpoint: shu user_id gacha yuborilgan
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.CharField(max_length=255, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        managed = True
+        db_table = "broadcasts"
+        indexes = [
+            models.Index(fields=["status"], name="ix_broadcast_status"),
+        ]
+
+    def __str__(self) -> str:
+        return f"[{self.id}] {self.title}"
+
+
+class BroadcastFailure(models.Model):
+    """Faqat yetkazilmaganlar saqlanadi; cursor_user_id gacha qolganlari — yetkazilgan."""
+    id = models.AutoField(primary_key=True)
+    broadcast = models.ForeignKey(
+        Broadcast, on_delete=models.CASCADE, db_column="broadcast_id", related_name="failures"
+    )
+    user_id = models.BigIntegerField()
+    code = models.SmallIntegerField(default=0)  # Telegram error_code (0 — tarmoq xatosi)
+    error = models.CharField(max_length=128, null=True, blank=True)
+
+    class Meta:
+        managed = True
+        db_table = "broadcast_failures"
+        constraints = [
+            models.UniqueConstraint(fields=["broadcast", "user_id"], name="uq_bcast_failure_user"),
+        ]
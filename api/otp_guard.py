@@ -0,0 +1,185 @@
+"""
+OTP urinishlarini cheklash (OpenBudget'ga yuborishdan oldin) va urinishlarni batch qilib yozish.
+
+- acquire(vote, phone): har o'lchov (vote, phone) va oyna uchun cache hisoblagichini oshiradi,
+  sliding window bahosi limitdan oshsa — qaytarib oladi va rad etadi. Avval incr, keyin tekshirish:
+  parallel nodelar bir vaqtda limitdan o'tib keta olmaydi
+- Sliding window: joriy + oldingi fixed oyna (api/velocity.py dagi kabi), DB ga so'rov yo'q
+- Limitlar Setting(key="GLOBAL").otp_rules orqali o'zgartiriladi
+- record(): OtpAttempt qatorlari process bufferida yig'iladi; fon oqimi BUFFER_MAX to'lganda yoki
+  har BUFFER_MAX_AGE sekundda bitta bulk_create bilan yozadi — so'rov oqimi DB ga yozmaydi
+  (process to'xtaganda ham flush). Mavjud bo'lmagan vote_id lar flush da tashlanadi; yozish
+  xato bersa qatorlar bufferga qaytariladi (BUFFER_LIMIT gacha)
+- purge(): RETENTION_DAYS dan eski urinishlarni bo'laklab o'chirish
+
+Cache barcha workerlar uchun umumiy bo'lishi kerak (settings.REDIS_URL); umumiy bo'lmasa va
+settings.RATE_LIMIT_REQUIRE_SHARED_CACHE yoqilgan bo'lsa — acquire rad etadi (api/velocity.py kabi).
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import OtpAttempt, Setting, Vote
+from .velocity import CACHE_NOT_SHARED, shared_cache_ok
+
+log = logging.getLogger(__name__)
+
+WINDOWS = {"10m": 600, "hour": 3600, "day": 86400}
+
+# Oyna → maksimal urinishlar soni; None — limit yo'q
+DEFAULT_RULES = {
+    "vote": {"10m": 3, "hour": 5},
+    "phone": {"hour": 6, "day": 12},
+}
+
+RULES_CACHE_KEY = "otp_rules:v1"
+RULES_CACHE_TTL = 30
+
+BUFFER_MAX = getattr(settings, "OTP_BUFFER_MAX", 200)
+BUFFER_MAX_AGE = getattr(settings, "OTP_BUFFER_MAX_AGE", 5)  # sekund
+BUFFER_LIMIT = BUFFER_MAX * 10  # DB ishlamayotganda xotirada ushlanadigan maksimum
+RETENTION_DAYS = getattr(settings, "OTP_RETENTION_DAYS", 30)
+PURGE_CHUNK = 5000
+
+_lock = threading.Lock()
+_buffer: list[OtpAttempt] = []
+_wake = threading.Event()
+_flusher: threading.Thread | None = None
+
+
+def get_rules() -> dict:
+    rules = cache.get(RULES_CACHE_KEY)
+    if rules is None:
+        custom = (Setting.objects.filter(key="GLOBAL").values_list("otp_rules", flat=True).first()) or {}
+        rules = {dim: {**limits, **(custom.get(dim) or {})} for dim, limits in DEFAULT_RULES.items()}
+        cache.set(RULES_CACHE_KEY, rules, RULES_CACHE_TTL)
+    return rules
+
+
+def _keys(dim: str, ident, win: str, now: float):
+    size = WINDOWS[win]
+    bucket = int(now // size)
+    return f"otp:{dim}:{ident}:{win}:{bucket}", f"otp:{dim}:{ident}:{win}:{bucket - 1}", (now % size) / size
+
+
+def _incr(key: str, delta: int, ttl: int) -> int:
+    cache.add(key, 0, ttl)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:  # kalit shu orada expire bo'ldi
+        cache.set(key, max(delta, 0), ttl)
+        return max(delta, 0)
+
+
+def acquire(vote_id: int, phone_snapshot: str) -> dict:
+    """
+    Bitta OTP urinishiga ruxsat. Natija: {"allowed": bool, "violations": ["vote:10m", ...], "retry_after": s}
+    Ruxsat berilsa urinish darhol hisobga olinadi.
+    """
+    if not shared_cache_ok():
+        return {"allowed": False, "violations": [CACHE_NOT_SHARED], "retry_after": BUFFER_MAX_AGE}
+    rules = get_rules()
+    now = time.time()
+    plan = []
+    for dim, ident in (("vote", vote_id), ("phone", phone_snapshot)):
+        for win, limit in (rules.get(dim) or {}).items():
+            if limit is not None and win in WINDOWS:
+                plan.append((f"{dim}:{win}", limit, WINDOWS[win], *_keys(dim, ident, win, now)))
+
+    prev = cache.get_many([p[4] for p in plan])
+    taken, violations, retry_after = [], [], 0
+    for name, limit, size, cur, prev_key, frac in plan:
+        n = _incr(cur, 1, size * 2)
+        taken.append((cur, size))
+        if n + prev.get(prev_key, 0) * (1 - frac) > limit:
+            violations.append(name)
+            retry_after = max(retry_after, int(size * (1 - frac)) + 1)
+    if violations:
+        for cur, size in taken:
+            _incr(cur, -1, size * 2)
+        return {"allowed": False, "violations": violations, "retry_after": retry_after}
+    return {"allowed": True, "violations": [], "retry_after": 0}
+
+
+def record(vote_id: int, code_entered: str, result: str, created_at=None) -> None:
+    """Urinishni bufferga qo'shish; yozishni fon oqimi bajaradi."""
+    with _lock:
+        _buffer.append(OtpAttempt(vote_id=vote_id, code_entered=code_entered, result=result,
+                                  created_at=created_at or timezone.now()))
+        full = len(_buffer) >= BUFFER_MAX
+    _ensure_flusher()
+    if full:
+        _wake.set()
+
+
+def flush() -> int:
+    """Bufferni yozish. Natija: yozilgan qatorlar soni."""
+    global _buffer
+    with _lock:
+        pending, _buffer = _buffer, []
+    if not pending:
+        return 0
+    try:
+        known = set(Vote.objects.filter(pk__in={a.vote_id for a in pending}).values_list("id", flat=True))
+        rows = [a for a in pending if a.vote_id in known]
+        if len(rows) < len(pending):
+            log.warning("otp buffer: %d attempts for unknown votes dropped", len(pending) - len(rows))
+        OtpAttempt.objects.bulk_create(rows, batch_size=500)
+    except Exception:
+        with _lock:
+            merged = pending + _buffer
+            _buffer = merged[-BUFFER_LIMIT:]
+        log.exception("otp buffer flush failed: %d attempts re-queued, %d dropped",
+                      len(pending), max(len(merged) - BUFFER_LIMIT, 0))
+        return 0
+    return len(rows)
+
+
+def _run_flusher():
+    while True:
+        _wake.wait(BUFFER_MAX_AGE)
+        _wake.clear()
+        try:
+            flush()
+        finally:
+            close_old_connections()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_run_flusher, name="otp-flush", daemon=True)
+            _flusher.start()
+
+
+def purge(days: int = RETENTION_DAYS) -> int:
+    """created_at < now - days bo'lgan urinishlarni o'chirish. id vaqt bilan o'sgani uchun PK bo'yicha bo'laklab."""
+    cutoff = timezone.now() - timedelta(days=days)
+    total = 0
+    while True:
+        ids = list(
+            OtpAttempt.objects.filter(created_at__lt=cutoff).order_by("id").values_list("id", flat=True)[:PURGE_CHUNK]
+        )
+        if not ids:
+            return total
+        total += OtpAttempt.objects.filter(id__in=ids).delete()[0]
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        log.exception("otp buffer flush failed at exit")
+
+
+atexit.register(_flush_at_exit)
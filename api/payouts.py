@@ -0,0 +1,164 @@
+"""
+APPROVED withdrawal'lardan provayder (CARD/CLICK/PAYME/PAYNET) bo'yicha
+payout batch fayllarini yaratish va to'langanlarini qayta import qilish.
+
+- Eksport ExportJob(kind="PAYOUTS") sifatida kuzatiladi
+- Qatorlar server-side cursor (.iterator) bilan oqim tarzida o'qiladi —
+  xotira batch hajmiga bog'liq emas
+- Fayllar PAYOUTS_ROOT/<job_id>/ ichiga yoziladi (MEDIA_ROOT dan tashqarida — ommaviy /media/ orqali
+  berilmaydi) va bitta zip qilib beriladi; yuklab olish faqat admin panel orqali (export_file)
+"""
+import csv
+import os
+import zipfile
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import ExportJob, Withdrawal
+from .services import bulk_mark_paid
+
+ITER_CHUNK = 2000
+IMPORT_CHUNK = 500
+
+# Har bir provayder uchun ustunlar (Excel ochishi uchun utf-8-sig)
+PROVIDER_COLUMNS = {
+    "CARD": ("withdrawal_id", "user_id", "card", "amount_sum", "created_at"),
+    "CLICK": ("withdrawal_id", "user_id", "account", "amount_sum", "comment"),
+    "PAYME": ("withdrawal_id", "user_id", "account", "amount_sum", "comment"),
+    "PAYNET": ("withdrawal_id", "user_id", "phone", "amount_sum", "comment"),
+    "OTHER": ("withdrawal_id", "user_id", "destination", "amount_sum", "comment"),
+}
+
+PAID_MARKS = {"OK", "PAID", "SUCCESS", "1", "TRUE"}
+MARK_COLUMNS = ("result", "status")
+
+
+def _row(method: str, wid, uid, amount, dest, created_at):
+    if method == "CARD":
+        return (wid, uid, dest, amount, timezone.localtime(created_at).strftime("%Y-%m-%d %H:%M"))
+    return (wid, uid, dest, amount, f"OB withdraw #{wid}")
+
+
+def _root() -> str:
+    return os.path.normpath(str(settings.PAYOUTS_ROOT))
+
+
+def export_file(job: ExportJob) -> str | None:
+    """Tayyor eksportning zip fayli (PAYOUTS_ROOT ichida va mavjud bo'lsa), aks holda None."""
+    if job.kind != "PAYOUTS" or job.status != "DONE" or not job.file_path:
+        return None
+    full = os.path.normpath(job.file_path)
+    if not full.startswith(_root() + os.sep) or not os.path.isfile(full):
+        return None
+    return full
+
+
+def run_payout_export(job: ExportJob) -> ExportJob:
+    """
+    APPROVED (va hold da bo'lmagan) so'rovlarni method bo'yicha alohida CSV fayllarga yozadi.
+    job.params: {"methods": [...]} (ixtiyoriy) — natijada counts/sums/files qo'shiladi.
+    """
+    params = dict(job.params or {})
+    methods = params.get("methods") or [m for m in PROVIDER_COLUMNS]
+
+    job.status = "RUNNING"
+    job.save(update_fields=["status"])
+
+    out_dir = os.path.join(_root(), str(job.id))
+    os.makedirs(out_dir, exist_ok=True)
+
+    counts, sums, files = {}, {}, {}
+    fh = writer = None
+    current = None
+    try:
+        qs = (
+            Withdrawal.objects.filter(status="APPROVED", on_hold=False, method__in=methods)
+            .order_by("method", "id")
+            .values_list("method", "id", "user_id", "amount_sum", "destination_masked", "created_at")
+        )
+        for method, wid, uid, amount, dest, created_at in qs.iterator(chunk_size=ITER_CHUNK):
+            if method != current:
+                if fh:
+                    fh.close()
+                current = method
+                path = os.path.join(out_dir, f"{method}.csv")
+                fh = open(path, "w", newline="", encoding="utf-8-sig")
+                writer = csv.writer(fh)
+                writer.writerow(PROVIDER_COLUMNS.get(method, PROVIDER_COLUMNS["OTHER"]))
+                files[method] = path
+                counts[method] = sums[method] = 0
+            writer.writerow(_row(method, wid, uid, amount, dest, created_at))
+            counts[method] += 1
+            sums[method] += amount
+        if fh:
+            fh.close()
+            fh = None
+
+        stamp = timezone.localtime().strftime("%Y%m%d_%H%M%S")
+        zip_path = os.path.join(out_dir, f"payouts_{job.id}_{stamp}.zip")
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for path in files.values():
+                zf.write(path, arcname=os.path.basename(path))
+
+        params.update({
+            "counts": counts,
+            "sums": sums,
+            "files": {m: os.path.basename(p) for m, p in files.items()},
+        })
+        job.params = params
+        job.file_path = zip_path
+        job.status = "DONE"
+        job.error = None
+    except Exception as e:
+        if fh:
+            fh.close()
+        job.status = "FAILED"
+        job.error = str(e)[:255]
+    job.save(update_fields=["status", "params", "file_path", "error"])
+    return job
+
+
+def create_payout_export(*, admin_id: int | None = None, methods=None) -> ExportJob:
+    job = ExportJob.objects.create(
+        admin_id=admin_id,
+        kind="PAYOUTS",
+        params={"methods": list(methods)} if methods else {},
+    )
+    return run_payout_export(job)
+
+
+def import_paid_file(path: str, *, admin_id: int, proof_url: str = "") -> dict:
+    """
+    Provayderdan qaytgan (yoki o'zimiz yaratgan) CSV ni o'qib, to'langanlarni
+    bulk_mark_paid bilan PAID qiladi. Kerakli ustun: withdrawal_id;
+    ixtiyoriy "result"/"status" ustuni — bo'lsa, faqat aniq OK/PAID/SUCCESS belgili qatorlar
+    olinadi (bo'sh katak — IGNORED); ustun umuman yo'q bo'lsa, hamma qator to'langan hisoblanadi.
+    Hold dagi (on_hold) so'rovlar PAID qilinmaydi — HELD.
+    Natija: {"OK": n, "SKIPPED": n, "NOT_FOUND": n, "HELD": n, "IGNORED": n}
+    """
+    totals = {"OK": 0, "SKIPPED": 0, "NOT_FOUND": 0, "HELD": 0, "IGNORED": 0}
+
+    def flush(ids):
+        if not ids:
+            return
+        for r in bulk_mark_paid(ids=ids, admin_id=admin_id, proof_url=proof_url, note="payout.import").values():
+            totals[r] = totals.get(r, 0) + 1
+
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.DictReader(fh)
+        mark_cols = [c for c in MARK_COLUMNS if c in (reader.fieldnames or ())]
+        batch = []
+        for rec in reader:
+            mark = next((v for v in ((rec.get(c) or "").strip().upper() for c in mark_cols) if v), "")
+            paid = not mark_cols or mark in PAID_MARKS
+            raw = (rec.get("withdrawal_id") or "").strip()
+            if not paid or not raw.isdigit():
+                totals["IGNORED"] += 1
+                continue
+            batch.append(int(raw))
+            if len(batch) >= IMPORT_CHUNK:
+                flush(batch)
+                batch = []
+        flush(batch)
+    return totals
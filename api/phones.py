@@ -0,0 +1,54 @@
+"""
+Telefon raqamlarini kanonik E.164 ko'rinishga keltirish (asosan O'zbekiston).
+
+canonical_e164("90 123-45-67")      -> "+998901234567"
+canonical_e164("8 (90) 123 45 67")  -> "+998901234567"
+canonical_e164("00998901234567")    -> "+998901234567"
+snapshot("+998901234567")           -> "998901234567"   (UserPhone/Vote.phone_snapshot)
+"""
+import re
+
+UZ_CC = "998"
+UZ_NSN_LEN = 9  # operator kodi (2) + abonent (7)
+
+_NON_DIGIT = re.compile(r"\D")
+
+
+def canonical_e164(raw: str | None) -> str | None:
+    """Kanonik "+<cc><nsn>" yoki yaroqsiz bo'lsa None."""
+    if not raw:
+        return None
+    s = raw.strip()
+    plus = s.startswith("+")
+    digits = _NON_DIGIT.sub("", s)
+    if not digits:
+        return None
+
+    if not plus and digits.startswith("00"):  # xalqaro prefiks
+        digits, plus = digits[2:], True
+
+    if digits.startswith(UZ_CC) and len(digits) == len(UZ_CC) + UZ_NSN_LEN:
+        return "+" + digits
+    if plus and digits.startswith(UZ_CC):  # +998 bilan, lekin uzunligi noto'g'ri
+        return None
+    if not plus:
+        # Mahalliy formatlar: 901234567, 0901234567, 8901234567 (eski "8" prefiks)
+        if len(digits) == UZ_NSN_LEN:
+            return "+" + UZ_CC + digits
+        if len(digits) == UZ_NSN_LEN + 1 and digits[0] in "08":
+            return "+" + UZ_CC + digits[1:]
+        return None
+    # Boshqa davlatlar: E.164 uzunligi 8..15
+    if 8 <= len(digits) <= 15 and digits[0] != "0":
+        return "+" + digits
+    return None
+
+
+def snapshot(e164: str) -> str:
+    """Indekslanadigan qisqa ko'rinish: faqat raqamlar ("+" siz)."""
+    return _NON_DIGIT.sub("", e164 or "")
+
+
+def snapshot_of(raw: str | None) -> str | None:
+    e164 = canonical_e164(raw)
+    return snapshot(e164) if e164 else None
@@ -0,0 +1,128 @@
+"""
+Ovoz isboti (screenshot) saqlash: kontent-hash bo'yicha dedup + siqish + thumbnail.
+
+- Hash — dekodlangan piksellar (mode + o'lcham + baytlar) bo'yicha sha256: bir xil rasm boshqa
+  encoder bilan saqlangan bo'lsa ham bitta fayl bo'ladi
+- Asl fayl lossless WebP (Pillow WebP'siz bo'lsa — optimize qilingan PNG) bo'lib yoziladi
+- Thumbnail (THUMB_WIDTH px, lossy WebP) admin uchun oldindan tayyorlanadi
+- Sharding: proofs/ab/cd/<hash>.webp, proofs/thumbs/ab/cd/<hash>.webp — katta tekis papkalar yo'q
+- Vote.proof_screenshot_path — MEDIA_ROOT ga nisbatan yo'l; hash yo'ldan olinadi (hash_from_path)
+
+Eski fayllar: manage.py backfill_proofs
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+from django.conf import settings
+from PIL import Image, features
+
+PREFIX = "proofs/"
+THUMB_WIDTH = getattr(settings, "PROOF_THUMB_WIDTH", 240)
+MAX_BYTES = 10 * 1024 * 1024
+MAX_PIXELS = getattr(settings, "PROOF_MAX_PIXELS", 4096 * 4096)  # siqilgan "bomba" ni dekodlashdan oldin rad etish
+_WEBP = features.check("webp")
+EXT = "webp" if _WEBP else "png"
+_PATH_RE = re.compile(r"^proofs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.(webp|png)$")
+
+
+class ProofError(ValueError):
+    pass
+
+
+def _rel(h: str, thumb: bool = False, ext: str = EXT) -> str:
+    return f"{PREFIX}{'thumbs/' if thumb else ''}{h[:2]}/{h[2:4]}/{h}.{ext}"
+
+
+def _abs(rel: str) -> str:
+    return os.path.join(settings.MEDIA_ROOT, *rel.split("/"))
+
+
+def hash_from_path(path: str | None) -> str | None:
+    m = _PATH_RE.match(path or "")
+    return m.group(1) if m else None
+
+
+def thumb_path(path: str | None) -> str | None:
+    """Thumbnail asl fayl bilan bir xil kengaytmada yoziladi (WebP yo'q paytda saqlanganlari — png)."""
+    m = _PATH_RE.match(path or "")
+    return _rel(m.group(1), thumb=True, ext=m.group(2)) if m else None
+
+
+def url(rel: str) -> str:
+    return f"{settings.MEDIA_URL}{rel}"
+
+
+def _write(rel: str, img: Image.Image, **save_kwargs) -> None:
+    dst = _abs(rel)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst), suffix=".tmp")  # thread/process uchun noyob
+    os.close(fd)
+    try:
+        img.save(tmp, format=EXT.upper(), **save_kwargs)
+        os.replace(tmp, dst)  # atomik: parallel yozuvchi bo'lsa ham yarim fayl ko'rinmaydi
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _encode_full(img: Image.Image, rel: str) -> None:
+    if _WEBP:
+        _write(rel, img, lossless=True, quality=100, method=4)
+    else:
+        _write(rel, img, optimize=True)
+
+
+def _encode_thumb(img: Image.Image, rel: str) -> None:
+    t = img.copy()
+    t.thumbnail((THUMB_WIDTH, THUMB_WIDTH * 4))
+    if _WEBP:
+        _write(rel, t, quality=70, method=4)
+    else:
+        _write(rel, t.convert("RGB") if t.mode == "RGBA" else t, optimize=True)
+
+
+def store(data: bytes) -> dict:
+    """
+    Rasm baytlari → {"path": MEDIA_ROOT ga nisbatan yo'l, "hash", "created": yangi fayl yozildimi, "size"}
+    Rasm bo'lmasa ProofError.
+    """
+    if len(data) > MAX_BYTES:
+        raise ProofError("fayl juda katta")
+    try:
+        img = Image.open(io.BytesIO(data))
+    except Exception as e:
+        raise ProofError("rasm o'qilmadi") from e
+    # Image.open faqat sarlavhani o'qiydi — o'lcham piksellar dekodlanishidan (load) oldin tekshiriladi
+    if img.size[0] * img.size[1] > MAX_PIXELS:
+        raise ProofError("rasm o'lchami juda katta")
+    try:
+        img.load()
+    except Exception as e:
+        raise ProofError("rasm o'qilmadi") from e
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+
+    h = hashlib.sha256(f"{img.mode}:{img.size[0]}x{img.size[1]}:".encode() + img.tobytes()).hexdigest()
+    rel, thumb = _rel(h), _rel(h, thumb=True)
+    created = not os.path.exists(_abs(rel))
+    if created:
+        _encode_full(img, rel)
+    if not os.path.exists(_abs(thumb)):
+        _encode_thumb(img, thumb)
+    return {"path": rel, "hash": h, "created": created, "size": os.path.getsize(_abs(rel))}
+
+
+def resolve_legacy(path: str | None) -> str | None:
+    """Eski proof_screenshot_path (MEDIA_URL bilan, absolyut yoki nisbiy) → diskdagi fayl; topilmasa None."""
+    if not path or path.startswith(("http://", "https://")) or hash_from_path(path):
+        return None
+    if path.startswith(settings.MEDIA_URL):
+        path = path[len(settings.MEDIA_URL):]
+    full = path if os.path.isabs(path) else os.path.join(settings.MEDIA_ROOT, path)
+    full = os.path.normpath(full)
+    if not full.startswith(os.path.normpath(str(settings.MEDIA_ROOT)) + os.sep):
+        return None
+    return full if os.path.isfile(full) else None
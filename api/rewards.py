@@ -0,0 +1,119 @@
+"""
+Vote SUCCESS → reward crediting pipeline.
+
+- vote_lifecycle SUCCESS o'tishini VoteSuccessLog ga o'sha tranzaksiyada yozadi (record_success)
+- credit_batch: PipelineCursor("rewards") dan keyingi log qatorlarini oladi, bitta tranzaksiyada
+  Transaction(type=REWARD, ref_id=vote_id) larni bulk_create qiladi, balanslarni bitta UPDATE ... CASE
+  bilan oshiradi va kursorni suradi. Kursor qatori qulflanadi — parallel worker bir xil oraliqni ololmaydi.
+- Exactly-once: kursor + kreditlar bitta tranzaksiyada; qo'shimcha ravishda shu vote uchun REWARD
+  tranzaksiyasi allaqachon bo'lsa (eski skript yoki sweep) — o'tkazib yuboriladi. Vote qatorlari
+  qulflanib status qayta o'qiladi; uq_txn_reward_per_vote + ignore_conflicts oxirgi himoya,
+  balans esa faqat haqiqatan yozilgan qatorlar bo'yicha oshiriladi.
+- Postgres'da id lar commit tartibida emas: LAG soniyadan yosh qatorlar keyingi aylanishga qoldiriladi,
+  sweep esa kursor ortida qolib ketgan (kech commit bo'lgan) qatorlarni qayta tekshiradi.
+
+Summa: Project.reward_sum, 0 bo'lsa Setting(GLOBAL).default_reward_sum.
+SUCCESS dan keyin kreditlashdan oldin boshqa holatga qaytgan vote logi o'chiriladi — qayta SUCCESS
+bo'lsa yangi log yoziladi.
+"""
+from datetime import timedelta
+
+from django.db import transaction as dbtx
+from django.utils import timezone
+
+from .counters import add_delta, bump_users
+from .models import PipelineCursor, Setting, Transaction, Vote, VoteSuccessLog
+
+CURSOR = "rewards"
+BATCH = 500
+LAG = timedelta(seconds=2)
+
+
+def record_success(vote_ids) -> None:
+    if vote_ids:
+        VoteSuccessLog.objects.bulk_create(
+            [VoteSuccessLog(vote_id=v) for v in vote_ids], ignore_conflicts=True, batch_size=BATCH
+        )
+
+
+def _default_reward() -> int:
+    return Setting.objects.filter(key="GLOBAL").values_list("default_reward_sum", flat=True).first() or 0
+
+
+def _credit(logs) -> dict:
+    """logs: [(log_id, vote_id, user_id, status, project_reward)] — tranzaksiya ichida chaqiriladi."""
+    vote_ids = [r[1] for r in logs]
+    # O'qilgandan keyin FAILED ga o'tgan bo'lishi mumkin — qulf ostida yangi status
+    status_now = dict(
+        Vote.objects.select_for_update().filter(id__in=vote_ids).order_by("id").values_list("id", "status")
+    )
+    already = set(
+        Transaction.objects.filter(type="REWARD", ref_id__in=vote_ids).values_list("ref_id", flat=True)
+    )
+    default = None
+    now = timezone.now()
+    txns, reverted = [], []
+    for log_id, vote_id, user_id, _, reward in logs:
+        if vote_id in already:
+            continue
+        if status_now.get(vote_id) != "SUCCESS":
+            reverted.append(log_id)
+            continue
+        if not reward:
+            default = _default_reward() if default is None else default
+            reward = default
+        if reward <= 0:
+            continue
+        txns.append(Transaction(user_id=user_id, type="REWARD", amount_sum=reward, ref_id=vote_id, created_at=now))
+    if reverted:
+        VoteSuccessLog.objects.filter(id__in=reverted).delete()
+    if not txns:
+        return {"credited": 0, "sum": 0}
+    Transaction.objects.bulk_create(txns, batch_size=BATCH, ignore_conflicts=True)
+    # ignore_conflicts o'tkazib yuborganlarini bilmaymiz — shu created_at bilan yozilganlarni qayta o'qiymiz
+    inserted = list(
+        Transaction.objects.filter(type="REWARD", ref_id__in=[t.ref_id for t in txns], created_at=now)
+        .values_list("user_id", "amount_sum")
+    )
+    deltas = {}
+    for user_id, amount in inserted:
+        add_delta(deltas, user_id, "balance_sum", amount)
+    bump_users(deltas)
+    return {"credited": len(inserted), "sum": sum(a for _, a in inserted)}
+
+
+def _rows(qs):
+    return list(qs.values_list("id", "vote_id", "vote__user_id", "vote__status", "vote__project__reward_sum"))
+
+
+def credit_batch(limit: int = BATCH) -> dict:
+    """Kursordan keyingi limit ta logni kreditlaydi. Natija: {"credited", "sum", "seen", "position"}"""
+    PipelineCursor.objects.get_or_create(name=CURSOR)
+    with dbtx.atomic():
+        cur = PipelineCursor.objects.select_for_update().get(name=CURSOR)
+        logs = _rows(
+            VoteSuccessLog.objects.filter(id__gt=cur.position, created_at__lt=timezone.now() - LAG)
+            .order_by("id")[:limit]
+        )
+        if not logs:
+            return {"credited": 0, "sum": 0, "seen": 0, "position": cur.position}
+        out = _credit(logs)
+        cur.position = logs[-1][0]
+        cur.save(update_fields=["position", "updated_at"])
+    return {**out, "seen": len(logs), "position": cur.position}
+
+
+def sweep(hours: int = 24) -> dict:
+    """Kursor ortidagi, lekin hali kreditlanmagan loglar (kech commit bo'lganlar) — oxirgi N soat."""
+    with dbtx.atomic():
+        cur = PipelineCursor.objects.select_for_update().filter(name=CURSOR).first()
+        if cur is None:
+            return {"credited": 0, "sum": 0}
+        logs = _rows(
+            VoteSuccessLog.objects.filter(
+                id__lte=cur.position, created_at__gte=timezone.now() - timedelta(hours=hours)
+            )
+            .exclude(vote_id__in=Transaction.objects.filter(type="REWARD", ref_id__isnull=False).values("ref_id"))
+            .order_by("id")
+        )
+        return _credit(logs) if logs else {"credited": 0, "sum": 0}
@@ -0,0 +1,147 @@
+"""
+SeleniumJob navbati ustidan node-larni hisobga oluvchi rejalashtiruvchi.
+
+- Node ro'yxatdan o'tadi va max_concurrency e'lon qiladi
+- Node bir vaqtda ko'pi bilan effective_capacity ta RUNNING job oladi:
+  max_concurrency × weight, weight — oxirgi STATS_WINDOW dagi muvaffaqiyat ulushi
+  va o'rtacha latency dan (sekin yoki ko'p yiqiladigan node kamroq oladi — IP ban xavfi kamayadi)
+- Project.max_in_flight ga yetgan loyihalar claim nomzodlaridan chiqariladi
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from . import jobqueue
+from .models import Project, SeleniumJob, SeleniumNode
+
+STATS_WINDOW = timedelta(minutes=getattr(settings, "SELENIUM_STATS_WINDOW_MIN", 60))
+STATS_TTL = timedelta(seconds=60)
+TARGET_LATENCY_MS = getattr(settings, "SELENIUM_TARGET_LATENCY_MS", 60_000)
+MIN_WEIGHT = 0.1
+
+
+class NodeNotRegistered(Exception):
+    pass
+
+
+def register_node(name: str, max_concurrency: int, meta: dict | None = None) -> SeleniumNode:
+    node, _ = SeleniumNode.objects.update_or_create(
+        name=name,
+        defaults={"max_concurrency": max_concurrency, "meta": meta, "last_seen_at": timezone.now()},
+    )
+    return node
+
+
+def job_latency_ms(timings, started_at, finished_at) -> int | None:
+    """timings.total_ms bo'lsa — o'sha, aks holda finished_at - started_at."""
+    if isinstance(timings, dict) and isinstance(timings.get("total_ms"), (int, float)):
+        return int(timings["total_ms"])
+    if started_at and finished_at:
+        return int((finished_at - started_at).total_seconds() * 1000)
+    return None
+
+
+def refresh_node_stats(node: SeleniumNode, now=None) -> SeleniumNode:
+    now = now or timezone.now()
+    rows = SeleniumJob.objects.filter(
+        node=node.name, status__in=["DONE", "FAILED"], finished_at__gte=now - STATS_WINDOW
+    ).values_list("status", "timings", "started_at", "finished_at")
+    done = total = 0
+    lat = []
+    for st, timings, started, finished in rows:
+        total += 1
+        done += st == "DONE"
+        ms = job_latency_ms(timings, started, finished)
+        if ms is not None:
+            lat.append(ms)
+
+    # Laplace tekislash: 1-2 ta yiqilish bilan weight keskin tushib ketmasin; tarixsiz node — to'liq sig'im
+    success = (done + 1) / (total + 2) if total else 1.0
+    avg = int(sum(lat) / len(lat)) if lat else None
+    speed = min(1.0, TARGET_LATENCY_MS / avg) if avg else 1.0
+    node.success_rate = round(success, 4)
+    node.avg_latency_ms = avg
+    node.weight = round(max(MIN_WEIGHT, min(1.0, success * speed)), 4)
+    node.window_jobs = total
+    node.stats_updated_at = now
+    node.save(update_fields=["success_rate", "avg_latency_ms", "weight", "window_jobs", "stats_updated_at"])
+    return node
+
+
+def effective_capacity(node: SeleniumNode) -> int:
+    return max(1, math.floor(node.max_concurrency * node.weight))
+
+
+def project_headroom() -> dict[int, int]:
+    """{project_id: yana nechta job RUNNING bo'lishi mumkin} — faqat max_in_flight belgilanganlar."""
+    limits = dict(
+        Project.objects.filter(is_active=True, max_in_flight__isnull=False).values_list("id", "max_in_flight")
+    )
+    if not limits:
+        return {}
+    running = dict(
+        SeleniumJob.objects.filter(status="RUNNING", vote__project_id__in=list(limits))
+        .values("vote__project_id")
+        .annotate(c=Count("id"))
+        .values_list("vote__project_id", "c")
+    )
+    return {pid: max(0, lim - running.get(pid, 0)) for pid, lim in limits.items()}
+
+
+def _pick(n: int, headroom: dict[int, int]) -> list[int] | None:
+    """
+    Navbat boshidan n ta job, har loyiha uchun headroom dan oshmasdan.
+    None — cheklov yo'q (jobqueue o'zi tanlaydi).
+    """
+    base = SeleniumJob.objects.filter(status="QUEUED").exclude(vote__project__is_active=False)
+    if not headroom:
+        return None
+    full = [pid for pid, left in headroom.items() if left <= 0]
+    if full:
+        base = base.exclude(vote__project_id__in=full)
+    left = dict(headroom)
+    picked = []
+    # Oyna: bitta loyiha navbatni to'ldirib qo'ygan bo'lsa ham boshqalarini topish uchun n dan kengroq
+    for jid, pid in base.order_by("created_at", "id").values_list("id", "vote__project_id")[: n * 10]:
+        if pid in left:
+            if left[pid] <= 0:
+                continue
+            left[pid] -= 1
+        picked.append(jid)
+        if len(picked) >= n:
+            break
+    return picked
+
+
+def schedule_claim(name: str, requested: int, *, lease_seconds: int = jobqueue.DEFAULT_LEASE):
+    """
+    Node uchun sig'imi va loyiha limitlari doirasida joblar ajratish.
+    Qaytaradi: (lease_token, jobs, node)
+
+    max_in_flight — yumshoq limit: ikki node bir vaqtda claim qilsa, bir-ikki jobga oshishi mumkin.
+    """
+    node = SeleniumNode.objects.filter(name=name, is_active=True).first()
+    if node is None:
+        raise NodeNotRegistered(name)
+    now = timezone.now()
+    if not node.stats_updated_at or now - node.stats_updated_at > STATS_TTL:
+        refresh_node_stats(node, now)
+    SeleniumNode.objects.filter(pk=node.pk).update(last_seen_at=now)
+
+    in_flight = SeleniumJob.objects.filter(status="RUNNING", node=name).count()
+    allowed = min(requested, effective_capacity(node) - in_flight)
+    if allowed <= 0:
+        return None, [], node
+
+    ids = _pick(allowed, project_headroom())
+    if ids is None:
+        qs = SeleniumJob.objects.exclude(vote__project__is_active=False)
+    elif not ids:
+        return None, [], node
+    else:
+        qs = SeleniumJob.objects.filter(id__in=ids)
+    token, jobs = jobqueue.claim(name, allowed, lease_seconds=lease_seconds, queryset=qs)
+    return token, jobs, node
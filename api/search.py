@@ -0,0 +1,118 @@
+"""
+User qidiruvi (API va admin uchun umumiy).
+
+- Raqam → user_id bo'yicha aniq (PK) qidiruv
+- @username → Lower(username) indeksi bo'yicha aniq qidiruv
+- Matn → users.search_text bo'yicha: SQLite'da FTS5 (trigram) jadvali users_fts,
+  Postgres'da pg_trgm GIN indeksi; natijalar relevance bo'yicha tartiblanadi.
+  qs dagi filtrlar (active, language, admin list_filter) FTS so'roviga qo'shiladi — top-N
+  filtrlangan userlar ichidan olinadi
+Jadval/indekslar 0009_user_search migratsiyasida yaratiladi. SQLite'da User ga har AddField/AlterField
+users jadvalini qayta quradi va users_fts_* triggerlari yo'qoladi (0012 da shunday bo'ldi — 0021 tikladi);
+shuning uchun har migrate dan keyin ensure_sqlite_fts (apps.py, post_migrate) triggerlarni tekshiradi.
+"""
+from django.db import connection, connections
+from django.db.models import Case, When, IntegerField
+from django.db.models.functions import Lower
+
+from .models import User, normalize_search_text
+
+MAX_RESULTS = 200
+MIN_FTS_LEN = 3  # trigram tokenizer 3 belgidan qisqa so'zni topa olmaydi
+
+FTS_TRIGGERS = ("users_fts_ai", "users_fts_ad", "users_fts_au")
+SQLITE_FTS_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(user_id, search_text) VALUES (new.user_id, new.search_text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_ad AFTER DELETE ON users BEGIN
+        DELETE FROM users_fts WHERE user_id = old.user_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS users_fts_au AFTER UPDATE OF search_text ON users BEGIN
+        DELETE FROM users_fts WHERE user_id = old.user_id;
+        INSERT INTO users_fts(user_id, search_text) VALUES (new.user_id, new.search_text);
+    END""",
+]
+
+
+def ensure_sqlite_fts(using: str = "default") -> bool:
+    """
+    users_fts bor, lekin triggerlari yo'q bo'lsa (users jadvali qayta qurilgan) — triggerlarni yaratib,
+    users_fts ni qayta to'ldiradi. Natija: tiklandimi.
+    """
+    conn = connections[using]
+    if conn.vendor != "sqlite" or "users_fts" not in conn.introspection.table_names():
+        return False
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)", FTS_TRIGGERS
+        )
+        if cur.fetchone()[0] == len(FTS_TRIGGERS):
+            return False
+        for sql in SQLITE_FTS_TRIGGERS:
+            cur.execute(sql)
+        cur.execute("DELETE FROM users_fts")
+        cur.execute("INSERT INTO users_fts(user_id, search_text) SELECT user_id, search_text FROM users")
+    return True
+
+
+def _ranked_ids(term: str, limit: int, qs=None) -> list[int] | None:
+    """Relevance bo'yicha tartiblangan user_id lar (qs filtrlari ichida); backend qo'llab-quvvatlamasa None."""
+    vendor = connection.vendor
+    within, within_params = "", []
+    if qs is not None and qs.query.where:
+        sql, within_params = qs.order_by().values("pk").query.sql_with_params()
+        within = f" AND user_id IN ({sql})"
+    with connection.cursor() as cur:
+        if vendor == "sqlite":
+            phrase = '"' + term.replace('"', '""') + '"'
+            cur.execute(
+                f"SELECT user_id FROM users_fts WHERE users_fts MATCH %s{within} ORDER BY rank LIMIT %s",
+                [phrase, *within_params, limit],
+            )
+        elif vendor == "postgresql":
+            like = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            cur.execute(
+                f"SELECT user_id FROM users WHERE search_text LIKE %s{within} "
+                "ORDER BY similarity(search_text, %s) DESC, user_id DESC LIMIT %s",
+                [like, *within_params, term, limit],
+            )
+        else:
+            return None
+        return [r[0] for r in cur.fetchall()]
+
+
+def _keep_order(qs, ids):
+    if not ids:
+        return qs.none()
+    order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(ids)], output_field=IntegerField())
+    return qs.filter(pk__in=ids).order_by(order)
+
+
+def search_users(qs, raw: str, *, limit: int = MAX_RESULTS):
+    """
+    qs ni qidiruv so'zi bo'yicha toraytiradi va relevance bo'yicha tartiblaydi.
+    Natija — eng yaxshi `limit` ta moslik (sahifalash shart emas).
+    """
+    term = (raw or "").strip()
+    if not term:
+        return qs
+
+    # 1) Telegram ID — aniq moslik
+    if term.lstrip("-").isdigit():
+        return qs.filter(pk=int(term))
+
+    # 2) @username — aniq moslik (funksional indeks)
+    if term.startswith("@") and " " not in term:
+        return qs.alias(username_l=Lower("username")).filter(username_l=term[1:].lower())
+
+    # 3) Matn
+    norm = normalize_search_text(term)
+    if not norm:
+        return qs.none()
+    if len(norm) >= MIN_FTS_LEN:
+        ids = _ranked_ids(norm, limit, qs)
+        if ids is not None:
+            return _keep_order(qs, ids)
+    # Qisqa so'z yoki FTS'siz backend — prefiks bo'yicha
+    return qs.filter(search_text__startswith=norm).order_by("-created_at")
@@ -1,5 +1,7 @@
 from django.utils import timezone
-from .models import User, UserPhone, Transaction
+from .models import User, UserPhone, Transaction, LANG_CHOICES, OTP_RESULT, VOTE_STATUS
+from .phones import canonical_e164
+from . import timings
 from rest_framework import serializers
 from .models import RequiredChannel,SubscriptionSnapshot
 
@@ -10,7 +12,21 @@ class UserPhoneSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "phone_snapshot", "created_at")
 
 
-class UserReadSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    ?fields=user_id,username kabi sparse fieldset: Serializer(..., fields=[...]).
+    Noma'lum nomlar e'tiborsiz qoldiriladi.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class UserReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     phones = UserPhoneSerializer(many=True, read_only=True)
 
     class Meta:
@@ -22,10 +38,13 @@ class UserReadSerializer(serializers.ModelSerializer):
             "active",
             "language",
             "balance_sum",
+            "votes_count",
+            "success_votes",
+            "paid_out_sum",
             "created_at",
             "phones",
         )
-        read_only_fields = ("created_at", "balance_sum")
+        read_only_fields = ("created_at", "balance_sum", "votes_count", "success_votes", "paid_out_sum")
 
 
 class UserWriteSerializer(serializers.ModelSerializer):
@@ -41,14 +60,35 @@ class UserWriteSerializer(serializers.ModelSerializer):
         return value
 
 
+class UserSyncItemSerializer(serializers.Serializer):
+    user_id = serializers.IntegerField()
+    username = serializers.CharField(max_length=128, required=False, allow_null=True, allow_blank=True)
+    full_name = serializers.CharField(max_length=128, required=False, allow_blank=True, default="")
+    language = serializers.ChoiceField(choices=[c for c, _ in LANG_CHOICES], required=False, default="uz")
+    active = serializers.BooleanField(required=False, default=True)
+
+
+class UserBulkUpsertSerializer(serializers.Serializer):
+    users = UserSyncItemSerializer(many=True, allow_empty=False, max_length=1000)
+
+
 class AddPhoneSerializer(serializers.Serializer):
     phone_e164 = serializers.CharField(max_length=24)
 
     def validate_phone_e164(self, v: str):
-        v = v.strip()
-        if not v.startswith("+") or len(v) < 7:
+        e164 = canonical_e164(v)
+        if not e164:
             raise serializers.ValidationError("phone_e164 must be E.164, e.g. +99890xxxxxxx")
-        return v
+        return e164
+
+
+class PhoneAttachItemSerializer(serializers.Serializer):
+    user_id = serializers.IntegerField()
+    phone_e164 = serializers.CharField(max_length=32)  # kanonizatsiya servisda — INVALID per-item qaytadi
+
+
+class BulkPhoneAttachSerializer(serializers.Serializer):
+    items = PhoneAttachItemSerializer(many=True, allow_empty=False, max_length=5000)
 
 
 class AdjustBalanceSerializer(serializers.Serializer):
@@ -109,6 +149,9 @@ class ReferralGrantIn(serializers.Serializer):
     referrer_user_id = serializers.IntegerField()
     referred_user_id = serializers.IntegerField()
 
+class PhoneLookupIn(serializers.Serializer):
+    phones = serializers.ListField(child=serializers.CharField(max_length=32), allow_empty=False, max_length=1000)
+
 class ReferralStatsOut(serializers.Serializer):
     invited_count = serializers.IntegerField()
     paid_sum = serializers.IntegerField()
@@ -127,14 +170,133 @@ class WithdrawalCreateSerializer(serializers.Serializer):
     amount = serializers.IntegerField(min_value=1000)
 
 class WithdrawalSerializer(serializers.ModelSerializer):
-    user_id = serializers.IntegerField(source="user.user_id", read_only=True)
+    user_id = serializers.IntegerField(read_only=True)  # FK ustunidan, JOIN siz
 
     class Meta:
         model = Withdrawal
         fields = [
             "id", "user_id", "amount_sum", "method",
-            "destination_masked", "status",
+            "destination_masked", "status", "on_hold",
             "admin_id", "admin_note",
             "created_at", "updated_at",
         ]
         read_only_fields = fields
+
+
+# ======== Selenium node navbati ========
+class NodeRegisterIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    max_concurrency = serializers.IntegerField(min_value=1, max_value=64)
+    meta = serializers.JSONField(required=False, allow_null=True)
+
+
+class NodeClaimIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=1)
+    lease_seconds = serializers.IntegerField(min_value=30, max_value=3600, required=False)
+
+
+class NodeHeartbeatIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    lease_token = serializers.CharField(max_length=32)
+    job_ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    lease_seconds = serializers.IntegerField(min_value=30, max_value=3600, required=False)
+
+
+class JobTimingsField(serializers.JSONField):
+    """api/timings.py sxemasi: fazalar bo'yicha ms; noma'lum kalitlar tashlanadi."""
+
+    def to_internal_value(self, data):
+        try:
+            return timings.normalize(super().to_internal_value(data))
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+
+
+class NodeJobResultIn(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=["DONE", "FAILED"])
+    error = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    timings = JobTimingsField(required=False, allow_null=True)
+
+
+class NodeTimingItemIn(serializers.Serializer):
+    id = serializers.IntegerField()
+    timings = JobTimingsField()
+
+
+class NodeTimingsIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    items = NodeTimingItemIn(many=True, allow_empty=False, max_length=500)
+
+
+class NodeCompleteIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    lease_token = serializers.CharField(max_length=32)
+    results = NodeJobResultIn(many=True, allow_empty=False, max_length=200)
+
+
+class OtpAttemptIn(serializers.Serializer):
+    code_entered = serializers.CharField(max_length=16)
+    result = serializers.ChoiceField(choices=[c for c, _ in OTP_RESULT])
+    created_at = serializers.DateTimeField(required=False)
+
+
+class VoteReportIn(serializers.Serializer):
+    vote_id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=["PROCESSING", "OTP_REQUIRED", "SUCCESS", "FAILED"])
+    version = serializers.IntegerField(required=False)
+    ob_vote_id = serializers.CharField(max_length=64, required=False, allow_null=True)
+    proof_screenshot_path = serializers.CharField(max_length=1024, required=False, allow_null=True)
+    error_message = serializers.CharField(max_length=512, required=False, allow_null=True, allow_blank=True)
+    attempt_count = serializers.IntegerField(min_value=0, required=False)
+    job_id = serializers.IntegerField(required=False)
+    otp_attempts = OtpAttemptIn(many=True, required=False, max_length=20)
+
+
+class NodeVoteReportIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    reports = VoteReportIn(many=True, allow_empty=False, max_length=500)
+
+
+class VoteTransitionItemIn(serializers.Serializer):
+    id = serializers.IntegerField()
+    version = serializers.IntegerField(required=False)
+
+
+class NodeVoteTransitionIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    to = serializers.ChoiceField(choices=[c for c, _ in VOTE_STATUS])
+    items = VoteTransitionItemIn(many=True, allow_empty=False, max_length=500)
+    error_message = serializers.CharField(max_length=512, required=False, allow_blank=True)
+
+
+class NodeVotePrecheckIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    project_id = serializers.IntegerField()
+    phones = serializers.ListField(child=serializers.CharField(max_length=32), allow_empty=False, max_length=1000)
+
+
+class NodeOtpAcquireIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    vote_id = serializers.IntegerField()
+
+
+class OtpAttemptItemIn(OtpAttemptIn):
+    vote_id = serializers.IntegerField()
+
+
+class NodeOtpAttemptsIn(serializers.Serializer):
+    node = serializers.CharField(max_length=64)
+    attempts = OtpAttemptItemIn(many=True, allow_empty=False, max_length=500)
+
+
+class NodeJobOut(serializers.Serializer):
+    id = serializers.IntegerField()
+    vote_id = serializers.IntegerField()
+    vote_version = serializers.IntegerField(source="vote.version")
+    project_id = serializers.IntegerField(source="vote.project_id")
+    project_url = serializers.CharField(source="vote.project.url")
+    phone_snapshot = serializers.CharField(source="vote.phone_snapshot")
+    attempts = serializers.IntegerField()
+    lease_expires_at = serializers.DateTimeField()
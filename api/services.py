@@ -1,45 +1,65 @@
 # finance/services.py
-from django.db import transaction as dbtx
+from django.db import transaction as dbtx, IntegrityError
 from django.core.exceptions import ValidationError
 
+from . import velocity
 from .masking import mask_destination
-from .models import Withdrawal, Transaction, User  # sizning joylashuvingizga mos import qiling
+from .models import Withdrawal, Transaction, User, AdminLog  # sizning joylashuvingizga mos import qiling
 
 MIN_WITHDRAW = 20000  # faqat minimal qoida (modelga tegmadik)
+OPEN_WITHDRAW_MSG = "❗ Sizda hali tugallanmagan pul  yechish so‘rovi bor. Iltimos yakunlashni kuting."
 
 @dbtx.atomic
 def create_withdrawal(*, user: User, method: str, destination_raw: str, amount: int) -> Withdrawal:
     """
     1) Minimal summa tekshiruvi
-    2) Ochiq PENDING bor-yo'qligi
-    3) User balansini select_for_update bilan qulflash va yetarliligini tekshirish
+    2) User balansini select_for_update bilan qulflash va yetarliligini tekshirish
+    3) Ochiq PENDING bor-yo'qligi — qulflangan userdagi has_open_withdrawal,
+       poyga holatini esa uq_withdraw_one_open_per_user constraint yopadi
     4) Withdrawal (PENDING) yozish (destination_masked bilan)
+    4a) Velocity limitidan oshsa — on_hold=True (rad etilmaydi, qo'lda ko'riladi)
     5) Transaction (WITHDRAWAL, manfiy) yozish
     6) User.balance_sum ni kamaytirish
     """
     if amount < MIN_WITHDRAW:
         raise ValidationError(f"Minimal yechish {MIN_WITHDRAW} so'm.")
 
-
-    if Withdrawal.objects.filter(user=user, status__in=["PENDING", "APPROVED"]).exists():
-        raise ValidationError("❗ Sizda hali tugallanmagan pul  yechish so‘rovi bor. Iltimos yakunlashni kuting.")
-
     # Balansni qulflash
     u = User.objects.select_for_update().get(pk=user.pk)
+    if u.has_open_withdrawal:
+        raise ValidationError(OPEN_WITHDRAW_MSG)
     if u.balance_sum < amount:
         raise ValidationError("Balans yetarli emas.")
 
     # Masklab saqlaymiz (modelni o'zgartirmaymiz)
     dest_mask = mask_destination(method, destination_raw)
 
+    # Velocity limitlari — oshsa rad etmaymiz, hold qilamiz
+    subjects = {"user": u.pk, "destination": velocity.destination_key(method, destination_raw)}
+    violations = velocity.check(subjects, amount)
+
     # Withdrawal yozish (faqat mask)
-    w = Withdrawal.objects.create(
-        user=u,
-        amount_sum=amount,
-        method=method,
-        destination_masked=dest_mask,
-        status="PENDING",
-    )
+    try:
+        with dbtx.atomic():
+            w = Withdrawal.objects.create(
+                user=u,
+                amount_sum=amount,
+                method=method,
+                destination_masked=dest_mask,
+                status="PENDING",
+                on_hold=bool(violations),
+                admin_note=f"[hold] velocity: {', '.join(violations)}" if violations else None,
+            )
+    except IntegrityError:
+        raise ValidationError(OPEN_WITHDRAW_MSG)
+
+    if violations:
+        AdminLog.objects.create(
+            admin_id=0,
+            action="VELOCITY_HOLD",
+            payload_json={"withdrawal_id": w.id, "user_id": u.pk, "amount_sum": amount, "rules": violations},
+        )
+    dbtx.on_commit(lambda: velocity.record(subjects, amount))
 
     # Tranzaksiya: manfiy yozuv (hold sifatida)
     Transaction.objects.create(
@@ -51,7 +71,8 @@ def create_withdrawal(*, user: User, method: str, destination_raw: str, amount:
 
     # Balansni tushirish
     u.balance_sum -= amount
-    u.save(update_fields=["balance_sum"])
+    u.has_open_withdrawal = True
+    u.save(update_fields=["balance_sum", "has_open_withdrawal"])
 
     return w
 
@@ -60,7 +81,8 @@ from django.db import transaction as dbtx
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
-from .models import User, Transaction, Withdrawal, AdminLog
+from .models import User, Transaction, Withdrawal, AdminLog, HeldDeduction
+from .counters import add_delta, bump_users
 
 
 @dbtx.atomic
@@ -103,7 +125,8 @@ def reject_withdrawal(*, w: Withdrawal, admin_id: int, reason: str = "") -> With
     # Balansni qaytarish (qattiq qulf bilan)
     u = User.objects.select_for_update().get(pk=w.user_id)
     u.balance_sum += w.amount_sum
-    u.save(update_fields=["balance_sum"])
+    u.has_open_withdrawal = False
+    u.save(update_fields=["balance_sum", "has_open_withdrawal"])
 
     # Qaytarish tranzaksiyasi
     Transaction.objects.create(
@@ -155,6 +178,7 @@ def mark_paid(*, w: Withdrawal, admin_id: int, proof_url: str = "", note: str =
         w.admin_note = ((w.admin_note or "") + "\n" + "\n".join(extra)).strip()
     w.updated_at = timezone.now()
     w.save(update_fields=["status", "admin_id", "admin_note", "updated_at"])
+    bump_users({w.user_id: {"paid_out_sum": w.amount_sum}}, has_open_withdrawal=False)
 
     AdminLog.objects.create(
         admin_id=admin_id,
@@ -168,3 +192,255 @@ def mark_paid(*, w: Withdrawal, admin_id: int, proof_url: str = "", note: str =
         },
     )
     return w
+
+
+# ======== Bulk (set-based) o'tishlar ========
+from django.db.models import Case, When, Value, F, Q, IntegerField
+from django.db.models.functions import Concat
+
+BULK_CHUNK = 500
+
+
+def _append_note(line: str):
+    """admin_note ga SQL darajasida qator qo'shish (bo'sh bo'lsa — yangi qiymat)."""
+    return Case(
+        When(Q(admin_note__isnull=True) | Q(admin_note=""), then=Value(line)),
+        default=Concat(F("admin_note"), Value("\n" + line)),
+    )
+
+
+def _lock_eligible(ids, allowed, *, skip_held: bool = False):
+    """
+    Tanlangan idlardan statusi mos keladiganlarini qulflab qaytaradi.
+    outcomes: {id: "OK" | "SKIPPED" | "NOT_FOUND" | "HELD"} — OK keyin qo'yiladi.
+    skip_held: on_hold so'rovlar (velocity) admin release qilmaguncha HELD bo'lib qoladi.
+    """
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    rows = []
+    for i in range(0, len(ids), BULK_CHUNK):
+        rows += (
+            Withdrawal.objects.select_for_update()
+            .filter(id__in=ids[i:i + BULK_CHUNK])
+            .order_by("id")
+            .values_list("id", "user_id", "amount_sum", "status", "on_hold")
+        )
+    found = {r[0] for r in rows}
+    outcomes = {i: ("SKIPPED" if i in found else "NOT_FOUND") for i in ids}
+    eligible = []
+    for wid, uid, amt, st, held in rows:
+        if st not in allowed:
+            continue
+        if skip_held and held:
+            outcomes[wid] = "HELD"
+            continue
+        eligible.append((wid, uid, amt))
+    return eligible, outcomes
+
+
+def _conditional_update(eligible, allowed, *, status: str, admin_id: int, note_expr=None, **extra_filter) -> None:
+    fields = {"status": status, "admin_id": admin_id, "updated_at": timezone.now()}
+    if note_expr is not None:
+        fields["admin_note"] = note_expr
+    ids = [r[0] for r in eligible]
+    n = 0
+    for i in range(0, len(ids), BULK_CHUNK):
+        n += Withdrawal.objects.filter(
+            id__in=ids[i:i + BULK_CHUNK], status__in=allowed, **extra_filter
+        ).update(**fields)
+    if n != len(ids):
+        # Kimdir parallel ravishda statusni o'zgartirgan — butun batch qaytariladi
+        raise ValidationError("Withdrawal holati parallel o'zgardi, qayta urinib ko'ring.")
+
+
+def _log_rows(eligible, *, admin_id: int, action: str, extra: dict):
+    AdminLog.objects.bulk_create(
+        [
+            AdminLog(
+                admin_id=admin_id,
+                action=action,
+                payload_json={"withdrawal_id": wid, "user_id": uid, "amount_sum": amt, **extra},
+            )
+            for wid, uid, amt in eligible
+        ],
+        batch_size=BULK_CHUNK,
+    )
+
+
+@dbtx.atomic
+def bulk_approve_withdrawals(*, ids, admin_id: int, note: str = "") -> dict:
+    """
+    PENDING → APPROVED (N ta so'rov bitta tranzaksiyada)
+    - Shartli UPDATE (status__in=PENDING, on_hold=False)
+    - AdminLog bulk_create
+    Natija: {withdrawal_id: "OK" | "SKIPPED" | "NOT_FOUND" | "HELD"}
+    """
+    allowed = ("PENDING",)
+    eligible, outcomes = _lock_eligible(ids, allowed, skip_held=True)
+    if not eligible:
+        return outcomes
+
+    _conditional_update(
+        eligible, allowed, status="APPROVED", admin_id=admin_id,
+        note_expr=_append_note(f"[approve] {note}") if note else None, on_hold=False,
+    )
+    _log_rows(eligible, admin_id=admin_id, action="WITHDRAW_APPROVE", extra={})
+    outcomes.update({r[0]: "OK" for r in eligible})
+    return outcomes
+
+
+@dbtx.atomic
+def bulk_reject_withdrawals(*, ids, admin_id: int, reason: str = "") -> dict:
+    """
+    PENDING/APPROVED → REJECTED (N ta so'rov bitta tranzaksiyada)
+    - Shartli UPDATE
+    - Balanslar user bo'yicha guruhlab, bitta UPDATE ... CASE bilan qaytariladi
+    - Transaction(ADJUSTMENT, +amount) va AdminLog bulk_create
+    Natija: {withdrawal_id: "OK" | "SKIPPED" | "NOT_FOUND"}
+    """
+    allowed = ("PENDING", "APPROVED")
+    eligible, outcomes = _lock_eligible(ids, allowed)
+    if not eligible:
+        return outcomes
+
+    _conditional_update(
+        eligible, allowed, status="REJECTED", admin_id=admin_id,
+        note_expr=_append_note(f"[reject] {reason}") if reason else None,
+    )
+
+    refunds = {}
+    for _, uid, amt in eligible:
+        refunds[uid] = refunds.get(uid, 0) + amt
+    uids = list(refunds)
+    for i in range(0, len(uids), BULK_CHUNK):
+        chunk = uids[i:i + BULK_CHUNK]
+        User.objects.filter(pk__in=chunk).update(
+            has_open_withdrawal=False,
+            balance_sum=F("balance_sum") + Case(
+                *[When(pk=uid, then=Value(refunds[uid])) for uid in chunk],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+        )
+
+    Transaction.objects.bulk_create(
+        [
+            Transaction(user_id=uid, type="ADJUSTMENT", amount_sum=amt, ref_id=wid)
+            for wid, uid, amt in eligible
+        ],
+        batch_size=BULK_CHUNK,
+    )
+    _log_rows(eligible, admin_id=admin_id, action="WITHDRAW_REJECT", extra={"reason": reason})
+    outcomes.update({r[0]: "OK" for r in eligible})
+    return outcomes
+
+
+@dbtx.atomic
+def bulk_mark_paid(*, ids, admin_id: int, proof_url: str = "", note: str = "") -> dict:
+    """
+    PENDING/APPROVED → PAID (N ta so'rov bitta tranzaksiyada)
+    - Shartli UPDATE (on_hold=False)
+    - AdminLog bulk_create (proof_url bo'lsa, saqlanadi)
+    Natija: {withdrawal_id: "OK" | "SKIPPED" | "NOT_FOUND" | "HELD"}
+    """
+    allowed = ("PENDING", "APPROVED")
+    eligible, outcomes = _lock_eligible(ids, allowed, skip_held=True)
+    if not eligible:
+        return outcomes
+
+    extra = []
+    if proof_url:
+        extra.append(f"[proof] {proof_url}")
+    if note:
+        extra.append(f"[note] {note}")
+    _conditional_update(
+        eligible, allowed, status="PAID", admin_id=admin_id,
+        note_expr=_append_note("\n".join(extra)) if extra else None, on_hold=False,
+    )
+    paid = {}
+    for _, uid, amt in eligible:
+        add_delta(paid, uid, "paid_out_sum", amt)
+    bump_users(paid, has_open_withdrawal=False)
+    _log_rows(eligible, admin_id=admin_id, action="WITHDRAW_PAID", extra={"proof_url": proof_url, "note": note})
+    outcomes.update({r[0]: "OK" for r in eligible})
+    return outcomes
+
+
+@dbtx.atomic
+def bulk_release_holds(*, ids, admin_id: int, note: str = "") -> dict:
+    """
+    Velocity hold ni olib tashlash (on_hold → False) — shundan keyin approve/PAID qilish mumkin.
+    Natija: {withdrawal_id: "OK" | "SKIPPED" | "NOT_FOUND"} (SKIPPED — hold yo'q yoki yopilgan)
+    """
+    # Qulflangan qatorlardan hold dagilari _lock_eligible da HELD bo'lib chiqadi — aynan ular release qilinadi
+    _, locked = _lock_eligible(ids, ("PENDING", "APPROVED"), skip_held=True)
+    held = [i for i, r in locked.items() if r == "HELD"]
+    outcomes = {i: ("NOT_FOUND" if r == "NOT_FOUND" else "SKIPPED") for i, r in locked.items()}
+    if not held:
+        return outcomes
+    eligible = list(Withdrawal.objects.filter(id__in=held).values_list("id", "user_id", "amount_sum"))
+    for i in range(0, len(held), BULK_CHUNK):
+        Withdrawal.objects.filter(id__in=held[i:i + BULK_CHUNK], on_hold=True).update(
+            on_hold=False, admin_id=admin_id, updated_at=timezone.now(),
+            admin_note=_append_note(f"[release] {note}".strip()),
+        )
+    _log_rows(eligible, admin_id=admin_id, action="WITHDRAW_RELEASE_HOLD", extra={"note": note})
+    outcomes.update({i: "OK" for i in held})
+    return outcomes
+
+
+# ======== DeductMoneyView hold'lari (HeldDeduction) ========
+def _resolve_held(ids, *, status: str, admin_id: int) -> tuple[list, dict]:
+    ids = list(dict.fromkeys(int(i) for i in ids))
+    rows = list(
+        HeldDeduction.objects.select_for_update()
+        .filter(id__in=ids)
+        .order_by("id")
+        .values_list("id", "user_id", "amount_sum", "status")
+    )
+    found = {r[0] for r in rows}
+    outcomes = {i: ("SKIPPED" if i in found else "NOT_FOUND") for i in ids}
+    eligible = [r[:3] for r in rows if r[3] == "HELD"]
+    if eligible:
+        n = HeldDeduction.objects.filter(id__in=[r[0] for r in eligible], status="HELD").update(
+            status=status, admin_id=admin_id, resolved_at=timezone.now()
+        )
+        if n != len(eligible):
+            raise ValidationError("Hold holati parallel o'zgardi, qayta urinib ko'ring.")
+        outcomes.update({r[0]: "OK" for r in eligible})
+    return eligible, outcomes
+
+
+@dbtx.atomic
+def release_held_deductions(*, ids, admin_id: int) -> dict:
+    """HELD → RELEASED: yechish tasdiqlandi (summa allaqachon yechilgan). Natija: {id: "OK" | "SKIPPED" | "NOT_FOUND"}"""
+    eligible, outcomes = _resolve_held(ids, status="RELEASED", admin_id=admin_id)
+    AdminLog.objects.bulk_create([
+        AdminLog(admin_id=admin_id, action="DEDUCT_HOLD_RELEASE",
+                 payload_json={"hold_id": hid, "user_id": uid, "amount_sum": amt})
+        for hid, uid, amt in eligible
+    ])
+    return outcomes
+
+
+@dbtx.atomic
+def refund_held_deductions(*, ids, admin_id: int) -> dict:
+    """
+    HELD → REFUNDED: rezerv balansga qaytariladi, Transaction(ADJUSTMENT, +amount, ref_id=hold id).
+    Natija: {id: "OK" | "SKIPPED" | "NOT_FOUND"}
+    """
+    eligible, outcomes = _resolve_held(ids, status="REFUNDED", admin_id=admin_id)
+    if eligible:
+        deltas = {}
+        for _, uid, amt in eligible:
+            add_delta(deltas, uid, "balance_sum", amt)
+        bump_users(deltas)
+        Transaction.objects.bulk_create(
+            [Transaction(user_id=uid, type="ADJUSTMENT", amount_sum=amt, ref_id=hid) for hid, uid, amt in eligible],
+            batch_size=BULK_CHUNK,
+        )
+        AdminLog.objects.bulk_create([
+            AdminLog(admin_id=admin_id, action="DEDUCT_HOLD_REFUND",
+                     payload_json={"hold_id": hid, "user_id": uid, "amount_sum": amt})
+            for hid, uid, amt in eligible
+        ])
+    return outcomes
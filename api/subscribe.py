@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.core.cache import cache
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 
 from .models import RequiredChannel,SubscriptionSnapshot
@@ -41,6 +42,18 @@ def compute_subscribe_status(user_id: int) -> dict:
     return {"fully_subscribed": True, "enforcement_mode": ENFORCEMENT_MODE, "required": required}
 
 
+def annotate_fully_subscribed(qs):
+    """
+    User qs ga `fully_subscribed` annotatsiyasi: barcha active required kanallar bo'yicha MEMBER
+    snapshot bor (compute_subscribe_status bilan bir xil qoida) — alohida so'rovsiz, EXISTS bilan.
+    """
+    member = SubscriptionSnapshot.objects.filter(
+        user_id=OuterRef(OuterRef("pk")), channel_id=OuterRef("pk"), status="MEMBER"
+    )
+    missing = RequiredChannel.objects.filter(is_active=True).filter(~Exists(member))
+    return qs.annotate(fully_subscribed=~Exists(missing))
+
+
 def upsert_snapshot(user_id: int, channel_id: int, is_member: bool, error: str | None = None):
     obj, _ = SubscriptionSnapshot.objects.get_or_create(user_id=user_id, channel_id=channel_id,
                                                         defaults={"status": "MEMBER" if is_member else "NOT_MEMBER"})
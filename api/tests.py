@@ -1,3 +1,737 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .models import (
+    HeldDeduction, OtpAttempt, Project, SeleniumJob, Transaction, User, UserPhone, Vote, Withdrawal,
+)
+
+
+class UserListQueryCountTests(TestCase):
+    """UserReadSerializer.phones — N+1 bo'lmasligi kerak."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(1, 31):
+            u = User.objects.create(user_id=i, full_name=f"User {i}")
+            UserPhone.objects.create(user=u, phone_e164=f"+9989000000{i:02d}", phone_snapshot=f"9989000000{i:02d}")
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_list_prefetches_phones(self):
+        # users + phones (prefetch)
+        with self.assertNumQueries(2):
+            r = self.client.get("/api/v1/users/?limit=30")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()["results"]), 30)
+        self.assertTrue(all(len(u["phones"]) == 1 for u in r.json()["results"]))
+
+    def test_sparse_fields_skip_phones(self):
+        with self.assertNumQueries(1):
+            r = self.client.get("/api/v1/users/?limit=30&fields=user_id,username")
+        self.assertEqual(set(r.json()["results"][0]), {"user_id", "username"})
+
+    def test_retrieve_prefetches_phones(self):
+        with self.assertNumQueries(2):
+            r = self.client.get("/api/v1/users/5/")
+        self.assertEqual(r.json()["phones"][0]["phone_e164"], "+998900000005")
+
+
+class ReturningBlockedUserTests(TestCase):
+    """Bloklagan user qaytsa sync uni qayta active qilishi kerak (profile_hash eskirmasin)."""
+
+    PROFILE = {"user_id": 77, "username": "ali", "full_name": "Ali", "language": "uz", "active": True}
+
+    def setUp(self):
+        self.client = APIClient()
+        r = self.client.post("/api/v1/users/bulk-upsert/", {"users": [self.PROFILE]}, format="json")
+        self.assertEqual(r.json()["created"], 1)
+
+    def _block(self):
+        from . import blocked
+
+        blocked.record(77, "Forbidden: bot was blocked by the user")
+        blocked.flush()
+        self.assertFalse(User.objects.get(pk=77).active)
+
+    def test_bulk_upsert_reactivates(self):
+        self._block()
+        r = self.client.post("/api/v1/users/bulk-upsert/", {"users": [self.PROFILE]}, format="json")
+        self.assertEqual(r.json()["updated"], 1)
+        self.assertTrue(User.objects.get(pk=77).active)
+
+    def test_bootstrap_reactivates(self):
+        self._block()
+        r = self.client.post("/api/v1/api/bot/bootstrap/", self.PROFILE, format="json")
+        self.assertTrue(r.json()["user"]["active"])
+        self.assertTrue(User.objects.get(pk=77).active)
+
+    def test_bootstrap_partial_post_keeps_profile(self):
+        User.objects.filter(pk=77).update(full_name="Ali Valiyev", language="ru")
+        r = self.client.post("/api/v1/api/bot/bootstrap/", {"user_id": 77}, format="json")
+        self.assertEqual(r.status_code, 200)
+        u = User.objects.get(pk=77)
+        self.assertEqual((u.username, u.full_name, u.language), ("ali", "Ali Valiyev", "ru"))
+        self.client.post("/api/v1/api/bot/bootstrap/", {"user_id": 77, "language": "uz"}, format="json")
+        u = User.objects.get(pk=77)
+        self.assertEqual((u.username, u.full_name, u.language), ("ali", "Ali Valiyev", "uz"))
+
+    def test_bootstrap_get_cold_cache_queries(self):
+        from django.core.cache import cache
+        from .models import RequiredChannel, SubscriptionSnapshot
+
+        ch = RequiredChannel.objects.create(title="C", chat_id=-1001)
+        RequiredChannel.objects.create(title="D", chat_id=-1002)
+        SubscriptionSnapshot.objects.create(user_id=77, channel=ch, status="MEMBER")
+        cache.clear()
+        with self.assertNumQueries(2):
+            r = self.client.get("/api/v1/api/bot/bootstrap/", {"user_id": 77})
+        body = r.json()
+        self.assertFalse(body["subscribe"]["fully_subscribed"])
+        self.assertEqual(len(body["required_channels"]), 2)
+        self.assertEqual(body["referral"]["referral_reward_sum"], 1000)
+        with self.assertNumQueries(1):
+            self.client.get("/api/v1/api/bot/bootstrap/", {"user_id": 77})
+        RequiredChannel.objects.filter(chat_id=-1002).update(is_active=False)
+        cache.clear()
+        r = self.client.get("/api/v1/api/bot/bootstrap/", {"user_id": 77})
+        self.assertTrue(r.json()["subscribe"]["fully_subscribed"])
+
+    def test_create_stores_profile_hash(self):
+        profile = {**self.PROFILE, "user_id": 78}
+        r = self.client.post("/api/v1/users/", profile, format="json")
+        self.assertEqual(r.status_code, 201)
+        self.assertIsNotNone(User.objects.get(pk=78).profile_hash)
+        r = self.client.post("/api/v1/users/bulk-upsert/", {"users": [profile]}, format="json")
+        self.assertEqual(r.json()["unchanged"], 1)
+
+    def test_block_action_then_sync(self):
+        self.client.patch("/api/v1/users/77/block/")
+        self.client.post("/api/v1/users/bulk-upsert/", {"users": [self.PROFILE]}, format="json")
+        self.assertTrue(User.objects.get(pk=77).active)
+
+
+@mock.patch("api.otp_guard._ensure_flusher")
+class OtpBufferTests(TestCase):
+    """otp_guard.flush: noma'lum vote butun batchni yiqitmasin, xato bo'lsa urinishlar yo'qolmasin."""
+
+    def setUp(self):
+        user = User.objects.create(user_id=1, full_name="U")
+        project = Project.objects.create(ob_project_id="p1", title="P", url="https://example.com")
+        self.vote = Vote.objects.create(user=user, project=project, phone_snapshot="998900000001")
+
+    def tearDown(self):
+        from . import otp_guard
+
+        otp_guard._buffer.clear()
+
+    def test_unknown_vote_dropped(self, _):
+        from . import otp_guard
+
+        otp_guard.record(self.vote.id, "1234", "WRONG")
+        otp_guard.record(999999, "1234", "WRONG")
+        with self.assertLogs("api.otp_guard", "WARNING"):
+            self.assertEqual(otp_guard.flush(), 1)
+        self.assertEqual(OtpAttempt.objects.get().vote_id, self.vote.id)
+
+    def test_failed_write_requeued(self, _):
+        from . import otp_guard
+
+        otp_guard.record(self.vote.id, "1234", "OK")
+        with mock.patch.object(OtpAttempt.objects, "bulk_create", side_effect=RuntimeError), \
+                self.assertLogs("api.otp_guard", "ERROR"):
+            self.assertEqual(otp_guard.flush(), 0)
+        self.assertEqual(len(otp_guard._buffer), 1)
+        self.assertEqual(otp_guard.flush(), 1)
+        self.assertEqual(OtpAttempt.objects.count(), 1)
+
+
+class BulkWithdrawalServiceTests(TestCase):
+    """services.bulk_*: natijalar (OK / SKIPPED / NOT_FOUND), balans qaytarish, has_open_withdrawal."""
+
+    def setUp(self):
+        from .services import create_withdrawal
+
+        self.w = []
+        for uid in (1, 2, 3):
+            u = User.objects.create(user_id=uid, full_name=f"U{uid}", balance_sum=50000)
+            self.w.append(create_withdrawal(user=u, method="CARD", destination_raw="8600123412341234", amount=30000))
+
+    def test_approve(self):
+        from .services import bulk_approve_withdrawals
+
+        Withdrawal.objects.filter(pk=self.w[2].pk).update(status="REJECTED")
+        out = bulk_approve_withdrawals(ids=[self.w[0].pk, self.w[1].pk, self.w[2].pk, 999], admin_id=1)
+        self.assertEqual(out, {self.w[0].pk: "OK", self.w[1].pk: "OK", self.w[2].pk: "SKIPPED", 999: "NOT_FOUND"})
+        self.assertEqual(Withdrawal.objects.filter(status="APPROVED").count(), 2)
+        self.assertTrue(User.objects.get(pk=1).has_open_withdrawal)
+
+    def test_reject_refunds(self):
+        from .services import bulk_reject_withdrawals
+
+        out = bulk_reject_withdrawals(ids=[self.w[0].pk, self.w[1].pk], admin_id=1, reason="test")
+        self.assertEqual(set(out.values()), {"OK"})
+        for uid in (1, 2):
+            u = User.objects.get(pk=uid)
+            self.assertEqual(u.balance_sum, 50000)
+            self.assertFalse(u.has_open_withdrawal)
+        self.assertEqual(User.objects.get(pk=3).balance_sum, 20000)
+        self.assertEqual(Transaction.objects.filter(type="ADJUSTMENT", amount_sum=30000).count(), 2)
+        self.assertIn("[reject] test", Withdrawal.objects.get(pk=self.w[0].pk).admin_note)
+        # Ikkinchi marta — SKIPPED, balans ikki marta qaytmaydi
+        self.assertEqual(bulk_reject_withdrawals(ids=[self.w[0].pk], admin_id=1), {self.w[0].pk: "SKIPPED"})
+        self.assertEqual(User.objects.get(pk=1).balance_sum, 50000)
+
+    def test_mark_paid(self):
+        from .services import bulk_mark_paid
+
+        Withdrawal.objects.filter(pk=self.w[1].pk).update(status="APPROVED")
+        out = bulk_mark_paid(ids=[self.w[0].pk, self.w[1].pk, 999], admin_id=1, note="paid")
+        self.assertEqual(out, {self.w[0].pk: "OK", self.w[1].pk: "OK", 999: "NOT_FOUND"})
+        u = User.objects.get(pk=1)
+        self.assertEqual((u.balance_sum, u.paid_out_sum, u.has_open_withdrawal), (20000, 30000, False))
+        self.assertTrue(User.objects.get(pk=3).has_open_withdrawal)
+        self.assertEqual(bulk_mark_paid(ids=[self.w[0].pk], admin_id=1), {self.w[0].pk: "SKIPPED"})
+
+
+class OpenWithdrawalFlagRepairTests(TestCase):
+    def test_repair(self):
+        from .counters import repair_open_withdrawal_flags
+
+        a = User.objects.create(user_id=1, full_name="A", has_open_withdrawal=True)
+        b = User.objects.create(user_id=2, full_name="B")
+        Withdrawal.objects.create(user=a, amount_sum=1, method="CARD", destination_masked="x", status="PAID")
+        Withdrawal.objects.create(user=b, amount_sum=1, method="CARD", destination_masked="x", status="PENDING")
+        self.assertEqual(repair_open_withdrawal_flags(), 2)
+        self.assertEqual(
+            dict(User.objects.values_list("user_id", "has_open_withdrawal")), {1: False, 2: True}
+        )
+        self.assertEqual(repair_open_withdrawal_flags(), 0)
+
+
+@mock.patch("api.rewards.LAG", timedelta(0))
+class RewardCreditTests(TestCase):
+    """rewards.credit_batch: status qulf ostida qayta o'qiladi, bitta vote ikki marta kreditlanmaydi."""
+
+    def setUp(self):
+        from . import rewards
+
+        self.user = User.objects.create(user_id=1, full_name="U")
+        project = Project.objects.create(ob_project_id="p1", title="P", url="u", reward_sum=1000)
+        self.votes = [
+            Vote.objects.create(user=self.user, project=project, phone_snapshot=f"99890000000{i}", status="SUCCESS")
+            for i in range(3)
+        ]
+        rewards.record_success([v.id for v in self.votes])
+
+    def test_credit_skips_failed_and_already_paid(self):
+        from . import rewards
+
+        Vote.objects.filter(pk=self.votes[1].pk).update(status="FAILED")
+        Transaction.objects.create(user=self.user, type="REWARD", amount_sum=1000, ref_id=self.votes[2].pk)
+        out = rewards.credit_batch()
+        self.assertEqual((out["credited"], out["sum"], out["seen"]), (1, 1000, 3))
+        self.assertEqual(User.objects.get(pk=1).balance_sum, 1000)
+        self.assertEqual(Transaction.objects.filter(type="REWARD").count(), 2)
+        self.assertEqual(rewards.credit_batch()["credited"], 0)
+
+    def test_add_money_repeated_reward_is_idempotent(self):
+        client = APIClient()
+        body = {"user_id": 1, "amount_sum": 1000, "type": "REWARD", "ref_id": self.votes[0].pk}
+        r1 = client.post("/api/v1/api/balance/add/", body, format="json")
+        r2 = client.post("/api/v1/api/balance/add/", body, format="json")
+        self.assertEqual((r1.status_code, r2.status_code), (201, 200))
+        self.assertTrue(r2.json()["already_credited"])
+        self.assertEqual(r2.json()["balance_sum"], 1000)
+        self.assertEqual(User.objects.get(pk=1).balance_sum, 1000)
+        self.assertEqual(Transaction.objects.filter(type="REWARD", ref_id=self.votes[0].pk).count(), 1)
+
+
+class BulkAttachPhonesTests(TestCase):
+    def setUp(self):
+        User.objects.create(user_id=1, full_name="U")
+
+    def test_statuses(self):
+        from .user_sync import bulk_attach_phones
+
+        UserPhone.objects.create(user_id=1, phone_e164="+998901111111", phone_snapshot="998901111111")
+        out = bulk_attach_phones([
+            {"user_id": 1, "phone_e164": "90 222 22 22"},
+            {"user_id": 1, "phone_e164": "+998902222222"},
+            {"user_id": 1, "phone_e164": "901111111"},
+            {"user_id": 2, "phone_e164": "901111111"},
+            {"user_id": 1, "phone_e164": "12"},
+        ])
+        self.assertEqual([r["status"] for r in out], ["CREATED", "DUPLICATE", "EXISTS", "NO_USER", "INVALID"])
+
+    def test_concurrent_insert_reported_as_exists(self):
+        from .user_sync import bulk_attach_phones
+
+        real = UserPhone.objects.bulk_create
+
+        def racing(objs, **kw):
+            # boshqa so'rov SELECT dan keyin, bulk_create dan oldin shu raqamni qo'shdi
+            UserPhone.objects.create(user_id=1, phone_e164="+998903333333", phone_snapshot="998903333333")
+            return real(objs, **kw)
+
+        with mock.patch.object(UserPhone.objects, "bulk_create", side_effect=racing):
+            out = bulk_attach_phones([
+                {"user_id": 1, "phone_e164": "+998903333333"},
+                {"user_id": 1, "phone_e164": "+998904444444"},
+            ])
+        self.assertEqual([r["status"] for r in out], ["EXISTS", "CREATED"])
+        self.assertEqual(UserPhone.objects.filter(user_id=1).count(), 2)
+
+
+class InactiveProjectJobsTests(TestCase):
+    """Nofaol loyihaning QUEUED joblari navbatda qolib ketmasligi kerak."""
+
+    def setUp(self):
+        user = User.objects.create(user_id=1, full_name="U")
+        self.project = Project.objects.create(ob_project_id="p1", title="P", url="u", is_active=True, target_votes=1)
+        other = Project.objects.create(ob_project_id="p2", title="Q", url="u", is_active=True)
+        self.vote = Vote.objects.create(user=user, project=self.project, phone_snapshot="998900000001")
+        queued = Vote.objects.create(user=user, project=self.project, phone_snapshot="998900000002")
+        self.job = SeleniumJob.objects.create(vote=queued)
+        self.other_job = SeleniumJob.objects.create(
+            vote=Vote.objects.create(user=user, project=other, phone_snapshot="998900000003")
+        )
+
+    def test_auto_close_fails_queued_jobs(self):
+        from .counters import votes_changed
+
+        self.assertEqual(votes_changed([(1, self.project.pk, "PENDING", "SUCCESS")]), [self.project.pk])
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.error), ("FAILED", "project inactive"))
+        self.assertEqual(SeleniumJob.objects.get(pk=self.other_job.pk).status, "QUEUED")
+
+    def test_tick_fails_jobs_of_deactivated_project(self):
+        from .jobqueue import fail_inactive
+
+        Project.objects.filter(pk=self.project.pk).update(is_active=False)
+        self.assertEqual(fail_inactive(), 1)
+        self.assertEqual(SeleniumJob.objects.get(pk=self.job.pk).status, "FAILED")
+        self.assertEqual(fail_inactive(), 0)
+
+
+class UserSearchTests(TestCase):
+    """api/search.py — FTS triggerlari migratsiyalardan keyin ham ishlashi kerak (yangi/o'zgargan userlar)."""
+
+    def setUp(self):
+        self.client = APIClient()
+        User.objects.create(user_id=1, username="davron", full_name="Davron Ali", language="uz")
+        User.objects.create(user_id=2, full_name="Ali Valiyev", language="ru")
+        User.objects.create(user_id=3, full_name="Aliya", language="ru", active=False)
+
+    def _search(self, term, **params):
+        r = self.client.get("/api/v1/users/", {"search": term, "fields": "user_id", **params})
+        return [u["user_id"] for u in r.json()["results"]]
+
+    def test_text_search_finds_new_users(self):
+        self.assertEqual(self._search("dav"), [1])
+        self.assertEqual(self._search("davron ali"), [1])
+        self.assertEqual(sorted(self._search("ali")), [1, 2, 3])
+
+    def test_rename_is_searchable(self):
+        u = User.objects.get(pk=2)
+        u.full_name = "Sardor Karimov"
+        u.save()
+        self.assertEqual(self._search("sardor"), [2])
+        self.assertEqual(self._search("valiyev"), [])
+
+    def test_filters_applied_before_top_n(self):
+        # Filtrsiz FTS top-200 ni qisqa nomli (yuqori relevance) uz userlar egallaydi
+        User.objects.bulk_create(
+            [User(user_id=i, full_name="Ali", search_text="ali", language="uz") for i in range(100, 350)]
+        )
+        self.assertEqual(sorted(self._search("ali", language="ru")), [2, 3])
+        self.assertEqual(self._search("ali", language="ru", active="true"), [2])
+
+    def test_exact_lookups(self):
+        self.assertEqual(self._search("@davron"), [1])
+        self.assertEqual(self._search("2"), [2])
+
+    def test_admin_search(self):
+        from django.contrib import admin as dj_admin
+
+        model_admin = dj_admin.site._registry[User]
+        qs, _ = model_admin.get_search_results(None, User.objects.filter(language="ru"), "ali")
+        self.assertEqual(sorted(qs.values_list("user_id", flat=True)), [2, 3])
+
+
+class SearchIndexGuardTests(TestCase):
+    def test_dropped_triggers_restored(self):
+        from django.db import connection
+
+        from .search import ensure_sqlite_fts, search_users
+
+        self.assertFalse(ensure_sqlite_fts())
+        with connection.cursor() as cur:
+            cur.execute("DROP TRIGGER users_fts_ai")  # users jadvali qayta qurilgandagi holat
+        User.objects.create(user_id=1, full_name="Davron Ali")
+        self.assertTrue(ensure_sqlite_fts())
+        self.assertEqual(list(search_users(User.objects.all(), "davron").values_list("pk", flat=True)), [1])
+
+
+class VelocityHoldTests(TestCase):
+    """Velocity hold — haqiqiy: hold dagi summa admin release qilmaguncha to'lanmaydi."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create(user_id=1, full_name="U", balance_sum=50000)
+
+    @mock.patch("api.velocity.check", return_value=["user:hour:count"])
+    def test_held_withdrawal_skipped_until_released(self, _):
+        from .services import bulk_approve_withdrawals, bulk_mark_paid, bulk_release_holds, create_withdrawal
+
+        w = create_withdrawal(user=self.user, method="CARD", destination_raw="8600123412341234", amount=30000)
+        self.assertTrue(w.on_hold)
+        self.assertEqual(bulk_approve_withdrawals(ids=[w.pk], admin_id=1), {w.pk: "HELD"})
+        self.assertEqual(bulk_mark_paid(ids=[w.pk], admin_id=1), {w.pk: "HELD"})
+        self.assertEqual(Withdrawal.objects.get(pk=w.pk).status, "PENDING")
+
+        self.assertEqual(bulk_release_holds(ids=[w.pk, 999], admin_id=1), {w.pk: "OK", 999: "NOT_FOUND"})
+        self.assertEqual(bulk_release_holds(ids=[w.pk], admin_id=1), {w.pk: "SKIPPED"})
+        self.assertEqual(bulk_approve_withdrawals(ids=[w.pk], admin_id=1), {w.pk: "OK"})
+
+    @mock.patch("api.velocity.check", return_value=["user:hour:count"])
+    def test_deduct_over_limit_is_held(self, _):
+        from .services import refund_held_deductions, release_held_deductions
+
+        body = {"user_id": 1, "amount_sum": 20000, "type": "WITHDRAWAL", "ref_id": 7}
+        r = self.client.post("/api/v1/api/balance/deduct/", body, format="json")
+        self.assertEqual(r.status_code, 202)
+        hold = HeldDeduction.objects.get(pk=r.json()["hold_id"])
+        self.assertEqual((hold.status, hold.amount_sum, hold.ref_id), ("HELD", 20000, 7))
+        self.assertEqual(User.objects.get(pk=1).balance_sum, 30000)  # rezerv
+
+        self.assertEqual(refund_held_deductions(ids=[hold.pk], admin_id=1), {hold.pk: "OK"})
+        self.assertEqual(User.objects.get(pk=1).balance_sum, 50000)
+        self.assertEqual(release_held_deductions(ids=[hold.pk], admin_id=1), {hold.pk: "SKIPPED"})
+        self.assertEqual(refund_held_deductions(ids=[hold.pk], admin_id=1), {hold.pk: "SKIPPED"})
+        self.assertEqual(User.objects.get(pk=1).balance_sum, 50000)
+
+    def test_deduct_within_limit(self):
+        body = {"user_id": 1, "amount_sum": 20000, "type": "WITHDRAWAL"}
+        r = self.client.post("/api/v1/api/balance/deduct/", body, format="json")
+        self.assertEqual(r.status_code, 201)
+        self.assertFalse(HeldDeduction.objects.exists())
+
+
+class BroadcastCheckpointTests(TestCase):
+    """broadcast._checkpoint: bo'lak paytida pauza — cursor/hisoblagichlar yo'qolmaydi, qayta yuborilmaydi."""
+
+    def setUp(self):
+        from .models import Broadcast
+
+        for uid in (1, 2, 3, 4):
+            User.objects.create(user_id=uid, full_name=f"U{uid}")
+        self.b = Broadcast.objects.create(title="T", text="hi", status="RUNNING")
+
+    def test_pause_mid_batch_keeps_progress(self):
+        from . import broadcast
+        from .models import Broadcast
+        from .tg_notify import SendResult
+
+        sent_to = []
+
+        def send(uid, text):
+            sent_to.append(uid)
+            if uid == 1:
+                Broadcast.objects.filter(pk=self.b.pk).update(status="PAUSED")
+            return SendResult(True, 200, None, None)
+
+        class InlinePool:  # thread o'rniga — test DB ulanishi bitta
+            def __init__(self, **kw):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def map(self, fn, items):
+                return map(fn, items)
+
+        with mock.patch("api.broadcast.send_message", side_effect=send), \
+                mock.patch("api.broadcast.ThreadPoolExecutor", InlinePool):
+            b = broadcast.run_broadcast(self.b, batch_size=2, threads=1)
+            self.assertEqual((b.status, b.cursor_user_id, b.sent), ("PAUSED", 2, 2))
+
+            Broadcast.objects.filter(pk=b.pk).update(status="RUNNING")
+            b = broadcast.run_broadcast(b, batch_size=2, threads=1)
+        self.assertEqual((b.status, b.cursor_user_id, b.sent), ("DONE", 4, 4))
+        self.assertEqual(sent_to, [1, 2, 3, 4])
+
+
+class PayoutExportLocationTests(TestCase):
+    """payouts: eksport MEDIA_ROOT dan tashqarida, faqat admin download view orqali."""
+
+    def setUp(self):
+        import tempfile
+
+        from django.test import override_settings
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = tmp.name
+        ctx = override_settings(PAYOUTS_ROOT=self.root)
+        ctx.enable()
+        self.addCleanup(ctx.disable)
+        u = User.objects.create(user_id=1, full_name="U", balance_sum=0)
+        Withdrawal.objects.create(user=u, amount_sum=30000, method="CARD", destination_masked="8600****1234",
+                                  status="APPROVED")
+
+    def test_export_served_only_to_admin(self):
+        from django.contrib.auth import get_user_model
+        from .payouts import create_payout_export
+
+        job = create_payout_export(admin_id=1)
+        self.assertEqual(job.status, "DONE")
+        self.assertTrue(job.file_path.startswith(self.root))
+        self.assertEqual(job.params["files"], {"CARD": "CARD.csv"})
+
+        url = f"/admin/api/exportjob/{job.pk}/download/"
+        self.assertEqual(self.client.get(url).status_code, 302)  # login sahifasi
+        admin = get_user_model().objects.create_superuser("root", "root@example.com", "pw")
+        self.client.force_login(admin)
+        r = self.client.get(url)
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r["Content-Disposition"].startswith("attachment"))
+        r.close()
+
+
+class NodeSecretTests(TestCase):
+    """Node API: secret faqat muhitdan (settings.SELENIUM_NODE_SECRET); sozlanmagan bo'lsa — yopiq."""
+
+    URL = "/api/v1/api/nodes/jobs/claim/"
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_refused_when_secret_unset(self):
+        from django.test import override_settings
+
+        with override_settings(SELENIUM_NODE_SECRET=None):
+            r = self.client.post(self.URL, {"node": "n1"}, format="json",
+                                 HTTP_X_NODE_SECRET="super-strong-random-secret-key")
+        self.assertEqual(r.status_code, 403)
+
+    def test_secret_from_settings(self):
+        from django.test import override_settings
+
+        with override_settings(SELENIUM_NODE_SECRET="s3cret"):
+            bad = self.client.post(self.URL, {"node": "n1"}, format="json", HTTP_X_NODE_SECRET="nope")
+            self.client.post("/api/v1/api/nodes/register/", {"node": "n1", "max_concurrency": 2}, format="json",
+                             HTTP_X_NODE_SECRET="s3cret")
+            ok = self.client.post(self.URL, {"node": "n1"}, format="json", HTTP_X_NODE_SECRET="s3cret")
+        self.assertEqual((bad.status_code, ok.status_code), (403, 200))
+        self.assertEqual(ok.json()["jobs"], [])
+
+
+class VoteLifecycleTests(TestCase):
+    """vote_lifecycle: o'tish qoidalari, versiya CONFLICT, hisoblagich/reward outbox, bulk API."""
+
+    def setUp(self):
+        self.user = User.objects.create(user_id=1, full_name="U")
+        self.project = Project.objects.create(ob_project_id="p1", title="P", url="u")
+        self.votes = [
+            Vote.objects.create(user=self.user, project=self.project, phone_snapshot=f"99890000000{i}")
+            for i in range(3)
+        ]
+
+    def test_chain_in_one_update_with_side_effects(self):
+        from . import vote_lifecycle
+        from .models import VoteSuccessLog
+
+        v = self.votes[0]
+        out = vote_lifecycle.apply_transitions([
+            {"id": v.pk, "to": "OTP_REQUIRED", "version": 0},
+            {"id": v.pk, "to": "PROCESSING"},
+            {"id": v.pk, "to": "SUCCESS", "fields": {"ob_vote_id": "ob-1", "bogus": "x"}},
+        ])
+        self.assertEqual(out, ["OK", "OK", "OK"])
+        v.refresh_from_db()
+        self.assertEqual((v.status, v.version, v.ob_vote_id), ("SUCCESS", 1, "ob-1"))
+        self.assertEqual(User.objects.get(pk=1).success_votes, 1)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).votes_success, 1)
+        self.assertTrue(VoteSuccessLog.objects.filter(vote_id=v.pk).exists())
+
+    def test_target_reached_closes_project(self):
+        from . import vote_lifecycle
+
+        Project.objects.filter(pk=self.project.pk).update(is_active=True, target_votes=1)
+        SeleniumJob.objects.create(vote=self.votes[1])
+        v = self.votes[0]
+        for to in ("OTP_REQUIRED", "PROCESSING", "SUCCESS"):
+            self.assertEqual(vote_lifecycle.transition(v.pk, to), "OK")
+        p = Project.objects.get(pk=self.project.pk)
+        self.assertFalse(p.is_active)
+        self.assertIsNotNone(p.auto_closed_at)
+        self.assertEqual(SeleniumJob.objects.get(vote=self.votes[1]).status, "FAILED")
+
+    def test_illegal_and_admin_override(self):
+        from . import vote_lifecycle
+
+        v = self.votes[0]
+        self.assertEqual(vote_lifecycle.transition(v.pk, "SUCCESS"), "ILLEGAL")  # PENDING → SUCCESS
+        self.assertEqual(vote_lifecycle.transition(v.pk, "FAILED"), "OK")
+        self.assertEqual(vote_lifecycle.transition(v.pk, "SUCCESS"), "ILLEGAL")  # node yakuniyni o'zgartirmaydi
+        self.assertEqual(vote_lifecycle.transition(v.pk, "SUCCESS", actor="admin"), "OK")
+        self.assertEqual(User.objects.get(pk=1).success_votes, 1)
+        self.assertEqual(vote_lifecycle.transition(v.pk, "FAILED", actor="admin"), "OK")
+        self.assertEqual(User.objects.get(pk=1).success_votes, 0)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).votes_success, 0)
+        self.assertEqual(vote_lifecycle.transition(999999, "FAILED"), "NOT_FOUND")
+
+    def test_version_conflict(self):
+        from . import vote_lifecycle
+
+        v = self.votes[0]
+        self.assertEqual(vote_lifecycle.transition(v.pk, "OTP_REQUIRED", version=0), "OK")
+        self.assertEqual(vote_lifecycle.transition(v.pk, "PROCESSING", version=0), "CONFLICT")
+        # O'qish va yozish orasida boshqa yozuvchi ulgurgan — shartli UPDATE qatorni o'tkazib yuboradi
+        Vote.objects.filter(pk=v.pk).update(version=5)
+        self.assertEqual(vote_lifecycle._write([(v.pk, {"status": "FAILED", "version": 1, "fields": {}})]), set())
+        v.refresh_from_db()
+        self.assertEqual((v.status, v.version), ("OTP_REQUIRED", 5))
+
+    def test_bulk_transition_api(self):
+        from django.test import override_settings
+
+        a, b, c = self.votes
+        Vote.objects.filter(pk=b.pk).update(version=3)
+        body = {"node": "n1", "to": "FAILED", "error_message": "captcha",
+                "items": [{"id": a.pk, "version": 0}, {"id": b.pk, "version": 0}, {"id": c.pk}, {"id": 999999}]}
+        with override_settings(SELENIUM_NODE_SECRET="s3cret"):
+            r = APIClient().post("/api/v1/api/nodes/votes/transition/", body, format="json",
+                                 HTTP_X_NODE_SECRET="s3cret")
+        self.assertEqual(r.json()["results"], {
+            str(a.pk): "OK", str(b.pk): "CONFLICT", str(c.pk): "OK", "999999": "NOT_FOUND",
+        })
+        self.assertEqual(Vote.objects.get(pk=a.pk).error_message, "captcha")
+        self.assertEqual(Vote.objects.get(pk=b.pk).status, "PENDING")
+
+
+class JobQueueTests(TestCase):
+    """jobqueue: claim / heartbeat / complete / requeue_expired."""
+
+    def setUp(self):
+        user = User.objects.create(user_id=1, full_name="U")
+        project = Project.objects.create(ob_project_id="p1", title="P", url="u")
+        self.jobs = [
+            SeleniumJob.objects.create(
+                vote=Vote.objects.create(user=user, project=project, phone_snapshot=f"99890000000{i}")
+            )
+            for i in range(3)
+        ]
+
+    def test_claim_is_exclusive(self):
+        from . import jobqueue
+
+        t1, got1 = jobqueue.claim("n1", 2)
+        t2, got2 = jobqueue.claim("n2", 5)
+        self.assertEqual([j.pk for j in got1], [self.jobs[0].pk, self.jobs[1].pk])
+        self.assertEqual([j.pk for j in got2], [self.jobs[2].pk])
+        self.assertEqual(jobqueue.claim("n3", 1)[1], [])
+        j = SeleniumJob.objects.get(pk=self.jobs[0].pk)
+        self.assertEqual((j.status, j.node, j.lease_token, j.attempts), ("RUNNING", "n1", t1, 1))
+        self.assertEqual(jobqueue.heartbeat("n1", t1), 2)
+        self.assertEqual(jobqueue.heartbeat("n1", t2), 0)
+
+    def test_complete_only_by_lease_owner(self):
+        from . import jobqueue
+
+        token, jobs = jobqueue.claim("n1", 2)
+        a, b = (j.pk for j in jobs)
+        out = jobqueue.complete("n2", token, [{"id": a, "status": "DONE"}])
+        self.assertEqual(out, {a: "STALE"})
+        out = jobqueue.complete("n1", token, [
+            {"id": a, "status": "DONE", "timings": {"total": 1.5}},
+            {"id": b, "status": "FAILED", "error": "x" * 300},
+        ])
+        self.assertEqual(out, {a: "OK", b: "OK"})
+        self.assertEqual(jobqueue.complete("n1", token, [{"id": a, "status": "DONE"}]), {a: "STALE"})
+        a, b = SeleniumJob.objects.get(pk=a), SeleniumJob.objects.get(pk=b)
+        self.assertEqual((a.status, a.timings, a.lease_token), ("DONE", {"total": 1.5}, None))
+        self.assertEqual((b.status, len(b.error)), ("FAILED", 255))
+
+    def test_requeue_expired(self):
+        from django.utils import timezone
+        from . import jobqueue
+
+        token, jobs = jobqueue.claim("n1", 2)
+        SeleniumJob.objects.filter(pk=jobs[1].pk).update(attempts=jobqueue.MAX_ATTEMPTS)
+        SeleniumJob.objects.filter(lease_token=token).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobqueue.requeue_expired(), {"requeued": 1, "failed": 1})
+        a, b = SeleniumJob.objects.get(pk=jobs[0].pk), SeleniumJob.objects.get(pk=jobs[1].pk)
+        self.assertEqual((a.status, a.node, a.lease_token), ("QUEUED", None, None))
+        self.assertEqual(b.status, "FAILED")
+        self.assertEqual(jobqueue.complete("n1", token, [{"id": a.pk, "status": "DONE"}]), {a.pk: "STALE"})
+
+
+class ProjectProgressTests(TestCase):
+    """ProjectProgressView: hisoblagichlar Project qatoridan, bitta so'rov."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.p1 = Project.objects.create(ob_project_id="p1", title="A", url="u", is_active=True, target_votes=3,
+                                         votes_total=5, votes_success=2)
+        self.p2 = Project.objects.create(ob_project_id="p2", title="B", url="u", is_active=True)
+        self.closed = Project.objects.create(ob_project_id="p3", title="C", url="u", target_votes=2,
+                                             votes_success=2)
+
+    def test_list_active(self):
+        with self.assertNumQueries(1):
+            r = self.client.get("/api/v1/api/projects/progress/")
+        rows = {p["id"]: p for p in r.json()["results"]}
+        self.assertEqual(set(rows), {self.p1.pk, self.p2.pk})
+        self.assertEqual((rows[self.p1.pk]["remaining"], rows[self.p1.pk]["percent"]), (1, 66.7))
+        self.assertEqual((rows[self.p2.pk]["remaining"], rows[self.p2.pk]["percent"]), (None, None))
+
+    def test_detail_includes_closed(self):
+        r = self.client.get(f"/api/v1/api/projects/{self.closed.pk}/progress/")
+        self.assertEqual((r.json()["is_active"], r.json()["remaining"], r.json()["percent"]), (False, 0, 100.0))
+        self.assertEqual(self.client.get("/api/v1/api/projects/999999/progress/").status_code, 404)
+
+
+class VoteDedupTests(TestCase):
+    """vote_dedup.precheck: xotiradagi to'plam, DB tasdig'i, refresh."""
+
+    def setUp(self):
+        from . import vote_dedup
+
+        vote_dedup.reset()
+        self.addCleanup(vote_dedup.reset)
+        self.user = User.objects.create(user_id=1, full_name="U")
+        self.project = Project.objects.create(ob_project_id="p1", title="P", url="u")
+        self.vote = Vote.objects.create(user=self.user, project=self.project, phone_snapshot="998901111111")
+
+    def test_precheck(self):
+        from . import vote_dedup
+
+        out = vote_dedup.precheck(self.project.pk, ["+998 90 111 11 11", "902222222", "abc"])
+        self.assertEqual(out, {"+998 90 111 11 11": "USED", "902222222": "FREE", "abc": "INVALID"})
+        with self.assertNumQueries(0):  # xotirada yo'q — DB ga bormaydi
+            self.assertEqual(vote_dedup.precheck(self.project.pk, ["902222222"]), {"902222222": "FREE"})
+
+    def test_deleted_vote_is_forgotten(self):
+        from . import vote_dedup
+
+        vote_dedup.precheck(self.project.pk, ["901111111"])
+        self.vote.delete()
+        self.assertEqual(vote_dedup.precheck(self.project.pk, ["901111111"]), {"901111111": "FREE"})
+        with self.assertNumQueries(0):
+            vote_dedup.precheck(self.project.pk, ["901111111"])
+
+    def test_refresh_sees_new_votes(self):
+        from . import vote_dedup
 
-# Create your tests here.
+        vote_dedup.precheck(self.project.pk, ["903333333"])
+        Vote.objects.create(user=self.user, project=self.project, phone_snapshot="998903333333")
+        with mock.patch.object(vote_dedup, "REFRESH", 0):
+            self.assertEqual(vote_dedup.precheck(self.project.pk, ["903333333"]), {"903333333": "USED"})
@@ -1,30 +1,62 @@
+from collections import namedtuple
+
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from .models import Channel
+from . import blocked
 
 BOT_TOKEN = getattr(settings, "TELEGRAM_BOT_TOKEN", None)
 BOT_API = f"https://api.telegram.org/bot{BOT_TOKEN}" if BOT_TOKEN else None
 
+# Ulanishlar qayta ishlatiladi (broadcast workerlari ko'p thread bilan yuboradi)
+POOL_SIZE = getattr(settings, "TELEGRAM_POOL_SIZE", 16)
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
 
-def _send(chat_id: int, text: str):
+# ok: yetkazildi; code: Telegram error_code (0 — tarmoq/konfiguratsiya xatosi)
+SendResult = namedtuple("SendResult", "ok code description retry_after")
+
+
+def send_message(chat_id: int, text: str, *, timeout: float = 5) -> SendResult:
+    """sendMessage natijasini qaytaradi (xatoni yutmaydi)."""
     if not BOT_API or not chat_id:
-        return
+        return SendResult(False, 0, "bot not configured", None)
     try:
-        requests.post(
+        r = _session.post(
             f"{BOT_API}/sendMessage",
             json={"chat_id": chat_id, "text": text, "parse_mode": "HTML"},
-            timeout=5,
+            timeout=timeout,
         )
-    except Exception:
-        pass
+        data = r.json()
+    except Exception as e:
+        return SendResult(False, 0, str(e)[:128], None)
+    if data.get("ok"):
+        return SendResult(True, 200, None, None)
+    params = data.get("parameters") or {}
+    return SendResult(False, data.get("error_code") or r.status_code, (data.get("description") or "")[:128],
+                      params.get("retry_after"))
+
+
+def _send(chat_id: int, text: str):
+    if not BOT_API or not chat_id:
+        return
+    res = send_message(chat_id, text)
+    if not res.ok and blocked.is_blocked_error(res.code, res.description):
+        blocked.record(chat_id, res.description)
 
 
 def notify_user(user_id: int, text: str):
     _send(user_id, text)
 
 
-def notify_payout_channel(text: str):
-    ch = Channel.objects.filter(type="PAYOUTS", is_active=True).order_by("-id").first()
-    if ch:
-        _send(ch.chat_id, text)
+def payout_channel_id() -> int | None:
+    return Channel.objects.filter(type="PAYOUTS", is_active=True).order_by("-id").values_list(
+        "chat_id", flat=True
+    ).first()
+
 
+def notify_payout_channel(text: str):
+    chat_id = payout_channel_id()
+    if chat_id:
+        _send(chat_id, text)
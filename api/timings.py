@@ -0,0 +1,149 @@
+"""
+SeleniumJob.timings sxemasi va soatlik percentile rollup.
+
+timings (ms, butun son):
+    page_load_ms, phone_submit_ms, otp_wait_ms, confirm_ms, screenshot_ms, total_ms
+total_ms yuborilmasa — fazalar yig'indisi. Noma'lum kalitlar tashlab yuboriladi.
+
+Rollup: har (soat, node, faza) uchun count/p50/p95/p99/max — JobTimingRollup jadvalida.
+node="*" — barcha nodelar birgalikda. Qayta ishlatish xavfsiz (upsert), shuning uchun
+cron oxirgi bir necha soatni har safar qayta hisoblaydi.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import JobTimingRollup, SeleniumJob
+
+PHASES = ("page_load_ms", "phone_submit_ms", "otp_wait_ms", "confirm_ms", "screenshot_ms")
+TOTAL = "total_ms"
+ALL_NODES = "*"
+MAX_MS = 30 * 60 * 1000
+
+
+def normalize(raw) -> dict | None:
+    """Node yuborgan timings → sxemaga mos dict. Xato bo'lsa ValueError."""
+    if raw is None:
+        return None
+    if not isinstance(raw, dict):
+        raise ValueError("timings obyekt bo'lishi kerak")
+    out = {}
+    for key in (*PHASES, TOTAL):
+        v = raw.get(key)
+        if v is None:
+            continue
+        if isinstance(v, bool) or not isinstance(v, (int, float)) or not 0 <= v <= MAX_MS:
+            raise ValueError(f"{key}: 0..{MAX_MS} oralig'idagi ms bo'lishi kerak")
+        out[key] = int(v)
+    if TOTAL not in out and any(p in out for p in PHASES):
+        out[TOTAL] = sum(out.get(p, 0) for p in PHASES)
+    return out or None
+
+
+def ingest(node: str, items) -> dict:
+    """
+    Node o'z joblari uchun timings yuboradi (complete dan keyin ham mumkin).
+    items: [{"id", "timings"}] — Natija: {job_id: "OK" | "NOT_FOUND"} (boshqa node jobi ham NOT_FOUND)
+    """
+    by_id = {it["id"]: it["timings"] for it in items}
+    jobs = list(SeleniumJob.objects.filter(id__in=list(by_id), node=node).only("id", "timings"))
+    for job in jobs:
+        job.timings = by_id[job.id]
+    SeleniumJob.objects.bulk_update(jobs, ["timings"], batch_size=500)
+    found = {j.id for j in jobs}
+    return {jid: "OK" if jid in found else "NOT_FOUND" for jid in by_id}
+
+
+def percentile(sorted_vals: list[int], q: float) -> int:
+    """Nearest-rank percentile; sorted_vals bo'sh bo'lmasligi kerak."""
+    k = math.ceil(q / 100 * len(sorted_vals))
+    return sorted_vals[max(0, min(len(sorted_vals), k) - 1)]
+
+
+def _hour(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+def rollup(since, until=None) -> int:
+    """[since, until) oralig'ida tugagan joblar bo'yicha soatlik rollup. Natija: yozilgan qatorlar."""
+    until = until or timezone.now()
+    since = _hour(since)
+    buckets = defaultdict(list)  # (hour, node, phase) -> [ms]
+    rows = (
+        SeleniumJob.objects.filter(finished_at__gte=since, finished_at__lt=until, timings__isnull=False)
+        .values_list("finished_at", "node", "timings")
+        .iterator(chunk_size=2000)
+    )
+    for finished, node, t in rows:
+        if not isinstance(t, dict):
+            continue
+        h = _hour(finished)
+        for phase in (*PHASES, TOTAL):
+            v = t.get(phase)
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                buckets[(h, node or "-", phase)].append(int(v))
+                buckets[(h, ALL_NODES, phase)].append(int(v))
+
+    objs = []
+    for (h, node, phase), vals in buckets.items():
+        vals.sort()
+        objs.append(JobTimingRollup(
+            hour=h, node=node, phase=phase, count=len(vals),
+            p50=percentile(vals, 50), p95=percentile(vals, 95), p99=percentile(vals, 99), max=vals[-1],
+        ))
+    if objs:
+        JobTimingRollup.objects.bulk_create(
+            objs,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["hour", "node", "phase"],
+            update_fields=["count", "p50", "p95", "p99", "max"],
+        )
+    return len(objs)
+
+
+def rollup_recent(hours: int = 3) -> int:
+    now = timezone.now()
+    return rollup(now - timedelta(hours=hours), now)
+
+
+def chart_series(hours: int = 24, node: str = ALL_NODES, metric: str = "p95"):
+    """Admin grafigi uchun: (labels, {phase: [ms|None, ...]})"""
+    end = _hour(timezone.now())
+    start = end - timedelta(hours=hours - 1)
+    slots = [start + timedelta(hours=i) for i in range(hours)]
+    data = {p: [None] * hours for p in PHASES}
+    rows = JobTimingRollup.objects.filter(hour__gte=start, node=node, phase__in=PHASES).values_list(
+        "hour", "phase", metric
+    )
+    index = {s: i for i, s in enumerate(slots)}
+    for h, phase, v in rows:
+        i = index.get(h)
+        if i is not None:
+            data[phase][i] = v
+    labels = [timezone.localtime(s).strftime("%d %H:00") for s in slots]
+    return labels, data
+
+
+def phase_summary(hours: int = 24):
+    """
+    Oxirgi N soat: faza × node bo'yicha count va count bilan tortilgan o'rtacha p50/p95/p99
+    (soatlik percentilelardan taxminiy — aniq qiymat uchun soatlik qatorlarga qarang).
+    """
+    start = _hour(timezone.now()) - timedelta(hours=hours - 1)
+    acc = defaultdict(lambda: [0, 0, 0, 0])
+    for node, phase, c, p50, p95, p99 in JobTimingRollup.objects.filter(hour__gte=start).values_list(
+        "node", "phase", "count", "p50", "p95", "p99"
+    ):
+        a = acc[(node, phase)]
+        a[0] += c
+        a[1] += p50 * c
+        a[2] += p95 * c
+        a[3] += p99 * c
+    out = []
+    for (node, phase), (c, s50, s95, s99) in sorted(acc.items()):
+        out.append({"node": node, "phase": phase, "count": c,
+                    "p50": s50 // c, "p95": s95 // c, "p99": s99 // c})
+    return out
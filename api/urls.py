@@ -1,7 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import UserViewSet, required_channels, subscribe_status, snapshot_update, BalanceView, AddMoneyView, \
-    DeductMoneyView, ReferralConfigView, ReferralGrantView, ReferralStatsView, WithdrawalViewSet, withdrawals_updates
+    DeductMoneyView, ReferralConfigView, ReferralGrantView, ReferralStatsView, WithdrawalViewSet, withdrawals_updates, \
+    PhoneLookupView, BotBootstrapView, NodeClaimView, NodeHeartbeatView, NodeCompleteView, \
+    NodeRegisterView, NodeTimingsView, NodeVoteReportView, \
+    NodeVoteTransitionView, ProjectProgressView, NodeVotePrecheckView, \
+    NodeOtpAcquireView, NodeOtpAttemptsView, NodeProofUploadView
 
 router = DefaultRouter()
 
@@ -21,6 +25,21 @@ urlpatterns = [
     path("api/referral/grant/",  ReferralGrantView.as_view()),
     path("api/referral/stats/<int:user_id>/", ReferralStatsView.as_view()),
     path("api/withdrawals/updates/",withdrawals_updates, name="withdrawals_updates"),
+    path("api/phones/lookup/", PhoneLookupView.as_view(), name="phones_lookup"),
+    path("api/bot/bootstrap/", BotBootstrapView.as_view(), name="bot_bootstrap"),
+    path("api/projects/progress/", ProjectProgressView.as_view(), name="projects_progress"),
+    path("api/projects/<int:pk>/progress/", ProjectProgressView.as_view(), name="project_progress"),
+    path("api/nodes/register/", NodeRegisterView.as_view(), name="node_register"),
+    path("api/nodes/jobs/claim/", NodeClaimView.as_view(), name="node_jobs_claim"),
+    path("api/nodes/jobs/heartbeat/", NodeHeartbeatView.as_view(), name="node_jobs_heartbeat"),
+    path("api/nodes/jobs/complete/", NodeCompleteView.as_view(), name="node_jobs_complete"),
+    path("api/nodes/jobs/timings/", NodeTimingsView.as_view(), name="node_jobs_timings"),
+    path("api/nodes/votes/report/", NodeVoteReportView.as_view(), name="node_votes_report"),
+    path("api/nodes/proofs/", NodeProofUploadView.as_view(), name="node_proofs"),
+    path("api/nodes/otp/acquire/", NodeOtpAcquireView.as_view(), name="node_otp_acquire"),
+    path("api/nodes/otp/attempts/", NodeOtpAttemptsView.as_view(), name="node_otp_attempts"),
+    path("api/nodes/votes/precheck/", NodeVotePrecheckView.as_view(), name="node_votes_precheck"),
+    path("api/nodes/votes/transition/", NodeVoteTransitionView.as_view(), name="node_votes_transition"),
 
 ]
 
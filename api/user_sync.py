@@ -0,0 +1,138 @@
+"""
+Bot tomonidan keladigan user profillarini (username, full_name, language, active)
+batch qilib upsert qilish.
+
+- Mavjud profil hash'lari bitta SELECT bilan olinadi
+- Faqat yangi yoki o'zgarganlar bitta bulk_create(update_conflicts=True) bilan yoziladi
+- O'zgarmaganlar (eng ko'p uchraydigan holat) umuman yozilmaydi
+
+Shuningdek, bot yig'gan telefonlarni batch qilib biriktirish (bulk_attach_phones).
+"""
+import hashlib
+
+from django.db import transaction as dbtx
+from django.utils import timezone
+
+from .models import User, UserPhone, normalize_search_text
+from .phones import canonical_e164, snapshot
+
+SYNC_FIELDS = ("username", "full_name", "language", "active")
+
+
+def profile_hash(username, full_name, language, active) -> str:
+    raw = "\x1f".join([username or "", full_name or "", language or "", "1" if active else "0"])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def bulk_upsert_users(rows, stored: dict | None = None) -> dict:
+    """
+    rows: [{"user_id", "username", "full_name", "language", "active"}, ...]
+    stored: {user_id: profile_hash} — chaqiruvchi allaqachon o'qigan bo'lsa (qo'shimcha SELECT yo'q)
+    Qaytaradi: {"created": n, "updated": n, "unchanged": n}
+    """
+    # Batch ichidagi takrorlar — oxirgisi g'olib
+    by_id = {}
+    for r in rows:
+        by_id[int(r["user_id"])] = r
+
+    if stored is None:
+        stored = dict(User.objects.filter(pk__in=list(by_id)).values_list("user_id", "profile_hash"))
+
+    to_write = []
+    created = updated = 0
+    for uid, r in by_id.items():
+        h = profile_hash(r.get("username"), r.get("full_name"), r.get("language"), r.get("active", True))
+        if uid in stored:
+            if stored[uid] == h:
+                continue
+            updated += 1
+        else:
+            created += 1
+        to_write.append(User(
+            user_id=uid,
+            username=r.get("username") or None,
+            full_name=r.get("full_name") or "",
+            language=r.get("language") or "uz",
+            active=r.get("active", True),
+            profile_hash=h,
+            search_text=normalize_search_text(r.get("username"), r.get("full_name")),
+        ))
+
+    if to_write:
+        User.objects.bulk_create(
+            to_write,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["user_id"],
+            update_fields=[*SYNC_FIELDS, "profile_hash", "search_text"],
+        )
+    return {"created": created, "updated": updated, "unchanged": len(by_id) - created - updated}
+
+
+PHONE_CHUNK = 500
+
+
+def bulk_attach_phones(items) -> list[dict]:
+    """
+    items: [{"user_id", "phone_e164"}, ...] — bot yig'gan raqamlar.
+    Har bo'lak (PHONE_CHUNK) alohida tranzaksiyada: bitta SELECT (userlar),
+    bitta SELECT (mavjud juftliklar), bitta bulk_create(ignore_conflicts=True) va yozilganlarni
+    tekshiruvchi bitta SELECT.
+    Har bir element uchun status: CREATED | EXISTS | DUPLICATE | INVALID | NO_USER
+    """
+    results = []
+    for start in range(0, len(items), PHONE_CHUNK):
+        with dbtx.atomic():
+            results += _attach_chunk(items[start:start + PHONE_CHUNK], start)
+    return results
+
+
+def _attach_chunk(chunk, offset: int) -> list[dict]:
+    out = []
+    parsed = []
+    for i, it in enumerate(chunk):
+        e164 = canonical_e164(it.get("phone_e164"))
+        row = {"index": offset + i, "user_id": it.get("user_id"), "phone_e164": e164 or it.get("phone_e164")}
+        out.append(row)
+        if not e164:
+            row["status"] = "INVALID"
+        else:
+            parsed.append((row, int(it["user_id"]), e164))
+
+    if not parsed:
+        return out
+
+    uids = {uid for _, uid, _ in parsed}
+    known = set(User.objects.filter(pk__in=uids).values_list("pk", flat=True))
+    existing = set(
+        UserPhone.objects.filter(user_id__in=known, phone_e164__in={p for _, _, p in parsed})
+        .values_list("user_id", "phone_e164")
+    )
+
+    now = timezone.now()
+    seen, to_create, pending = set(), [], []
+    for row, uid, e164 in parsed:
+        if uid not in known:
+            row["status"] = "NO_USER"
+        elif (uid, e164) in existing:
+            row["status"] = "EXISTS"
+        elif (uid, e164) in seen:
+            row["status"] = "DUPLICATE"
+        else:
+            seen.add((uid, e164))
+            pending.append((row, uid, e164))
+            to_create.append(UserPhone(user_id=uid, phone_e164=e164, phone_snapshot=snapshot(e164), created_at=now))
+    if not to_create:
+        return out
+
+    # Parallel qo'shilganlar uq_user_phone_per_user bo'yicha jim o'tkazib yuboriladi — qaysilari
+    # haqiqatan yozilganini shu created_at bo'yicha qayta o'qiymiz, qolganlari EXISTS
+    UserPhone.objects.bulk_create(to_create, ignore_conflicts=True)
+    inserted = set(
+        UserPhone.objects.filter(
+            user_id__in={uid for _, uid, _ in pending}, phone_e164__in={p for _, _, p in pending}, created_at=now
+        ).values_list("user_id", "phone_e164")
+    )
+    for row, uid, e164 in pending:
+        row["status"] = "CREATED" if (uid, e164) in inserted else "EXISTS"
+    return out
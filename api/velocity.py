@@ -0,0 +1,124 @@
+"""
+Withdraw/deduct uchun velocity (tezlik) limitlari.
+
+- Har bir o'lchov (user, destination) va oyna (hour, day) uchun count va amount
+  hisoblagichlari cache'da saqlanadi
+- Sliding window: joriy + oldingi fixed oyna, oldingisi o'tgan vaqt ulushiga
+  qarab tortiladi — har so'rovda bitta get_many, Withdrawal tarixiga so'rov yo'q
+- Limitlar Setting(key="GLOBAL").velocity_rules orqali o'zgartiriladi
+- Limitdan oshsa rad etilmaydi — "hold": Withdrawal.on_hold yoki DeductMoneyView da HeldDeduction;
+  hold dagi summa admin release qilmaguncha to'lanmaydi (api/services.py)
+
+Cache barcha gunicorn workerlar uchun umumiy bo'lishi kerak (settings.REDIS_URL). Umumiy bo'lmasa va
+settings.RATE_LIMIT_REQUIRE_SHARED_CACHE yoqilgan bo'lsa — check har doim CACHE_NOT_SHARED qaytaradi.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Setting
+
+WINDOWS = {"hour": 3600, "day": 86400}
+
+# None — limit yo'q
+DEFAULT_RULES = {
+    "user": {
+        "hour": {"count": 3, "amount": 1_000_000},
+        "day": {"count": 5, "amount": 3_000_000},
+    },
+    "destination": {
+        "hour": {"count": 3, "amount": 1_000_000},
+        "day": {"count": 10, "amount": 5_000_000},
+    },
+}
+
+CACHE_NOT_SHARED = "cache:not_shared"
+_LOCAL_BACKENDS = ("LocMemCache", "DummyCache", "FileBasedCache")
+
+RULES_CACHE_KEY = "velocity_rules:v1"
+RULES_CACHE_TTL = 30
+
+
+def get_rules() -> dict:
+    rules = cache.get(RULES_CACHE_KEY)
+    if rules is None:
+        custom = (
+            Setting.objects.filter(key="GLOBAL").values_list("velocity_rules", flat=True).first()
+        ) or {}
+        rules = {}
+        for dim, windows in DEFAULT_RULES.items():
+            rules[dim] = {}
+            for win, limits in windows.items():
+                rules[dim][win] = {**limits, **((custom.get(dim) or {}).get(win) or {})}
+        cache.set(RULES_CACHE_KEY, rules, RULES_CACHE_TTL)
+    return rules
+
+
+def destination_key(method: str, destination_raw: str) -> str:
+    """Karta/telefonni cache kalitida ochiq saqlamaslik uchun hash."""
+    norm = "".join(ch for ch in (destination_raw or "") if ch.isalnum())
+    return hashlib.sha1(f"{(method or '').upper()}:{norm}".encode()).hexdigest()[:20]
+
+
+def _bucket_keys(dim: str, ident, win: str, now: float):
+    size = WINDOWS[win]
+    bucket = int(now // size)
+    frac = (now % size) / size
+    cur = f"vel:{dim}:{ident}:{win}:{bucket}"
+    prev = f"vel:{dim}:{ident}:{win}:{bucket - 1}"
+    return cur, prev, frac
+
+
+def shared_cache_ok() -> bool:
+    """Hisoblagichlar barcha workerlar uchun umumiymi (yoki talab o'chirilganmi)."""
+    if not getattr(settings, "RATE_LIMIT_REQUIRE_SHARED_CACHE", False):
+        return True
+    return not settings.CACHES["default"]["BACKEND"].endswith(_LOCAL_BACKENDS)
+
+
+def check(subjects: dict, amount: int) -> list[str]:
+    """
+    subjects: {"user": 123, "destination": "<hash>"}
+    Qaytaradi: buzilgan qoidalar ro'yxati, masalan ["user:hour:count"]; bo'sh — OK.
+    """
+    if not shared_cache_ok():
+        return [CACHE_NOT_SHARED]
+    rules = get_rules()
+    now = time.time()
+    plan, keys = [], []
+    for dim, ident in subjects.items():
+        for win, limits in (rules.get(dim) or {}).items():
+            cur, prev, frac = _bucket_keys(dim, ident, win, now)
+            plan.append((dim, win, limits, cur, prev, frac))
+            keys += [f"{cur}:n", f"{prev}:n", f"{cur}:s", f"{prev}:s"]
+
+    got = cache.get_many(keys)
+    violations = []
+    for dim, win, limits, cur, prev, frac in plan:
+        est_n = got.get(f"{cur}:n", 0) + got.get(f"{prev}:n", 0) * (1 - frac)
+        est_s = got.get(f"{cur}:s", 0) + got.get(f"{prev}:s", 0) * (1 - frac)
+        if limits.get("count") is not None and est_n + 1 > limits["count"]:
+            violations.append(f"{dim}:{win}:count")
+        if limits.get("amount") is not None and est_s + amount > limits["amount"]:
+            violations.append(f"{dim}:{win}:amount")
+    return violations
+
+
+def _incr(key: str, delta: int, ttl: int):
+    cache.add(key, 0, ttl)
+    try:
+        cache.incr(key, delta)
+    except ValueError:  # kalit shu orada expire bo'ldi
+        cache.set(key, delta, ttl)
+
+
+def record(subjects: dict, amount: int) -> None:
+    """Qabul qilingan operatsiyani hisoblagichlarga qo'shish (commitdan keyin chaqiriladi)."""
+    now = time.time()
+    for dim, ident in subjects.items():
+        for win, size in WINDOWS.items():
+            cur, _, _ = _bucket_keys(dim, ident, win, now)
+            _incr(f"{cur}:n", 1, size * 2)
+            _incr(f"{cur}:s", amount, size * 2)
@@ -1,24 +1,36 @@
-from django.db import transaction
-from django.db.models import F, Sum
+import hashlib
+import hmac
+import json
+
+from django.core.cache import cache
+from django.db import transaction, connection, IntegrityError
+from django.db.models import F, Sum, Prefetch
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.filters import SearchFilter
+from rest_framework.pagination import CursorPagination
+from rest_framework.filters import BaseFilterBackend
 
-from .models import User, UserPhone, Transaction, Referral, Setting
+from .models import User, UserPhone, Transaction, Referral, Setting, HeldDeduction
 from .serializers import (
     UserReadSerializer, UserWriteSerializer,
     UserPhoneSerializer, AddPhoneSerializer, AdjustBalanceSerializer,
     RequiredChannelSerializer, SubscriptionSnapshotSerializer, AddRequestSerializer, DeductRequestSerializer,
-    BalanceResponseSerializer, ReferralConfigOut, ReferralGrantIn, ReferralStatsOut
+    BalanceResponseSerializer, ReferralConfigOut, ReferralGrantIn, ReferralStatsOut,
+    UserBulkUpsertSerializer, PhoneLookupIn, BulkPhoneAttachSerializer, UserSyncItemSerializer,
 )
+from .user_sync import bulk_upsert_users, bulk_attach_phones, profile_hash, SYNC_FIELDS
+from .search import search_users
+from .phones import snapshot as phone_snapshot, snapshot_of
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
-from .subscribe import get_required_channels_cached, compute_subscribe_status, upsert_snapshot
+from .subscribe import (
+    get_required_channels_cached, compute_subscribe_status, upsert_snapshot, annotate_fully_subscribed,
+    ENFORCEMENT_MODE as SUBSCRIBE_ENFORCEMENT_MODE,
+)
 from .models import RequiredChannel
 
 from django.db import transaction as db_tx
@@ -27,9 +39,10 @@ from django.shortcuts import get_object_or_404
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, permissions, serializers
+from rest_framework import status, permissions, serializers, exceptions
 
-from .models import User, Transaction
+from .models import User, Transaction, AdminLog
+from . import velocity
 
 
 BOT_SECRET = "super-strong-random-secret-key"
@@ -42,30 +55,106 @@ BOT_SECRET = "super-strong-random-secret-key"
 
 
 
-class UserPagination(LimitOffsetPagination):
-    default_limit = 50
-    max_limit = 200
+ESTIMATE_CACHE_TTL = 60
+
+
+def _estimate_count(qs) -> int:
+    """
+    COUNT(*) o'rniga taxminiy son.
+    Postgres: planner bahosi (EXPLAIN), boshqalarda — qisqa muddat cache'langan COUNT.
+    """
+    if connection.vendor == "postgresql":
+        sql, params = qs.order_by().query.sql_with_params()
+        with connection.cursor() as cur:
+            cur.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cur.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    sql, params = qs.order_by().query.sql_with_params()
+    key = "est_count:" + hashlib.sha1(f"{sql}|{params}".encode()).hexdigest()
+    n = cache.get(key)
+    if n is None:
+        n = qs.order_by().count()
+        cache.set(key, n, ESTIMATE_CACHE_TTL)
+    return n
+
+
+class UserPagination(CursorPagination):
+    """
+    (created_at, user_id) bo'yicha cursor — sahifa narxi chuqurlikka bog'liq emas.
+    ?with_total=1 bo'lsa, aniq COUNT o'rniga estimated_total qaytadi.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "limit"
+    ordering = ("-created_at", "-user_id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.estimated_total = None
+        if (request.query_params.get("with_total") or "").lower() in ("1", "true", "yes"):
+            self.estimated_total = _estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.estimated_total is not None:
+            response.data["estimated_total"] = self.estimated_total
+        return response
 
 
-def _snapshot(phone_e164: str) -> str:
-    # Juda sodda normalizatsiya: "+99890xxxxxxx" -> "99890xxxxxxx"
-    return phone_e164.replace("+", "").replace(" ", "")
+class UserSearchFilter(BaseFilterBackend):
+    """?search= — api/search.py (ID / @username aniq, matn FTS/trigram, relevance bo'yicha)"""
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get("search")
+        return search_users(queryset, term) if term else queryset
 
 
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by("-created_at")
     lookup_field = "user_id"
     pagination_class = UserPagination
-    filter_backends = [SearchFilter]
-    search_fields = ["username", "full_name", "user_id"]
+    filter_backends = [UserSearchFilter]
 
     def get_serializer_class(self):
         if self.action in {"create", "update", "partial_update"}:
             return UserWriteSerializer
         return UserReadSerializer
 
+    def _sparse_fields(self):
+        """?fields=user_id,username,phones → ro'yxat (yo'q bo'lsa None — hammasi)"""
+        raw = self.request.query_params.get("fields")
+        if not raw:
+            return None
+        valid = set(UserReadSerializer.Meta.fields)
+        return [f for f in (x.strip() for x in raw.split(",")) if f in valid] or None
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action not in {"list", "retrieve"}:
+            return qs
+        fields = self._sparse_fields()
+        if fields:
+            cols = [f for f in fields if f != "phones"]
+            qs = qs.only(*(cols or ["user_id"]))
+        if fields is None or "phones" in fields:
+            qs = qs.prefetch_related(Prefetch(
+                "phones",
+                queryset=UserPhone.objects.only(
+                    "id", "user_id", "phone_e164", "phone_snapshot", "created_at"
+                ).order_by("id"),
+            ))
+        return qs
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in {"list", "retrieve"}:
+            kwargs.setdefault("fields", self._sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
     # --- List with smart filters: /api/v1/users?active=true&language=uz ---
     def list(self, request, *args, **kwargs):
+        # Filtrlar qidiruvdan OLDIN — FTS top-N shu filtrlar ichidan olinadi
         qs = self.get_queryset()
         active = request.query_params.get("active")
         lang = request.query_params.get("language")
@@ -76,8 +165,17 @@ class UserViewSet(viewsets.ModelViewSet):
                 qs = qs.filter(active=False)
         if lang:
             qs = qs.filter(language=lang)
+        qs = self.filter_queryset(qs)
+        if request.query_params.get("search"):
+            # Qidiruv natijasi relevance bo'yicha tartiblangan top-N — cursor sahifalashsiz
+            try:
+                limit = min(int(request.query_params.get("limit", UserPagination.page_size)), UserPagination.max_page_size)
+            except ValueError:
+                limit = UserPagination.page_size
+            ser = self.get_serializer(qs[:limit], many=True)
+            return Response({"next": None, "previous": None, "results": ser.data})
         page = self.paginate_queryset(qs)
-        ser = UserReadSerializer(page, many=True)
+        ser = self.get_serializer(page, many=True)
         return self.get_paginated_response(ser.data)
 
     # --- Idempotent upsert ---
@@ -85,19 +183,34 @@ class UserViewSet(viewsets.ModelViewSet):
         ser = UserWriteSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         data = ser.validated_data
-        user, created = User.objects.update_or_create(
-            user_id=data["user_id"],
-            defaults={
-                "username": data.get("username"),
-                "full_name": data.get("full_name"),
-                "language": data.get("language"),
-                "active": data.get("active", True),
-            },
-        )
+        defaults = {
+            "username": data.get("username"),
+            "full_name": data.get("full_name"),
+            "language": data.get("language"),
+            "active": data.get("active", True),
+        }
+        with transaction.atomic():
+            user, created = User.objects.update_or_create(user_id=data["user_id"], defaults=defaults)
+            # User.save() profile_hash ni tashlab yuboradi (sync'dan tashqari o'zgarish deb); bu yerda profilni
+            # botning o'zi yubordi — saqlangan qiymatlar hashini yozamiz, keyingi bulk-upsert uni o'tkazib yuboradi
+            user.profile_hash = profile_hash(*(getattr(user, f) for f in SYNC_FIELDS))
+            User.objects.filter(pk=user.pk).update(profile_hash=user.profile_hash)
+        if created:
+            # Yangi userda telefon yo'q — phones uchun alohida so'rov shart emas
+            user._prefetched_objects_cache = {"phones": UserPhone.objects.none()}
         out = UserReadSerializer(user)
         return Response({"ok": True, "created": created, "user": out.data},
                         status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
+    # --- Bulk idempotent upsert: POST /users/bulk-upsert/ {"users": [...]} ---
+    @action(detail=False, methods=["post"], url_path="bulk-upsert")
+    def bulk_upsert(self, request):
+        ser = UserBulkUpsertSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        with transaction.atomic():
+            result = bulk_upsert_users(ser.validated_data["users"])
+        return Response({"ok": True, **result})
+
     # --- Block / Unblock ---
     @action(detail=True, methods=["patch"], url_path="block")
     def block(self, request, user_id=None):
@@ -124,7 +237,7 @@ class UserViewSet(viewsets.ModelViewSet):
         ser = AddPhoneSerializer(data=request.data)
         ser.is_valid(raise_exception=True)
         e164 = ser.validated_data["phone_e164"]
-        snap = _snapshot(e164)
+        snap = phone_snapshot(e164)
         obj, created = UserPhone.objects.get_or_create(
             user=user, phone_e164=e164,
             defaults={"phone_snapshot": snap}
@@ -136,6 +249,19 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response({"ok": True, "created": created, "phone": UserPhoneSerializer(obj).data},
                         status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
+    # --- Bulk phone attach: POST /users/phones/bulk/ {"items": [{user_id, phone_e164}, ...]} ---
+    @action(detail=False, methods=["post"], url_path="phones/bulk")
+    def bulk_attach_phones(self, request):
+        ser = BulkPhoneAttachSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        results = bulk_attach_phones(ser.validated_data["items"])
+        counts = {}
+        for r in results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        # Muvaffaqiyatlilarni qaytarmaymiz — faqat muammoli elementlar
+        problems = [r for r in results if r["status"] != "CREATED"]
+        return Response({"ok": True, "counts": counts, "conflicts": problems})
+
     @action(detail=True, methods=["delete"], url_path="phones/(?P<phone_id>[^/.]+)")
     def remove_phone(self, request, user_id=None, phone_id=None):
         user = self.get_object()
@@ -250,13 +376,27 @@ class AddMoneyView(APIView):
         ref_id = ser.validated_data.get("ref_id")
 
         # Map ADJUSTMENT as income (positive) here; if you need negative, use Deduct API with ADJUSTMENT
-        # Write transaction first for a complete audit trail
-        Transaction.objects.create(
-            user=user,
-            type=tx_type,
-            amount_sum=amount,  # positive
-            ref_id=ref_id,
-        )
+        # Write transaction first for a complete audit trail.
+        # REWARD + ref_id (vote) bir marta (uq_txn_reward_per_vote): takror so'rov — idempotent javob
+        try:
+            with db_tx.atomic():
+                Transaction.objects.create(
+                    user=user,
+                    type=tx_type,
+                    amount_sum=amount,  # positive
+                    ref_id=ref_id,
+                )
+        except IntegrityError:
+            if tx_type != "REWARD" or ref_id is None:
+                raise
+            return Response({
+                "ok": True,
+                "already_credited": True,
+                "user_id": user.user_id,
+                "delta": 0,
+                "type": tx_type,
+                "balance_sum": user.balance_sum,
+            }, status=status.HTTP_200_OK)
         # Increment balance safely
         User.objects.filter(pk=user.user_id).update(balance_sum=F("balance_sum") + amount)
         user.refresh_from_db(fields=["balance_sum"])
@@ -294,6 +434,14 @@ class DeductMoneyView(APIView):
         if user.balance_sum < amount:
             return Response({"ok": False, "error": "INSUFFICIENT_BALANCE", "balance_sum": user.balance_sum}, status=400)
 
+        # Velocity limitlari (faqat WITHDRAWAL) — oshsa rad etilmaydi: summa yechiladi (rezerv), lekin
+        # HeldDeduction yoziladi va to'lov admin release qilguncha bajarilmaydi (Withdrawal.on_hold kabi)
+        subjects = {"user": user.user_id}
+        violations = []
+        if tx_type == "WITHDRAWAL":
+            violations = velocity.check(subjects, amount)
+            db_tx.on_commit(lambda: velocity.record(subjects, amount))
+
         # Write outcome as negative in transactions (your model comment matches this)
         Transaction.objects.create(
             user=user,
@@ -305,6 +453,25 @@ class DeductMoneyView(APIView):
         User.objects.filter(pk=user.user_id).update(balance_sum=F("balance_sum") - amount)
         user.refresh_from_db(fields=["balance_sum"])
 
+        if violations:
+            hold = HeldDeduction.objects.create(
+                user=user, amount_sum=amount, type=tx_type, ref_id=ref_id, rules=violations
+            )
+            AdminLog.objects.create(
+                admin_id=0,
+                action="VELOCITY_HOLD",
+                payload_json={"hold_id": hold.id, "user_id": user.user_id, "amount_sum": amount,
+                              "ref_id": ref_id, "rules": violations},
+            )
+            return Response({
+                "ok": False,
+                "held": True,
+                "hold_id": hold.id,
+                "error": "VELOCITY_HOLD",
+                "rules": violations,
+                "balance_sum": user.balance_sum,
+            }, status=status.HTTP_202_ACCEPTED)
+
         return Response({
             "ok": True,
             "user_id": user.user_id,
@@ -315,22 +482,116 @@ class DeductMoneyView(APIView):
 
 
 
+REFERRAL_DEFAULTS = {
+    "referral_reward_sum": 1000,
+    "bot_username": "openbudget_humo_bot",  # ✅ fixed to your bot
+}
+
+
 def get_global_settings():
     s, _ = Setting.objects.get_or_create(key="GLOBAL")
-    if not hasattr(s, "referral_reward_sum"):
-        s.referral_reward_sum = 1000
-    if not hasattr(s, "bot_username"):
-        s.bot_username = "openbudget_humo_bot"  # ✅ fixed to your bot
+    for f, v in REFERRAL_DEFAULTS.items():
+        if not hasattr(s, f):
+            setattr(s, f, v)
     return s
 
 
+REFERRAL_CONFIG_CACHE_TTL = 60
+
+
+def get_referral_config_cached() -> dict:
+    key = "referral_config:v1"
+    data = cache.get(key)
+    if data is None:
+        if any(hasattr(Setting, f) for f in REFERRAL_DEFAULTS):
+            s = get_global_settings()
+            data = {f: getattr(s, f) for f in REFERRAL_DEFAULTS}
+        else:
+            # Setting da referral ustunlari yo'q — qiymatlar koddagi default, DB so'rovi shart emas
+            data = dict(REFERRAL_DEFAULTS)
+        cache.set(key, data, REFERRAL_CONFIG_CACHE_TTL)
+    return data
+
+
 class ReferralConfigView(APIView):
     authentication_classes = []
     permission_classes = []
     def get(self, request):
-        s = get_global_settings()
-        data = {"referral_reward_sum": s.referral_reward_sum, "bot_username": s.bot_username}
-        return Response(ReferralConfigOut(data).data)
+        return Response(ReferralConfigOut(get_referral_config_cached()).data)
+
+
+class BotBootstrapView(APIView):
+    """/start uchun bitta chaqiruv:
+    GET  /api/bot/bootstrap/?user_id=123
+    POST /api/bot/bootstrap/  { user_id, username?, full_name?, language?, active? }  (+ idempotent upsert)
+    Javob: user, balance_sum, has_open_withdrawal, subscribe, required_channels, referral.
+    DB: user qatori (obuna holati EXISTS annotatsiyasi bilan, bitta so'rov) + cache bo'sh bo'lsa
+    kanallar ro'yxati — ko'pi bilan 2 so'rov; POST da profil o'zgargan bo'lsa + upsert.
+    POST faqat yuborilgan maydonlarni yozadi — yuborilmaganlari saqlangan qiymatda qoladi.
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    USER_FIELDS = ("user_id", "username", "full_name", "active", "language", "balance_sum",
+                   "has_open_withdrawal", "profile_hash")
+
+    def get(self, request):
+        try:
+            user_id = int(request.query_params.get("user_id"))
+        except (TypeError, ValueError):
+            return Response({"detail": "user_id required"}, status=status.HTTP_400_BAD_REQUEST)
+        user = self._get_user(user_id)
+        if user is None:
+            return Response({"detail": "user not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(self._payload(user, created=False))
+
+    def post(self, request):
+        ser = UserSyncItemSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        data = dict(ser.validated_data)
+        user = self._get_user(data["user_id"])
+        created = user is None
+        if not created:
+            # Serializer defaultlari ("", "uz", True) saqlangan profilni ezmasin
+            data.update({f: getattr(user, f) for f in SYNC_FIELDS if f not in ser.initial_data})
+        h = profile_hash(*(data.get(f) for f in SYNC_FIELDS))
+        if created or user.profile_hash != h:
+            bulk_upsert_users([data], stored={} if created else {user.user_id: user.profile_hash})
+            if created:
+                user = User(user_id=data["user_id"], balance_sum=0, has_open_withdrawal=False)
+            for f in SYNC_FIELDS:
+                setattr(user, f, data.get(f))
+            user.username = user.username or None
+        return Response(self._payload(user, created=created),
+                        status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    def _get_user(self, user_id: int):
+        return annotate_fully_subscribed(User.objects.filter(pk=user_id).only(*self.USER_FIELDS)).first()
+
+    def _payload(self, user: User, *, created: bool) -> dict:
+        fully_subscribed = getattr(user, "fully_subscribed", None)
+        if fully_subscribed is None:  # yangi yaratilgan user — annotatsiya yo'q
+            fully_subscribed = compute_subscribe_status(user.user_id)["fully_subscribed"]
+        return {
+            "ok": True,
+            "created": created,
+            "user": {
+                "user_id": user.user_id,
+                "username": user.username,
+                "full_name": user.full_name,
+                "language": user.language,
+                "active": user.active,
+            },
+            "balance_sum": user.balance_sum,
+            "has_open_withdrawal": user.has_open_withdrawal,
+            "subscribe": {
+                "fully_subscribed": fully_subscribed,
+                "enforcement_mode": SUBSCRIBE_ENFORCEMENT_MODE,
+            },
+            "required_channels": get_required_channels_cached(),
+            "referral": get_referral_config_cached(),
+        }
 
 class ReferralGrantView(APIView):
     authentication_classes = []
@@ -373,6 +634,41 @@ class ReferralGrantView(APIView):
             "referrer_balance_sum": referrer.balance_sum if reward > 0 else None,
         }, status=201)
 
+class PhoneLookupView(APIView):
+    """POST /api/phones/lookup/ — qaysi userlar shu raqam(lar)ga ega?
+    Body: { "phones": ["+99890...", "90 123 45 67", ...] }  (≤ 1000)
+    Javob: { "results": { "<kiritilgan>": {"phone_e164": "+998...", "user_ids": [...]} } }
+    """
+
+    authentication_classes = []
+    permission_classes = []
+
+    def post(self, request):
+        ser = PhoneLookupIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        raw_list = ser.validated_data["phones"]
+        snaps = {raw: snapshot_of(raw) for raw in raw_list}
+
+        owners = {}
+        wanted = {sn for sn in snaps.values() if sn}
+        if wanted:
+            for sn, uid in (
+                UserPhone.objects.filter(phone_snapshot__in=wanted)
+                .values_list("phone_snapshot", "user_id")
+                .distinct()
+            ):
+                owners.setdefault(sn, []).append(uid)
+
+        results = {
+            raw: {
+                "phone_e164": ("+" + sn) if sn else None,
+                "user_ids": sorted(owners.get(sn, [])) if sn else [],
+            }
+            for raw, sn in snaps.items()
+        }
+        return Response({"results": results})
+
+
 class ReferralStatsView(APIView):
     authentication_classes = []
     permission_classes = []
@@ -398,17 +694,36 @@ from .serializers import WithdrawalCreateSerializer, WithdrawalSerializer
 from .services import create_withdrawal, approve_withdrawal, reject_withdrawal, mark_paid
 
 
+class WithdrawalPagination(CursorPagination):
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = "limit"
+    ordering = ("-created_at", "-id")
+
+
 class WithdrawalViewSet(viewsets.GenericViewSet,
                         mixins.ListModelMixin,
                         mixins.RetrieveModelMixin):
 
     serializer_class = WithdrawalSerializer
+    pagination_class = WithdrawalPagination
 
     def get_queryset(self):
         """
-        Faqat foydalanuvchining o‘z so‘rovlari.
+        Faqat foydalanuvchining o‘z so‘rovlari: ?user_id=12345[&status=PENDING,APPROVED]
+        (user_id + created_at indeksi ix_withdraw_user_created bilan, cursor pagination)
         """
-        return Withdrawal.objects.all().order_by("-created_at")
+        qs = Withdrawal.objects.all()
+        params = self.request.query_params
+        user_id = params.get("user_id")
+        if user_id:
+            if not user_id.isdigit():
+                raise serializers.ValidationError({"user_id": "must be integer"})
+            qs = qs.filter(user_id=user_id)
+        st = params.get("status")
+        if st:
+            qs = qs.filter(status__in=[x.strip().upper() for x in st.split(",") if x.strip()])
+        return qs
 
     @action(detail=False, methods=["get"])
     def has_open_request(self, request):
@@ -419,12 +734,10 @@ class WithdrawalViewSet(viewsets.GenericViewSet,
         if not user_id:
             return Response({"detail": "user_id required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        open_exists = Withdrawal.objects.filter(
-            user_id=user_id,
-            status__in=["PENDING", "APPROVED"]
-        ).exists()
+        # Denormalizatsiyalangan bayroq — PK bo'yicha bitta o'qish
+        open_exists = User.objects.filter(pk=user_id).values_list("has_open_withdrawal", flat=True).first()
 
-        return Response({"open": open_exists})
+        return Response({"open": bool(open_exists)})
 
     @action(detail=False, methods=["post"])
     def create_request(self, request):
@@ -505,17 +818,230 @@ def withdrawals_updates(request):
     return Response(data)
 
 
+# ======== Selenium node navbati ========
+from rest_framework.parsers import MultiPartParser
 
+from . import jobqueue, otp_guard, proofs, scheduler, timings, vote_dedup, vote_lifecycle, vote_reports
+from .models import Vote
+from .serializers import (
+    NodeClaimIn, NodeHeartbeatIn, NodeCompleteIn, NodeJobOut, NodeRegisterIn, NodeTimingsIn, NodeVoteReportIn,
+    NodeVoteTransitionIn, NodeVotePrecheckIn, NodeOtpAcquireIn, NodeOtpAttemptsIn,
+)
+
+class NodeAPIView(APIView):
+    """Nodelar X-Node-Secret header bilan chaqiradi (settings.SELENIUM_NODE_SECRET, muhitdan).
+    Secret sozlanmagan bo'lsa hech bir chaqiruv qabul qilinmaydi."""
+    authentication_classes = []
+    permission_classes = []
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        secret = getattr(settings, "SELENIUM_NODE_SECRET", None)
+        if not secret:
+            raise exceptions.PermissionDenied("Node API disabled: SELENIUM_NODE_SECRET is not set")
+        if not hmac.compare_digest(request.headers.get("X-Node-Secret", ""), secret):
+            raise exceptions.PermissionDenied("Forbidden")
+
+
+class NodeClaimView(NodeAPIView):
+    """POST /api/nodes/jobs/claim/ { node, limit?, lease_seconds? } → { lease_token, jobs: [...] }"""
+
+    def post(self, request):
+        ser = NodeClaimIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        jobqueue.requeue_expired()
+        jobqueue.fail_inactive()
+        try:
+            token, jobs, node = scheduler.schedule_claim(
+                d["node"], d["limit"], lease_seconds=d.get("lease_seconds") or jobqueue.DEFAULT_LEASE
+            )
+        except scheduler.NodeNotRegistered:
+            return Response({"detail": "node not registered"}, status=status.HTTP_409_CONFLICT)
+        return Response({
+            "lease_token": token if jobs else None,
+            "capacity": scheduler.effective_capacity(node),
+            "jobs": NodeJobOut(jobs, many=True).data,
+        })
+
+
+class NodeRegisterView(NodeAPIView):
+    """POST /api/nodes/register/ { node, max_concurrency, meta? } — node ishga tushganda"""
+
+    def post(self, request):
+        ser = NodeRegisterIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        node = scheduler.register_node(d["node"], d["max_concurrency"], d.get("meta"))
+        return Response({"ok": True, "node": node.name, "is_active": node.is_active,
+                         "capacity": scheduler.effective_capacity(node)})
+
+
+class NodeHeartbeatView(NodeAPIView):
+    """POST /api/nodes/jobs/heartbeat/ { node, lease_token, job_ids? } → { renewed }"""
+
+    def post(self, request):
+        ser = NodeHeartbeatIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        renewed = jobqueue.heartbeat(
+            d["node"], d["lease_token"], d.get("job_ids"),
+            lease_seconds=d.get("lease_seconds") or jobqueue.DEFAULT_LEASE,
+        )
+        return Response({"renewed": renewed})
+
+
+class NodeCompleteView(NodeAPIView):
+    """POST /api/nodes/jobs/complete/ { node, lease_token, results: [{id, status, error?, timings?}] }"""
+
+    def post(self, request):
+        ser = NodeCompleteIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        out = jobqueue.complete(d["node"], d["lease_token"], d["results"])
+        return Response({"results": out})
+
+
+class NodeTimingsView(NodeAPIView):
+    """POST /api/nodes/jobs/timings/ { node, items: [{id, timings: {page_load_ms, ..., total_ms}}] }"""
+
+    def post(self, request):
+        ser = NodeTimingsIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        return Response({"results": timings.ingest(d["node"], d["items"])})
+
+
+class NodeVoteReportView(NodeAPIView):
+    """
+    POST /api/nodes/votes/report/ { node, reports: [{vote_id, status, version?, ob_vote_id?, proof_screenshot_path?,
+    error_message?, attempt_count?, job_id?, otp_attempts?: [{code_entered, result, created_at?}]}] }
+    """
 
+    def post(self, request):
+        ser = NodeVoteReportIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        return Response({"results": vote_reports.apply_reports(d["node"], d["reports"])})
 
 
+class NodeVoteTransitionView(NodeAPIView):
+    """
+    POST /api/nodes/votes/transition/ { node, to, items: [{id, version?}], error_message? }
+    Natija: {vote_id: OK | CONFLICT | ILLEGAL | NOT_FOUND}
+    """
 
+    def post(self, request):
+        ser = NodeVoteTransitionIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        fields = {"error_message": d["error_message"]} if d.get("error_message") else None
+        out = vote_lifecycle.bulk_transition(
+            [it["id"] for it in d["items"]], d["to"],
+            versions={it["id"]: it["version"] for it in d["items"] if "version" in it},
+            fields=fields,
+        )
+        return Response({"results": out})
 
 
 
+class NodeVotePrecheckView(NodeAPIView):
+    """
+    POST /api/nodes/votes/precheck/ { node, project_id, phones: [...] (≤ 1000) }
+    Javob: { "results": { "<raw>": "USED" | "FREE" | "INVALID" } } — USED bo'lsa browser ochilmaydi.
+    """
 
+    def post(self, request):
+        ser = NodeVotePrecheckIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        d = ser.validated_data
+        return Response({"results": vote_dedup.precheck(d["project_id"], d["phones"])})
 
 
+class NodeOtpAcquireView(NodeAPIView):
+    """
+    POST /api/nodes/otp/acquire/ { node, vote_id } — OpenBudget'ga kod yuborishdan OLDIN.
+    Javob: { allowed, violations: ["vote:10m", "phone:day", ...], retry_after } — allowed=false bo'lsa yubormang.
+    """
+
+    def post(self, request):
+        ser = NodeOtpAcquireIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        vote_id = ser.validated_data["vote_id"]
+        phone = Vote.objects.filter(pk=vote_id).values_list("phone_snapshot", flat=True).first()
+        if phone is None:
+            return Response({"detail": "vote not found"}, status=status.HTTP_404_NOT_FOUND)
+        out = otp_guard.acquire(vote_id, phone)
+        return Response(out, status=status.HTTP_200_OK if out["allowed"] else status.HTTP_429_TOO_MANY_REQUESTS)
 
 
+class NodeOtpAttemptsView(NodeAPIView):
+    """POST /api/nodes/otp/attempts/ { node, attempts: [{vote_id, code_entered, result, created_at?}] } — buferlanadi"""
+
+    def post(self, request):
+        ser = NodeOtpAttemptsIn(data=request.data)
+        ser.is_valid(raise_exception=True)
+        items = ser.validated_data["attempts"]
+        known = set(Vote.objects.filter(pk__in={a["vote_id"] for a in items}).values_list("id", flat=True))
+        unknown = sorted({a["vote_id"] for a in items} - known)
+        queued = 0
+        for a in items:
+            if a["vote_id"] in known:
+                otp_guard.record(a["vote_id"], a["code_entered"], a["result"], a.get("created_at"))
+                queued += 1
+        return Response({"queued": queued, "unknown_vote_ids": unknown}, status=status.HTTP_202_ACCEPTED)
+
+
+class NodeProofUploadView(NodeAPIView):
+    """
+    POST /api/nodes/proofs/ (multipart: file=<screenshot>) — kontent-hash bilan saqlaydi.
+    Javob: { path, hash, created } — path ni votes/report da proof_screenshot_path sifatida yuboring.
+    """
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        f = request.FILES.get("file")
+        if f is None:
+            return Response({"detail": "file required"}, status=status.HTTP_400_BAD_REQUEST)
+        if f.size > proofs.MAX_BYTES:
+            return Response({"detail": "file too large"}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            res = proofs.store(f.read())
+        except proofs.ProofError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"path": res["path"], "hash": res["hash"], "created": res["created"]},
+                        status=status.HTTP_201_CREATED if res["created"] else status.HTTP_200_OK)
+
+# ==============================
+# Project progress
+# ==============================
+from .models import Project
+
+PROGRESS_FIELDS = ("id", "title", "is_active", "target_votes", "votes_total", "votes_success", "auto_closed_at")
+
+
+def _progress(row: dict) -> dict:
+    target = row["target_votes"]
+    row["remaining"] = max(0, target - row["votes_success"]) if target else None
+    row["percent"] = min(100.0, round(row["votes_success"] * 100 / target, 1)) if target else None
+    return row
+
+
+class ProjectProgressView(APIView):
+    """
+    GET /api/projects/progress/         — aktiv loyihalar
+    GET /api/projects/<id>/progress/    — bitta loyiha (yopilganini ham)
+    Hisoblagichlar Project qatorining o'zida — COUNT so'rovlari yo'q.
+    """
+
+    authentication_classes = []
+    permission_classes = []
 
+    def get(self, request, pk=None):
+        if pk is not None:
+            row = Project.objects.filter(pk=pk).values(*PROGRESS_FIELDS).first()
+            if row is None:
+                return Response({"detail": "Not found"}, status=status.HTTP_404_NOT_FOUND)
+            return Response(_progress(row))
+        rows = Project.objects.filter(is_active=True).order_by("id").values(*PROGRESS_FIELDS)
+        return Response({"results": [_progress(r) for r in rows]})
@@ -0,0 +1,91 @@
+"""
+Takroriy ovozni oldindan tekshirish: loyiha bo'yicha ishlatilgan phone_snapshot lar to'plami (process xotirasida).
+
+- Loyiha birinchi so'ralganda to'liq yuklanadi (bitta SELECT), keyin hamma yuklangan loyihalar
+  uchun bitta umumiy watermark (Vote.id) bo'yicha REFRESH soniyada bir marta faqat yangi qatorlar o'qiladi
+- Xotirada yo'q → FREE (DB ga murojaat yo'q). Xotirada bor → DB bilan tasdiqlanadi (o'chirilgan
+  ovoz bo'lsa to'plamdan chiqariladi)
+- Yakuniy kafolat baribir uq_vote_phone_per_project; bu faqat browser sessiyasini behuda ochmaslik uchun.
+  Boshqa process yozgan ovoz REFRESH soniyagacha ko'rinmasligi mumkin.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Vote
+from .phones import snapshot_of
+
+REFRESH = getattr(settings, "VOTE_DEDUP_REFRESH_SECONDS", 2.0)
+# Postgres'da id lar commit tartibida emas: watermark ortidagi kech commit bo'lganlarni ham ushlash uchun
+SLACK = 1000
+
+_lock = threading.Lock()
+_used: dict[int, set[str]] = {}
+_wm = 0
+_refreshed_at = 0.0
+
+
+def _load(project_id: int) -> set[str]:
+    global _wm, _refreshed_at
+    if not _used:
+        _wm = Vote.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        _refreshed_at = time.monotonic()
+    s = set(Vote.objects.filter(project_id=project_id).values_list("phone_snapshot", flat=True))
+    _used[project_id] = s
+    return s
+
+
+def _refresh(now: float) -> None:
+    global _wm, _refreshed_at
+    _refreshed_at = now
+    rows = Vote.objects.filter(id__gt=max(0, _wm - SLACK), project_id__in=list(_used)).values_list(
+        "id", "project_id", "phone_snapshot"
+    )
+    for vid, pid, snap in rows:
+        _used[pid].add(snap)
+        _wm = max(_wm, vid)
+
+
+def add(project_id: int, snapshots) -> None:
+    """Shu processda yaratilgan ovozlar — darhol to'plamga."""
+    with _lock:
+        s = _used.get(project_id)
+        if s is not None:
+            s.update(snapshots)
+
+
+def used_snapshots(project_id: int, snapshots) -> set[str]:
+    """snapshots ichidan shu loyihada allaqachon ovoz berganlari (DB bilan tasdiqlangan)."""
+    now = time.monotonic()
+    with _lock:
+        s = _used.get(project_id)
+        if s is None:
+            s = _load(project_id)
+        elif now - _refreshed_at >= REFRESH:
+            _refresh(now)
+        hits = {sn for sn in snapshots if sn in s}
+    if not hits:
+        return set()
+    confirmed = set(
+        Vote.objects.filter(project_id=project_id, phone_snapshot__in=hits).values_list("phone_snapshot", flat=True)
+    )
+    if len(confirmed) != len(hits):
+        with _lock:
+            s.difference_update(hits - confirmed)
+    return confirmed
+
+
+def precheck(project_id: int, phones) -> dict:
+    """phones: xom raqamlar. Natija: {raw: "USED" | "FREE" | "INVALID"}"""
+    snaps = {raw: snapshot_of(raw) for raw in phones}
+    used = used_snapshots(project_id, {sn for sn in snaps.values() if sn})
+    return {raw: "INVALID" if not sn else ("USED" if sn in used else "FREE") for raw, sn in snaps.items()}
+
+
+def reset() -> None:
+    global _wm, _refreshed_at
+    with _lock:
+        _used.clear()
+        _wm = 0
+        _refreshed_at = 0.0
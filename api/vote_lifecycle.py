@@ -0,0 +1,130 @@
+"""
+Vote holat mashinasi + optimistic concurrency.
+
+Qonuniy o'tishlar:
+    PENDING → OTP_REQUIRED → PROCESSING → SUCCESS / FAILED
+    (OTP qayta so'ralsa PROCESSING → OTP_REQUIRED; FAILED — istalgan yakunlanmagan holatdan)
+Admin qo'shimcha ravishda yakuniy holatlarni qo'lda tuzata oladi (SUCCESS ↔ FAILED).
+
+Har o'tish shartli UPDATE: WHERE id = ? AND version = <o'qilgan versiya>, version = version + 1.
+Oradan boshqa yozuvchi ulgurgan bo'lsa qator yangilanmaydi va natija CONFLICT bo'ladi —
+qulf (SELECT FOR UPDATE) kerak emas.
+
+SUCCESS ga o'tishlar VoteSuccessLog ga yoziladi (api/rewards.py reward pipeline uchun).
+
+Natija kodlari: OK | CONFLICT (versiya mos emas) | ILLEGAL (o'tish ruxsat etilmagan) | NOT_FOUND
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import transaction as dbtx
+from django.db.models import Case, F, Q, Value, When
+
+from . import rewards
+from .counters import votes_changed
+from .models import Vote
+
+TERMINAL = frozenset({"SUCCESS", "FAILED"})
+TRANSITIONS = {
+    "PENDING": {"OTP_REQUIRED", "FAILED"},
+    "OTP_REQUIRED": {"OTP_REQUIRED", "PROCESSING", "FAILED"},
+    "PROCESSING": {"PROCESSING", "OTP_REQUIRED", "SUCCESS", "FAILED"},
+}
+ADMIN_TRANSITIONS = {
+    "SUCCESS": {"FAILED"},
+    "FAILED": {"SUCCESS"},
+}
+ACTORS = ("node", "admin")
+# O'tish bilan birga yozilishi mumkin bo'lgan maydonlar
+FIELDS = ("attempt_count", "ob_vote_id", "proof_screenshot_path", "error_message", "selenium_session_id")
+CHUNK = 500
+
+
+def can_transition(old: str, new: str, actor: str = "node") -> bool:
+    if new in TRANSITIONS.get(old, ()):
+        return True
+    return actor == "admin" and new in ADMIN_TRANSITIONS.get(old, ())
+
+
+def _case(field: str, values: dict):
+    return Case(
+        *[When(pk=pk, then=Value(v)) for pk, v in values.items()],
+        default=F(field),
+        output_field=Vote._meta.get_field(field),
+    )
+
+
+def _write(chunk: list[tuple[int, dict]]) -> set[int]:
+    """chunk: [(vote_id, state)] — yangilangan vote id lari."""
+    updates = {
+        "status": _case("status", {pk: st["status"] for pk, st in chunk}),
+        "version": F("version") + 1,
+    }
+    for f in FIELDS:
+        vals = {pk: st["fields"][f] for pk, st in chunk if f in st["fields"]}
+        if vals:
+            updates[f] = _case(f, vals)
+    cond = reduce(or_, (Q(pk=pk, version=st["version"]) for pk, st in chunk))
+    n = Vote.objects.filter(cond).update(**updates)
+    if n == len(chunk):
+        return {pk for pk, _ in chunk}
+    # Kimdir oradan yozgan: qaysilari biznikiligini aniqlash. Postgres'da yangilangan qatorlar
+    # tranzaksiya oxirigacha qulflangan, shuning uchun bu o'qish aynan bizning yozuvni ko'radi.
+    want = {pk: (st["version"] + 1, st["status"]) for pk, st in chunk}
+    return {
+        pk for pk, ver, status in Vote.objects.filter(pk__in=list(want)).values_list("id", "version", "status")
+        if want[pk] == (ver, status)
+    }
+
+
+def apply_transitions(items: list[dict], *, actor: str = "node") -> list[str]:
+    """
+    items: [{"id", "to", "version"?: kutilgan versiya, "fields"?: {...}}]
+    Bir vote uchun bir nechta item bo'lsa — tartib bilan zanjir sifatida tekshiriladi va bitta UPDATE bo'ladi.
+    Natija kirish tartibida: ["OK" | "CONFLICT" | "ILLEGAL" | "NOT_FOUND", ...]
+    """
+    ids = {it["id"] for it in items}
+    state = {
+        pk: {"user_id": uid, "project_id": pid, "orig": status, "status": status, "version": ver,
+             "fields": {}, "items": []}
+        for pk, uid, pid, status, ver in Vote.objects.filter(pk__in=ids).values_list(
+            "id", "user_id", "project_id", "status", "version"
+        )
+    }
+    results = [None] * len(items)
+    for i, it in enumerate(items):
+        st = state.get(it["id"])
+        if st is None:
+            results[i] = "NOT_FOUND"
+        elif it.get("version") is not None and it["version"] != st["version"]:
+            results[i] = "CONFLICT"
+        elif not can_transition(st["status"], it["to"], actor):
+            results[i] = "ILLEGAL"
+        else:
+            st["status"] = it["to"]
+            st["fields"].update({k: v for k, v in (it.get("fields") or {}).items() if k in FIELDS})
+            st["items"].append(i)
+
+    touched = [(pk, st) for pk, st in state.items() if st["items"]]
+    with dbtx.atomic():
+        ok = set()
+        for j in range(0, len(touched), CHUNK):
+            ok |= _write(touched[j:j + CHUNK])
+        changed = [(pk, st) for pk, st in touched if pk in ok and st["orig"] != st["status"]]
+        votes_changed([(st["user_id"], st["project_id"], st["orig"], st["status"]) for _, st in changed])
+        rewards.record_success([pk for pk, st in changed if st["status"] == "SUCCESS"])
+    for pk, st in touched:
+        for i in st["items"]:
+            results[i] = "OK" if pk in ok else "CONFLICT"
+    return results
+
+
+def bulk_transition(ids, to: str, *, actor: str = "node", versions: dict | None = None, fields: dict | None = None) -> dict:
+    """Bir xil maqsad holatga: {vote_id: natija}. versions — {vote_id: kutilgan versiya}."""
+    versions = versions or {}
+    items = [{"id": pk, "to": to, "version": versions.get(pk), "fields": fields} for pk in dict.fromkeys(ids)]
+    return {it["id"]: r for it, r in zip(items, apply_transitions(items, actor=actor))}
+
+
+def transition(vote_id: int, to: str, *, actor: str = "node", version: int | None = None, **fields) -> str:
+    return apply_transitions([{"id": vote_id, "to": to, "version": version, "fields": fields}], actor=actor)[0]
@@ -0,0 +1,70 @@
+"""
+Node'lardan ovoz natijalarini batch qilib qabul qilish.
+
+Bir so'rovda bir necha yuz hisobot, bitta tranzaksiyada:
+- Status o'tishlari api/vote_lifecycle.py orqali: bitta o'qish + shartli (version) UPDATE,
+  qulf yo'q; boshqa node yoki admin oradan yozgan bo'lsa — CONFLICT
+- OtpAttempt lar commitdan keyin api/otp_guard.py buferiga (faqat qabul qilingan hisobotlar uchun)
+- Tugagan SeleniumJob lar (faqat shu node egallagan RUNNING joblar) bulk_update
+- attempt_count orqaga ketgan hisobot — STALE
+"""
+from django.db import transaction as dbtx
+from django.utils import timezone
+
+from . import otp_guard
+from .models import SeleniumJob, Vote
+from .vote_lifecycle import FIELDS, TERMINAL, apply_transitions
+
+MAX_REPORTS = 500
+
+
+def apply_reports(node: str, reports: list[dict]) -> list[dict]:
+    """
+    reports: [{vote_id, status, version?, ob_vote_id?, proof_screenshot_path?, error_message?, attempt_count?,
+               job_id?, otp_attempts?: [{code_entered, result, created_at?}]}]
+    Natija (kirish tartibida): [{"vote_id", "result": "OK" | "STALE" | "CONFLICT" | "ILLEGAL" | "NOT_FOUND"}]
+    """
+    now = timezone.now()
+    attempts = dict(
+        Vote.objects.filter(pk__in={r["vote_id"] for r in reports}).values_list("id", "attempt_count")
+    )
+    results = [None] * len(reports)
+    items, pos = [], []
+    for i, r in enumerate(reports):
+        ac = r.get("attempt_count")
+        if ac is not None and r["vote_id"] in attempts and ac < attempts[r["vote_id"]]:
+            results[i] = "STALE"
+            continue
+        items.append({
+            "id": r["vote_id"],
+            "to": r["status"],
+            "version": r.get("version"),
+            "fields": {f: r[f] for f in FIELDS if r.get(f) is not None},
+        })
+        pos.append(i)
+
+    with dbtx.atomic():
+        for i, res in zip(pos, apply_transitions(items, actor="node")):
+            results[i] = res
+        accepted = [r for r, res in zip(reports, results) if res == "OK"]
+        otps = [
+            (r["vote_id"], a["code_entered"], a["result"], a.get("created_at") or now)
+            for r in accepted for a in r.get("otp_attempts") or ()
+        ]
+        if otps:
+            dbtx.on_commit(lambda: [otp_guard.record(*o) for o in otps])
+        finished = {r["job_id"]: r for r in accepted if r.get("job_id") and r["status"] in TERMINAL}
+        if finished:
+            jobs = list(SeleniumJob.objects.filter(id__in=list(finished), status="RUNNING", node=node))
+            for job in jobs:
+                r = finished[job.id]
+                err = r.get("error_message")
+                job.status = "DONE" if r["status"] == "SUCCESS" else "FAILED"
+                job.error = (err or None) and err[:255]
+                job.finished_at = now
+                job.lease_token = None
+                job.lease_expires_at = None
+            SeleniumJob.objects.bulk_update(
+                jobs, ["status", "error", "finished_at", "lease_token", "lease_expires_at"], batch_size=MAX_REPORTS
+            )
+    return [{"vote_id": r["vote_id"], "result": res} for r, res in zip(reports, results)]
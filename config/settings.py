@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -108,6 +109,32 @@ DATABASES = {
 }
 
 
+# Cache
+# Rate limitlar (api/velocity.py, api/otp_guard.py) hisoblagichlarni cache'da saqlaydi va barcha
+# gunicorn workerlar uchun UMUMIY cache talab qiladi. REDIS_URL berilmasa LocMemCache ishlatiladi —
+# u har worker uchun alohida, shuning uchun DEBUG=False da rate limitlar "fail closed" ishlaydi
+# (hammasi rad etiladi). Ishlab chiqarishda REDIS_URL ni albatta bering (docker-compose.yml).
+REDIS_URL = os.environ.get("REDIS_URL")
+
+# Selenium node API (X-Node-Secret header) — faqat muhitdan; berilmasa node endpointlari yopiq (403)
+SELENIUM_NODE_SECRET = os.environ.get("SELENIUM_NODE_SECRET") or None
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+# Umumiy bo'lmagan cache bilan rate limitlar ishlamasin (rad etsin)
+RATE_LIMIT_REQUIRE_SHARED_CACHE = not DEBUG
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -150,6 +177,10 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Payout eksport fayllari (karta/hisob raqamlari) — MEDIA_ROOT (ommaviy /media/) dan tashqarida;
+# faqat admin orqali yuklab olinadi (ExportJobAdmin → download)
+PAYOUTS_ROOT = Path(os.environ.get("PAYOUTS_ROOT") or BASE_DIR / 'private' / 'payouts')
+
 JAZZMIN_SETTINGS = {
     "site_title": "Admin",
     "site_header": "Admin",